@@ -25,7 +25,8 @@ connector = DSXConnector(connector_name=config.name,
                          connector_id=connector_id,
                          base_connector_url=config.connector_url,
                          dsx_connect_url=config.dsx_connect_url,
-                         test_mode=config.test_mode)
+                         test_mode=config.test_mode,
+                         change_index_path=config.change_index_db if config.full_scan_incremental else None)
 
 aws_s3_client = AWSS3Client(s3_endpoint_url=config.s3_endpoint_url, s3_endpoint_verify=config.s3_endpoint_verify)
 
@@ -106,8 +107,9 @@ async def full_scan_handler() -> StatusResponse:
     for key in aws_s3_client.keys(config.s3_bucket, prefix=config.s3_prefix, recursive=config.s3_recursive):
         file_name = key['Key']
         full_path = f"{config.s3_bucket}/{file_name}"
-        status_response = await connector.scan_file_request(
-            ScanRequestModel(location=str(f"{file_name}"), metainfo=full_path))
+        status_response = await connector.scan_file_request_if_changed(
+            ScanRequestModel(location=str(f"{file_name}"), metainfo=full_path),
+            key=full_path, size=key.get('Size'), etag=key.get('ETag'))
         dsx_logging.debug(f'Sent scan request for {full_path}, result: {status_response}')
 
     return StatusResponse(status=StatusResponseEnum.SUCCESS, message='Full scan invoked and scan requests sent.')
@@ -31,6 +31,11 @@ class AWSS3ConnectorConfig(BaseSettings):
     s3_bucket: str = "lg-test-02"
     s3_prefix: str = ""
     s3_recursive: bool = True
+    full_scan_incremental: bool = Field(default=False,
+                                        description="If True, full scans only send scan requests for files that are "
+                                                    "new or changed since they were last sent")
+    change_index_db: str = Field(default="data/aws-s3-connector-change-index.db",
+                                 description="Local SQLite database tracking what full scans have sent")
     item_action_move_prefix: str = Field(default="dsxconnect-quarantine",
                                          description="Prefix to move files when item_action is MOVE")
 
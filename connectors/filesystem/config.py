@@ -34,6 +34,11 @@ class FilesystemConnectorConfig(BaseSettings):
     monitor: bool = False # if true, Connector will monitor location for new or modified files.
     scan_existing: bool = Field(default=False, description="If True, scan existing files in location on startup")
     recursive: bool = Field(default=True, description="If True, scan subdirectories recursively")
+    full_scan_incremental: bool = Field(default=False,
+                                        description="If True, full scans only send scan requests for files that are "
+                                                    "new or changed since they were last sent")
+    change_index_db: str = Field(default="data/filesystem-connector-change-index.db",
+                                 description="Local SQLite database tracking what full scans have sent")
     item_action_move_dir: pathlib.Path = Field(default=pathlib.Path("/Users/logangilbert/Documents/SAMPLES/quarantine"),
                                                description="Directory to move files when item_action is MOVE")
 
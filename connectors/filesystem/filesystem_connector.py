@@ -26,7 +26,8 @@ connector = DSXConnector(connector_name=config.name,
                          connector_id=connector_id,
                          base_connector_url=config.connector_url,
                          dsx_connect_url=config.dsx_connect_url,
-                         test_mode=config.test_mode)
+                         test_mode=config.test_mode,
+                         change_index_path=config.change_index_db if config.full_scan_incremental else None)
 
 
 # given that this could potentially be a lengthy file iteration, make the iteration asynchronous...
@@ -73,7 +74,19 @@ async def full_scan_handler() -> StatusResponse:
     dsx_logging.debug(f'Scanning files at: {config.location}')
 
     async for file_path in file_ops.get_filepaths_async(config.location, config.recursive):
-        status_response = await connector.scan_file_request(ScanRequestModel(location=str(file_path), metainfo=file_path.name))
+        size = mtime = None
+        if connector.change_index:
+            # size and mtime are only needed to tell whether the file changed since the last full scan
+            try:
+                stat = file_path.stat()
+            except OSError as e:
+                # e.g. deleted since it was listed
+                dsx_logging.warning(f'Skipping {file_path}, unable to stat it: {e}')
+                continue
+            size, mtime = stat.st_size, stat.st_mtime
+        status_response = await connector.scan_file_request_if_changed(
+            ScanRequestModel(location=str(file_path), metainfo=file_path.name),
+            key=str(file_path), size=size, mtime=mtime)
         dsx_logging.debug(f'Sent scan request for {file_path}, result: {status_response}')
 
     return StatusResponse(status=StatusResponseEnum.SUCCESS, message='Full scan invoked and scan requests sent.')
@@ -0,0 +1,70 @@
+import pathlib
+import sqlite3
+import threading
+import time
+
+from dsx_connect.utils.logging import dsx_logging
+
+
+class ChangeIndex:
+    """
+    Persistent record of what a connector has already submitted for scanning, kept in a local SQLite database.
+
+    Each item key (file path, object key, ...) maps to the size, mtime and/or ETag it had when it was last
+    submitted, and when that was.  Incremental full scans use it to submit only new or changed items.
+    """
+
+    def __init__(self, db_path: str, commit_every: int = 1000):
+        self.db_path = db_path
+        pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS change_index (
+                key TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                etag TEXT,
+                submitted_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._commit_every = commit_every
+        self._pending = 0
+
+    def __str__(self):
+        return f'change index: {self.db_path}'
+
+    def is_changed(self, key: str, size: int = None, mtime: float = None, etag: str = None) -> bool:
+        """Return True if key has never been submitted, or its size, mtime or ETag differ from the last submission."""
+        with self._lock:
+            row = self._connection.execute('SELECT size, mtime, etag FROM change_index WHERE key = ?',
+                                           (key,)).fetchone()
+        return row is None or row != (size, mtime, etag)
+
+    def mark_submitted(self, key: str, size: int = None, mtime: float = None, etag: str = None):
+        """Record that key was submitted in its current state.  Writes are committed in batches of commit_every."""
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO change_index (key, size, mtime, etag, submitted_at) VALUES (?, ?, ?, ?, ?)',
+                (key, size, mtime, etag, time.time()))
+            self._pending += 1
+            if self._pending >= self._commit_every:
+                self._connection.commit()
+                self._pending = 0
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+            self._pending = 0
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+        dsx_logging.debug(f'Closed {self}')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM change_index').fetchone()[0]
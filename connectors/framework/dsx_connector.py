@@ -1,3 +1,6 @@
+import asyncio
+import contextvars
+
 import httpx
 from httpx import HTTPStatusError
 from requests.exceptions import RequestException, HTTPError, Timeout, ConnectionError
@@ -7,6 +10,10 @@ from typing import Callable, Awaitable
 
 from starlette.responses import StreamingResponse
 
+from connectors.framework.change_index import ChangeIndex
+from connectors.framework.scan_job import ScanJobProgress
+from dsx_connect.models.health_models import HealthStatusEnum
+from dsx_connect.utils.health import HealthMonitor, HealthProbe
 from dsx_connect.models.connector_models import ScanRequestModel
 from dsx_connect.models.constants import DSXConnectAPIEndpoints, ConnectorEndpoints
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
@@ -14,10 +21,14 @@ from dsx_connect.utils.logging import dsx_logging
 
 connector_api = None
 
+# The full scan job the current task is running, if any.  Scan requests sent from within a full scan handler are
+# stamped with its job id.
+_current_scan_job: contextvars.ContextVar[ScanJobProgress | None] = contextvars.ContextVar("scan_job", default=None)
+
 
 class DSXConnector:
     def __init__(self, connector_name: str, connector_id: str, base_connector_url: str, dsx_connect_url: str,
-                 test_mode: bool = False):
+                 test_mode: bool = False, change_index_path: str = None, health_check_interval: float = 30.0):
         self.test_mode = test_mode
         self.connector_name = connector_name
         self.connector_id = connector_id
@@ -27,6 +38,17 @@ class DSXConnector:
 
         self.dsx_connect_url = str(dsx_connect_url).rstrip('/')
 
+        # When set, full scans are incremental: only items that are new or changed since their last submission
+        # (see scan_file_request_if_changed) are sent to dsx-connect.
+        self.change_index = ChangeIndex(change_index_path) if change_index_path else None
+
+        # dsx-connect and repository connectivity are probed in the background (started with the connector's API),
+        # and the status page reports the last result
+        self.health_monitor = HealthMonitor([
+            HealthProbe("dsx-connect", self._check_dsx_connect, interval=health_check_interval),
+            HealthProbe("repository", self._check_repo, interval=health_check_interval)
+        ])
+
         # TODO would rather this not be a global, rather instantiated within the base connector... although ont sure that's possible since
         # this is what uvicorn uses to start the app
 
@@ -82,6 +104,11 @@ class DSXConnector:
 
     async def scan_file_request(self, scan_request: ScanRequestModel) -> StatusResponse:
         scan_request.connector_url = self.connector_url
+        scan_job = _current_scan_job.get()
+        if scan_job:
+            scan_request.scan_job_id = scan_job.job_id
+            scan_job.count()
+            await self._report_scan_job(scan_job)
         try:
             async with httpx.AsyncClient(verify=False) as client:
                 if not self.test_mode:
@@ -120,17 +147,89 @@ class DSXConnector:
                 message=str(e)
             )
 
+    async def scan_file_request_if_changed(self, scan_request: ScanRequestModel, key: str, size: int = None,
+                                           mtime: float = None, etag: str = None) -> StatusResponse:
+        """
+        Send a scan request only if the item has changed since it was last submitted, according to the
+        connector's change index.  Without a change index, this is the same as scan_file_request.
+
+        Args:
+            scan_request: the scan request to send.
+            key: stable identity of the item in the repository (e.g. full path or bucket/key).
+            size, mtime, etag: whatever change markers the repository provides for the item.
+
+        Returns:
+            StatusResponse: the scan request's response, or a NOTHING response if the item was unchanged.
+        """
+        if self.change_index and not self.change_index.is_changed(key, size=size, mtime=mtime, etag=etag):
+            scan_job = _current_scan_job.get()
+            if scan_job:
+                scan_job.count(skipped=True)
+                await self._report_scan_job(scan_job)
+            return StatusResponse(status=StatusResponseEnum.NOTHING, message=f'{key} unchanged since last scan request')
+
+        status_response = await self.scan_file_request(scan_request)
+        if self.change_index and status_response.status == StatusResponseEnum.SUCCESS:
+            self.change_index.mark_submitted(key, size=size, mtime=mtime, etag=etag)
+        return status_response
+
+    async def run_scan_job(self, scan_job: ScanJobProgress):
+        """Run the full scan handler as the given job, reporting its enumeration progress to dsx-connect."""
+        token = _current_scan_job.set(scan_job)
+        try:
+            await self.full_scan_handler()
+        finally:
+            _current_scan_job.reset(token)
+            scan_job.complete = True
+            await self._report_scan_job(scan_job)
+            dsx_logging.info(f'Full scan job {scan_job.job_id} enumerated {scan_job.enumerated} items, '
+                             f'{scan_job.skipped} skipped')
+
+    async def _report_scan_job(self, scan_job: ScanJobProgress):
+        if not scan_job.report_due:
+            return
+        url = f'{self.dsx_connect_url}{DSXConnectAPIEndpoints.SCAN_JOB_ENUMERATION.format(job_id=scan_job.job_id)}'
+        try:
+            async with httpx.AsyncClient(verify=False) as client:
+                response = await client.post(url, content=scan_job.enumeration(self.connector_url).model_dump_json(),
+                                             headers={"Content-Type": "application/json"})
+            response.raise_for_status()
+        except Exception as e:
+            # progress reporting is informational, the scan carries on regardless
+            dsx_logging.warn(f"Failed to report progress of scan job {scan_job.job_id}: {e}")
+
     async def get_status(self):
-        dsxa_status = await self.test_dsx_connect()
-        repo_status = self.repo_check_connection_handler() if self.repo_check_connection_handler else False
+        health = self.health_monitor.report()
+        dsx_connect_health = health.checks["dsx-connect"]
+        repo_health = health.checks["repository"]
 
         return {
             "connector_status": "Active",
-            "dsxa_connectivity": "success" if dsxa_status else "failed",
-            "repo_connectivity": "success" if repo_status else "failed",
+            "dsxa_connectivity": "success" if dsx_connect_health.status == HealthStatusEnum.HEALTHY else "failed",
+            "repo_connectivity": "success" if repo_health.status == HealthStatusEnum.HEALTHY else "failed",
             "scan_requests_since_active_count": self.scan_request_count,
+            "health": health.model_dump(mode="json")
         }
 
+    async def _check_dsx_connect(self) -> str:
+        async with httpx.AsyncClient(verify=False) as client:
+            response = await client.get(f'{self.dsx_connect_url}{DSXConnectAPIEndpoints.CONNECTION_TEST}')
+        response.raise_for_status()
+        return f'{self.dsx_connect_url} reachable'
+
+    async def _check_repo(self) -> str | None:
+        if not self.repo_check_connection_handler:
+            raise RuntimeError("No handler registered for repo_check")
+        # repo checks are synchronous (and may do network I/O), keep them off the event loop
+        status_response = await asyncio.to_thread(self.repo_check_connection_handler)
+        if isinstance(status_response, StatusResponse):
+            if status_response.status != StatusResponseEnum.SUCCESS:
+                raise RuntimeError(status_response.message)
+            return status_response.message
+        if not status_response:
+            raise RuntimeError("repository check failed")
+        return None
+
     async def test_dsx_connect(self) -> StatusResponse:
         try:
             async with httpx.AsyncClient(verify=False) as client:
@@ -199,16 +298,26 @@ class DSXAConnectorRouter(APIRouter):
 
     async def post_full_scan(self, background_tasks: BackgroundTasks) -> StatusResponse:
         if self._connector.full_scan_handler:
-            background_tasks.add_task(self._connector.full_scan_handler)
+            scan_job = ScanJobProgress()
+            background_tasks.add_task(self._run_full_scan, scan_job)
             return StatusResponse(
                 status=StatusResponseEnum.SUCCESS,
                 message="Full scan initiated",
-                description="The scan is running in the background."
+                description=f"The scan is running in the background. Track its progress at "
+                            f"{DSXConnectAPIEndpoints.SCAN_JOB.format(job_id=scan_job.job_id)}",
+                id=scan_job.job_id
             )
         return StatusResponse(status=StatusResponseEnum.ERROR,
                               message="No handler registered for full_scan",
                               description="Add a decorator (ex: @connector.full_scan) to handle full scan requests")
 
+    async def _run_full_scan(self, scan_job: ScanJobProgress):
+        try:
+            await self._connector.run_scan_job(scan_job)
+        finally:
+            if self._connector.change_index:
+                self._connector.change_index.commit()
+
     async def post_read_file(self, scan_request_info: ScanRequestModel) -> StreamingResponse | StatusResponse:
         dsx_logging.info(f'Receive read_file request for {scan_request_info}')
         if self._connector.read_file_handler:
@@ -240,8 +349,8 @@ class DSXAConnectorRouter(APIRouter):
 
     async def on_startup_event(self):
         # Default DSXA Connect connectivity test for all connectors
-        test_response = await self._connector.test_dsx_connect()
-        if not test_response:
+        test_response = await self._connector.health_monitor.get("dsx-connect").probe()
+        if test_response.status != HealthStatusEnum.HEALTHY:
             dsx_logging.warn(
                 f"Connection to dsx-connect at {self._connector.dsx_connect_url} failed. "
                 f"Operations will not allow scanning of files until connectivity is established.")
@@ -250,8 +359,12 @@ class DSXAConnectorRouter(APIRouter):
                 f"Connection to dsx-connect at {self._connector.dsx_connect_url} success.")
         if self._connector.startup_handler:
             await self._connector.startup_handler()
+        self._connector.health_monitor.start()
 
     # Shutdown event
     async def on_shutdown_event(self):
+        await self._connector.health_monitor.stop()
         if self._connector.shutdown_handler:
             await self._connector.shutdown_handler()
+        if self._connector.change_index:
+            self._connector.change_index.close()
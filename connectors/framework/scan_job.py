@@ -0,0 +1,38 @@
+import time
+import uuid
+
+from dsx_connect.models.scan_models import ScanJobEnumerationModel
+
+
+class ScanJobProgress:
+    """
+    A connector's side of a full scan job: the job id stamped on each scan request, and the enumeration counts
+    reported to dsx-connect every report_every items or report_interval seconds, whichever comes first.
+    """
+
+    def __init__(self, job_id: str = None, report_every: int = 1000, report_interval: float = 10.0):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.enumerated = 0
+        self.skipped = 0
+        self.complete = False
+        self._report_every = report_every
+        self._report_interval = report_interval
+        self._reported_at_count = 0
+        self._reported_at = time.monotonic()
+
+    def count(self, skipped: bool = False):
+        self.enumerated += 1
+        if skipped:
+            self.skipped += 1
+
+    @property
+    def report_due(self) -> bool:
+        return (self.complete or self.enumerated - self._reported_at_count >= self._report_every
+                or time.monotonic() - self._reported_at >= self._report_interval)
+
+    def enumeration(self, connector_url: str) -> ScanJobEnumerationModel:
+        """The progress to report, and mark it reported."""
+        self._reported_at_count = self.enumerated
+        self._reported_at = time.monotonic()
+        return ScanJobEnumerationModel(connector_url=connector_url, enumerated=self.enumerated,
+                                       skipped=self.skipped, complete=self.complete)
@@ -1,9 +1,11 @@
+import os
 import pathlib
 
 tags_metadata = [
     {'name': 'scan', 'description': 'Methods for initiating scans '},
     {'name': 'config', 'description': 'Methods to view and edit configurations'},
     {'name': 'results', 'description': 'Methods to retrieve results'},
+    {'name': 'jobs', 'description': 'Methods to track full scan jobs'},
     {'name': 'connectors', 'description': 'Methods for use by connectors to queue tasks'}
 ]
 
@@ -12,3 +14,107 @@ root_path = str(pathlib.Path(__file__).parent)
 static_path = pathlib.Path(f'{root_path}/static')
 template_path = pathlib.Path(f'{root_path}/templates')
 conf_path = pathlib.Path(f'{working_path}/conf')
+
+# Opened lazily, per process: with a preloading server (gunicorn --preload) the app is imported once and then forked,
+# and a database handle or connection pool opened at import would be shared by every worker process.
+_results_database = None
+_stats_database = None
+_stats_rollups = None
+_async_results_database = None
+_async_stats_database = None
+_async_redis = None
+_opened_in_pid = None
+
+
+def _reset_after_fork():
+    global _results_database, _stats_database, _stats_rollups, _async_results_database, _async_stats_database, \
+        _async_redis, _opened_in_pid
+    if _opened_in_pid != os.getpid():
+        _results_database = _stats_database = _stats_rollups = _async_results_database = _async_stats_database = \
+            _async_redis = None
+        _opened_in_pid = os.getpid()
+
+
+def get_results_database():
+    """The API process's handle on the scan results database."""
+    global _results_database
+    _reset_after_fork()
+    if _results_database is None:
+        from dsx_connect.config import ConfigManager
+        from dsx_connect.database.database_factory import database_scan_results_factory
+        db_config = ConfigManager.get_config().results_database
+        _results_database = database_scan_results_factory(db_config.type, database_loc=db_config.loc,
+                                                          retain=db_config.retain,
+                                                          retain_seconds=db_config.retain_seconds,
+                                                          retention_sweep_interval=
+                                                          db_config.retention_sweep_interval_seconds,
+                                                          archived=bool(db_config.archive_dir))
+    return _results_database
+
+
+def get_stats_database():
+    """The API process's handle on the scan stats database."""
+    global _stats_database
+    _reset_after_fork()
+    if _stats_database is None:
+        from dsx_connect.config import ConfigManager
+        from dsx_connect.database.database_factory import database_scan_stats_factory
+        db_config = ConfigManager.get_config().results_database
+        _stats_database = database_scan_stats_factory(database_type=db_config.scan_stats_db_type,
+                                                      database_loc=db_config.scan_stats_db)
+    return _stats_database
+
+
+def get_async_results_database():
+    """The scan results database's async interface, for async endpoints (which must not block the event loop)."""
+    global _async_results_database
+    _reset_after_fork()
+    if _async_results_database is None:
+        from dsx_connect.config import ConfigManager
+        _async_results_database = get_results_database().asynchronous(
+            ConfigManager.get_config().results_database.async_threads)
+    return _async_results_database
+
+
+def get_async_stats_database():
+    """The scan stats database's async interface, for async endpoints."""
+    global _async_stats_database
+    _reset_after_fork()
+    if _async_stats_database is None:
+        from dsx_connect.config import ConfigManager
+        _async_stats_database = get_stats_database().asynchronous(
+            ConfigManager.get_config().results_database.async_threads)
+    return _async_stats_database
+
+
+def get_stats_rollups():
+    """The API process's handle on the time-bucketed scan stats, or None if they are disabled."""
+    global _stats_rollups
+    _reset_after_fork()
+    if _stats_rollups is None:
+        from dsx_connect.config import ConfigManager
+        from dsx_connect.database.database_factory import scan_stats_rollups_factory
+        db_config = ConfigManager.get_config().results_database
+        _stats_rollups = scan_stats_rollups_factory(database_loc=db_config.scan_stats_rollups_db,
+                                                    retain_minutes=db_config.scan_stats_rollup_minutes,
+                                                    retain_hours=db_config.scan_stats_rollup_hours,
+                                                    retain_days=db_config.scan_stats_rollup_days)
+    return _stats_rollups
+
+
+def get_async_redis():
+    """
+    The API process's Redis client for live scan results and scan job tracking (connections are pooled and made
+    lazily), or None if there is no Redis to use (see taskqueue_redis_url).
+    """
+    global _async_redis
+    _reset_after_fork()
+    if _async_redis is None:
+        import redis.asyncio
+        from dsx_connect.config import ConfigManager
+        from dsx_connect.taskqueue.celery_app import taskqueue_redis_url
+        url = taskqueue_redis_url(ConfigManager.get_config().taskqueue)
+        if url is None:
+            return None
+        _async_redis = redis.asyncio.Redis.from_url(url)
+    return _async_redis
@@ -1,19 +1,22 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import pathlib
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, JSONResponse
 from dsx_connect.config import ConfigManager
 
 from dsx_connect.models.constants import DSXConnectAPIEndpoints
 from dsx_connect.dsxa_client.dsxa_client import DSXAClient
+from dsx_connect.models.health_models import HealthReportModel, HealthStatusEnum
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
 from dsx_connect.utils.logging import dsx_logging
 
-from dsx_connect.app.dependencies import static_path
+from dsx_connect.app.dependencies import get_async_results_database, static_path
+from dsx_connect.app import health
 
-from dsx_connect.app.routers import scan_request, scan_request_test, scan_results
+from dsx_connect.app.routers import scan_request, scan_request_test, scan_results, scan_jobs
 
 from dsx_connect import version
 
@@ -23,10 +26,22 @@ async def lifespan(app: FastAPI):
 
     dsx_logging.info(f"dsx-connect version: {version.DSX_CONNECT_VERSION}")
     dsx_logging.info(f"dsx-connect configuration: {config}")
+    await health.start_health_monitor()
+    await scan_request.scan_request_producer.start()
+    if scan_results.scan_result_broadcaster:
+        await scan_results.scan_result_broadcaster.start()
+    if scan_results.scan_results_tail:
+        await scan_results.scan_results_tail.start(get_async_results_database())
     dsx_logging.info("dsx-connect startup completed.")
 
     yield
 
+    await scan_request.scan_request_producer.stop()
+    if scan_results.scan_results_tail:
+        await scan_results.scan_results_tail.stop()
+    if scan_results.scan_result_broadcaster:
+        await scan_results.scan_result_broadcaster.stop()
+    await health.stop_health_monitor()
     dsx_logging.info("dsx-connect shutdown completed.")
 
 
@@ -40,12 +55,16 @@ app = FastAPI(title='dsx-connect API',
 # Reload config to pick up environment variables
 config = ConfigManager.reload_config()
 
+# compresses large responses (result pages, exports) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 app.mount("/static", StaticFiles(directory=static_path, html=True), name='static')
 
 
 app.include_router(scan_request_test.router, tags=["test"])
 app.include_router(scan_request.router, tags=["scan"])
 app.include_router(scan_results.router, tags=["results"])
+app.include_router(scan_jobs.router, tags=["jobs"])
 
 
 
@@ -80,11 +99,31 @@ async def get_test_connection():
         message="Successfully connected to dsx-connect"
     )
 
-@app.get(DSXConnectAPIEndpoints.DSXA_CONNECTION_TEST, description="Test connection to dsxa.", tags=["test"])
-async def get_dsxa_test_connection():
-    dsxa_client = DSXAClient(config.scanner.scan_binary_url)
-    response = await dsxa_client.test_connection_async()
-    return response
+@app.get(DSXConnectAPIEndpoints.DSXA_CONNECTION_TEST, description="Test connection to dsxa. Reports the state of "
+                                                                   "the background DSXA health probe, unless scan is "
+                                                                   "set, in which case a test file is scanned.",
+         tags=["test"])
+async def get_dsxa_test_connection(scan: bool = False):
+    if scan:
+        async with DSXAClient(config.scanner.scan_binary_url) as dsxa_client:
+            return await dsxa_client.test_connection_async()
+
+    dsxa_health = health.health_monitor.get(health.DSXA).state
+    if dsxa_health.status == HealthStatusEnum.HEALTHY:
+        return StatusResponse(status=StatusResponseEnum.SUCCESS, message=dsxa_health.message,
+                              description=f"Checked at {dsxa_health.last_checked}, latency {dsxa_health.latency_ms}ms")
+    return StatusResponse(status=StatusResponseEnum.ERROR, message=dsxa_health.message or "DSXA not checked yet",
+                          description=f"Last healthy at {dsxa_health.last_healthy}")
+
+
+@app.get(DSXConnectAPIEndpoints.HEALTH, description="Health of dsx-connect and its dependencies, as last probed in the "
+                                                    "background. Responds 503 if a critical dependency (DSXA, broker) "
+                                                    "is failing.",
+         response_model=HealthReportModel, tags=["test"])
+async def get_health():
+    report = health.health_monitor.report()
+    return JSONResponse(report.model_dump(mode="json"),
+                        status_code=503 if report.status == HealthStatusEnum.UNHEALTHY else 200)
 
 # Main entry point to start the FastAPI app
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+"""
+The API process's health monitor: background probes of DSXA (reachability only, no scans), the task queue broker,
+the results and stats databases, and the connectors that have recently sent scan requests.  Created and started
+by the app lifespan.
+"""
+import time
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from dsx_connect.app.dependencies import get_async_results_database, get_async_stats_database
+from dsx_connect.config import ConfigManager
+from dsx_connect.dsxa_client.dsxa_client import DSXAClient
+from dsx_connect.taskqueue.celery_app import celery_app
+from dsx_connect.utils.health import HealthMonitor, HealthProbe
+
+DSXA = "dsxa"
+BROKER = "broker"
+RESULTS_DATABASE = "results_database"
+STATS_DATABASE = "stats_database"
+CONNECTOR_PREFIX = "connector:"
+
+health_monitor: HealthMonitor | None = None
+_dsxa_client: DSXAClient | None = None
+_connector_client: httpx.AsyncClient | None = None
+_connectors_last_seen: dict[str, float] = {}
+
+
+def _probe(name: str, check, critical: bool = True) -> HealthProbe:
+    health_config = ConfigManager.get_config().health
+    return HealthProbe(name, check, critical=critical, interval=health_config.interval_seconds,
+                       timeout=health_config.timeout_seconds, history=health_config.history)
+
+
+async def _check_dsxa() -> str:
+    status_code = await _dsxa_client.probe_async(timeout=ConfigManager.get_config().health.timeout_seconds)
+    return f"DSXA reachable (HTTP {status_code})"
+
+
+def _check_broker_sync() -> str:
+    with celery_app.connection_for_write() as connection:
+        connection.ensure_connection(max_retries=1)
+    return "broker reachable"
+
+
+async def _check_broker() -> str:
+    return await run_in_threadpool(_check_broker_sync)
+
+
+async def _check_results_database() -> str:
+    return f"{await get_async_results_database().count()} results stored"
+
+
+async def _check_stats_database() -> str:
+    stats = await get_async_stats_database().get()
+    return f"{stats.files_scanned} files scanned"
+
+
+def _connector_check(connector_url: str):
+    # a connector's status page is served from the root of its base url, its routes from base url/connector id
+    status_url = connector_url.rstrip("/").rsplit("/", 1)[0] + "/"
+
+    async def check() -> str:
+        response = await _connector_client.get(status_url)
+        response.raise_for_status()
+        return f"connector reachable (HTTP {response.status_code})"
+    return check
+
+
+async def start_health_monitor():
+    global health_monitor, _dsxa_client, _connector_client
+    config = ConfigManager.get_config()
+    _dsxa_client = DSXAClient(config.scanner.scan_binary_url, scan_concurrent_connections=1)
+    _connector_client = httpx.AsyncClient(verify=False, timeout=config.health.timeout_seconds)
+    health_monitor = HealthMonitor([
+        _probe(DSXA, _check_dsxa),
+        _probe(BROKER, _check_broker),
+        _probe(RESULTS_DATABASE, _check_results_database, critical=False),
+        _probe(STATS_DATABASE, _check_stats_database, critical=False),
+    ])
+    health_monitor.start()
+
+
+async def stop_health_monitor():
+    if health_monitor:
+        await health_monitor.stop()
+    if _dsxa_client:
+        await _dsxa_client.aclient.aclose()
+        _dsxa_client.close()
+    if _connector_client:
+        await _connector_client.aclose()
+
+
+async def watch_connector(connector_url: str | None):
+    """Probe a connector that sent a scan request, until it has been idle for health.connector_idle_seconds."""
+    if health_monitor is None or not connector_url:
+        return
+    now = time.monotonic()
+    if connector_url not in _connectors_last_seen:
+        health_monitor.add(_probe(f"{CONNECTOR_PREFIX}{connector_url}", _connector_check(connector_url),
+                                  critical=False))
+    _connectors_last_seen[connector_url] = now
+
+    idle_after = ConfigManager.get_config().health.connector_idle_seconds
+    for url, last_seen in list(_connectors_last_seen.items()):
+        if now - last_seen > idle_after:
+            del _connectors_last_seen[url]
+            await health_monitor.remove(f"{CONNECTOR_PREFIX}{url}")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+
+from dsx_connect.app.dependencies import get_async_redis
+from dsx_connect.config import ConfigManager
+from dsx_connect.models.constants import DSXConnectAPIEndpoints
+from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
+from dsx_connect.models.scan_models import ScanJobModel, ScanJobEnumerationModel
+from dsx_connect.taskqueue.scan_jobs import get_job, update_job_enumeration
+from dsx_connect.utils.logging import dsx_logging
+
+router = APIRouter()
+
+_taskqueue_config = ConfigManager.get_config().taskqueue
+
+_NO_REDIS = StatusResponse(status=StatusResponseEnum.ERROR,
+                           message="Scan job tracking is not available",
+                           description="Requires a Redis broker (or taskqueue.redis_url)")
+
+
+@router.get(DSXConnectAPIEndpoints.SCAN_JOB,
+            description="Progress of a full scan job: items enumerated, queued, scanned and failed so far, "
+                        "with rates and an estimated time to completion.")
+async def get_scan_job(job_id: str) -> ScanJobModel | StatusResponse:
+    redis_client = get_async_redis()
+    if redis_client is None:
+        return _NO_REDIS
+    job = await get_job(redis_client, job_id)
+    if job is None:
+        return StatusResponse(status=StatusResponseEnum.ERROR, message=f"Scan job {job_id} not found",
+                              description="Unknown job id, or the job expired")
+    return job
+
+
+@router.post(DSXConnectAPIEndpoints.SCAN_JOB_ENUMERATION,
+             description="Report a full scan job's enumeration progress (used by connectors).")
+async def post_scan_job_enumeration(job_id: str, enumeration: ScanJobEnumerationModel) -> StatusResponse:
+    redis_client = get_async_redis()
+    if redis_client is None:
+        return _NO_REDIS
+    try:
+        await update_job_enumeration(redis_client, job_id, enumeration, _taskqueue_config.scan_job_ttl_seconds)
+    except Exception as e:
+        dsx_logging.error(f"Failed to update scan job {job_id}: {e}", exc_info=True)
+        return StatusResponse(status=StatusResponseEnum.ERROR, message=f"Failed to update scan job {job_id}",
+                              description=str(e))
+    return StatusResponse(status=StatusResponseEnum.SUCCESS, message=f"Scan job {job_id} updated", id=job_id)
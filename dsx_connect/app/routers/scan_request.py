@@ -1,28 +1,42 @@
 from fastapi import APIRouter
 
+from dsx_connect.app.dependencies import get_async_redis
+from dsx_connect.app.health import watch_connector
 from dsx_connect.utils.logging import dsx_logging
 from dsx_connect.models.connector_models import ScanRequestModel
 from dsx_connect.config import ConfigManager
 from dsx_connect.models.constants import DSXConnectAPIEndpoints
+from dsx_connect.taskqueue.async_producer import AsyncTaskProducer
 from dsx_connect.taskqueue.celery_app import celery_app
+from dsx_connect.taskqueue.scan_jobs import ScanJobCounter, increment_job_counter_async
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
 
 router = APIRouter()
 
+_taskqueue_config = ConfigManager.get_config().taskqueue
+# Started and stopped by the app lifespan
+scan_request_producer = AsyncTaskProducer(celery_app,
+                                          task_name=_taskqueue_config.scan_request_task,
+                                          queue=_taskqueue_config.scan_request_queue,
+                                          expires=3600,
+                                          batch_window_ms=_taskqueue_config.enqueue_batch_window_ms,
+                                          max_batch_size=_taskqueue_config.enqueue_max_batch_size,
+                                          publisher_threads=_taskqueue_config.enqueue_publisher_threads)
+
 
 @router.post(DSXConnectAPIEndpoints.SCAN_REQUEST, description="Queue a scan request.")
 async def post_scan_request(scan_request_info: ScanRequestModel) -> StatusResponse:
     try:
         dsx_logging.debug(f"Queuing scan task {scan_request_info.location}")
-        result = celery_app.send_task(
-            ConfigManager.get_config().taskqueue.scan_request_task,
-            queue=ConfigManager.get_config().taskqueue.scan_request_queue,
-            args=[scan_request_info.dict()],
-            expires=3600)
+        task_id = await scan_request_producer.enqueue([scan_request_info.model_dump()])
+        await watch_connector(scan_request_info.connector_url)
+        if scan_request_info.scan_job_id and get_async_redis() is not None:
+            await increment_job_counter_async(get_async_redis(), scan_request_info.scan_job_id, ScanJobCounter.QUEUED,
+                                              _taskqueue_config.scan_job_ttl_seconds)
         return StatusResponse(
             status=StatusResponseEnum.SUCCESS,
             description=f"Scan task queued for connector: {scan_request_info.connector_url}",
-            message=f"Scan task ID: {result.id}")
+            message=f"Scan task ID: {task_id}")
     except Exception as celery_error:
         dsx_logging.error(f"Celery task error: {celery_error}", exc_info=True)
         return StatusResponse(
@@ -27,7 +27,7 @@ async def process_scan_request(scan_request_info: ScanRequestModel) -> StatusRes
     async with httpx.AsyncClient(verify=False) as client:
         response = await client.post(
             f'{scan_request_info.connector_url}{ConnectorEndpoints.READ_FILE}',
-            json=scan_request_info.dict()
+            json=scan_request_info.model_dump()
         )
 
     bytes_content = None
@@ -52,7 +52,7 @@ async def process_scan_request(scan_request_info: ScanRequestModel) -> StatusRes
         # TODO there needs to be a better way to define what the API call should be, but fornow this works
         response = requests.post(f'{scan_request_info.connector_url}/item_action',
                                  headers=headers,
-                                 json=scan_request_info.dict(),
+                                 json=scan_request_info.model_dump(),
                                  verify=False)
 
     return StatusResponse(status=StatusResponseEnum.SUCCESS,
@@ -1,29 +1,158 @@
-from fastapi import APIRouter
+import asyncio
+from itertools import islice
+from typing import Annotated, AsyncIterator
 
-from dsx_connect.models.scan_models import ScanResultModel, ScanStatsModel
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from dsx_connect.models.scan_models import ScanResultModel, ScanResultsPage, ScanResultsQuery, ScanResultsExportQuery, \
+    ScanResultsStreamQuery, ScanStatsModel, ScanStatsBucketModel, ScanStatsTimeSeriesQuery
+from dsx_connect.app.scan_results_tail import ScanResultsTail
+from dsx_connect.taskqueue.result_channel import ScanResultBroadcaster
+from dsx_connect.utils.scan_results_export import export_csv, export_ndjson
 from dsx_connect.utils.logging import dsx_logging
 from dsx_connect.models.connector_models import ScanRequestModel
 from dsx_connect.config import ConfigManager
 from dsx_connect.models.constants import DSXConnectAPIEndpoints
-from dsx_connect.taskqueue.celery_app import celery_app
+from dsx_connect.taskqueue.celery_app import celery_app, taskqueue_redis_url
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
-from dsx_connect.database.database_factory import database_scan_stats_factory, database_scan_results_factory
+from dsx_connect.app.dependencies import get_async_results_database, get_async_stats_database, \
+    get_results_database, get_stats_rollups
 
 router = APIRouter()
 
 config = ConfigManager().reload_config()
-_results_database = database_scan_results_factory(config.results_database.type,
-                                                  database_loc=config.results_database.loc,
-                                                  retain=config.results_database.retain)
+# Started and stopped by the app lifespan.  None if live results are disabled or the broker isn't Redis.
+_redis_url = taskqueue_redis_url(config.taskqueue)
+scan_result_broadcaster = ScanResultBroadcaster(_redis_url, config.taskqueue.scan_result_channel) \
+    if _redis_url and config.taskqueue.scan_result_channel else None
+# the newest results, kept in memory for frequent pollers; started and stopped by the app lifespan
+scan_results_tail = ScanResultsTail(scan_result_broadcaster, config.results_database.tail_cache_size) \
+    if scan_result_broadcaster and config.results_database.tail_cache_size > 0 else None
+
+# seconds between SSE keep-alive comments, so proxies don't time out an idle stream
+_STREAM_KEEPALIVE = 15
+
+
+@router.get(DSXConnectAPIEndpoints.SCAN_RESULTS,
+            description="Review scan results, newest first, one page at a time. Pass next_cursor as the cursor "
+                        "of the next request to fetch the following page. To poll for new results, pass the newest "
+                        "id already seen as since_id.",
+            response_model=ScanResultsPage)
+async def get_scan_result(query: Annotated[ScanResultsQuery, Query()]):
+    page = scan_results_tail.query_page(query) if scan_results_tail else None
+    if page is None:
+        page = await get_async_results_database().query_page(query)
+    # Results are already validated models, so skip FastAPI's response validation and encode with orjson
+    return ORJSONResponse(page.model_dump())
+
+
+@router.get(DSXConnectAPIEndpoints.SCAN_RESULTS_EXPORT,
+            description="Export scan results matching the given filters as NDJSON or CSV. The response is streamed "
+                        "from the database and gzip compressed if the client accepts it.",
+            response_class=StreamingResponse)
+async def get_scan_results_export(query: Annotated[ScanResultsExportQuery, Query()]):
+    results = get_results_database().iter_query(query)
+    if query.limit is not None:
+        results = islice(results, query.limit)
+
+    # a sync iterator, so Starlette reads it (and the database cursor behind it) from the threadpool
+    if query.format == "csv":
+        return StreamingResponse(export_csv(results), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="scan-results.csv"'})
+    return StreamingResponse(export_ndjson(results), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="scan-results.ndjson"'})
+
 
-_stats_database = database_scan_stats_factory(database_loc=config.results_database.scan_stats_db)
+def _sse_event(scan_result: ScanResultModel) -> str:
+    event = f"event: scan_result\ndata: {scan_result.model_dump_json()}\n\n"
+    return f"id: {scan_result.id}\n{event}" if scan_result.id >= 0 else event
 
 
-@router.get(DSXConnectAPIEndpoints.SCAN_RESULTS, description="Review scan results.")
-async def get_scan_result() -> list[ScanResultModel]:
-    return _results_database.read_all()
+async def _stream_scan_results(request: Request, query: ScanResultsQuery) -> AsyncIterator[str]:
+    # listen before catching up, so nothing stored in between is missed; anything seen twice is skipped by id.
+    # Workers store and publish independently, so live results can arrive out of id order: only the ids the
+    # catch-up sent are skipped, never everything below the newest id sent.
+    listener = scan_result_broadcaster.listen()
+    try:
+        caught_up: set[int] = set()
+        if query.cursor is not None:
+            async for scan_result in get_async_results_database().iter_query(query):
+                yield _sse_event(scan_result)
+                caught_up.add(scan_result.id)
 
+        while not await request.is_disconnected():
+            if listener.overflowed and listener.queue.empty():
+                # fell behind: end the stream, the client reconnects with Last-Event-ID and catches up
+                return
+            try:
+                scan_result = await asyncio.wait_for(listener.queue.get(), timeout=_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if scan_result.id in caught_up:
+                # each result is broadcast once, so it won't be seen again
+                caught_up.discard(scan_result.id)
+                continue
+            if not query.matches(scan_result):
+                continue
+            yield _sse_event(scan_result)
+    finally:
+        scan_result_broadcaster.unlisten(listener)
 
-@router.get(DSXConnectAPIEndpoints.SCAN_STATS, description="Retrieve scan statistics.")
+
+@router.get(DSXConnectAPIEndpoints.SCAN_RESULTS_STREAM,
+            description="Stream scan results as Server-Sent Events as they are stored, optionally filtered by "
+                        "verdict, connector and metadata tag. Each event's id is the result id; reconnecting with "
+                        "Last-Event-ID (as EventSource does) first replays results stored since then.")
+async def get_scan_results_stream(request: Request, filters: Annotated[ScanResultsStreamQuery, Query()],
+                                  last_event_id: Annotated[int | None, Header()] = None):
+    if scan_result_broadcaster is None or not scan_result_broadcaster.running:
+        return StatusResponse(status=StatusResponseEnum.ERROR,
+                              message="Live scan results are not available",
+                              description="Requires a Redis broker (or taskqueue.redis_url) and "
+                                          "taskqueue.scan_result_channel to be set")
+
+    resume_after = last_event_id if last_event_id is not None else filters.last_event_id
+    query = ScanResultsQuery(verdict=filters.verdict, connector_url=filters.connector_url,
+                             metadata_tag=filters.metadata_tag, cursor=resume_after, limit=1000,
+                             descending=False)
+    return StreamingResponse(_stream_scan_results(request, query), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post(DSXConnectAPIEndpoints.SCAN_RESULTS_ARCHIVE,
+             description="Archive older scan results to Parquet now, rather than at the next periodic archival. "
+                         "Results are moved out of the results database into results_database.archive_dir.")
+async def post_scan_results_archive(older_than_seconds: Annotated[float | None, Query(
+        ge=0, description="archive results stored longer ago than this, by default archive_after_seconds")] = None):
+    if not config.results_database.archive_dir:
+        return StatusResponse(status=StatusResponseEnum.ERROR,
+                              message="Scan results archival is not configured",
+                              description="Requires results_database.archive_dir to be set")
+    result = await run_in_threadpool(celery_app.send_task, config.taskqueue.archive_scan_results_task,
+                                     kwargs={"older_than_seconds": older_than_seconds},
+                                     queue=config.taskqueue.scan_result_queue)
+    return StatusResponse(status=StatusResponseEnum.SUCCESS, message="Scan results archival queued", id=result.id)
+
+
+@router.get(DSXConnectAPIEndpoints.SCAN_STATS, description="Retrieve scan statistics.",
+            response_model_exclude={"scan_time_sketch", "file_size_sketch"})
 async def get_scan_result() -> ScanStatsModel:
-    return _stats_database.get()
+    return await get_async_stats_database().get()
+
+
+@router.get(DSXConnectAPIEndpoints.SCAN_STATS_TIMESERIES,
+            description="Scan throughput and latency over time: files scanned, bytes, verdicts and scan time "
+                        "percentiles per minute, hour or day, oldest first.",
+            response_model=list[ScanStatsBucketModel])
+async def get_scan_stats_timeseries(query: Annotated[ScanStatsTimeSeriesQuery, Query()]):
+    rollups = get_stats_rollups()
+    if rollups is None:
+        return StatusResponse(status=StatusResponseEnum.ERROR,
+                              message="Scan stats time series are not available",
+                              description="Requires results_database.scan_stats_rollups_db to be set")
+    buckets = await run_in_threadpool(rollups.buckets, query.resolution, query.start_time, query.end_time,
+                                      query.connector_url, query.by_connector)
+    return ORJSONResponse([bucket.model_dump(mode="json") for bucket in buckets])
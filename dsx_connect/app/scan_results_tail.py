@@ -0,0 +1,161 @@
+"""
+The API process's in-memory tail of the newest scan results, so dashboards and integrations polling for new
+results (since_id) or the latest page are answered without a database read.
+
+The tail is seeded from the results database and then kept current from the live scan results broadcast by the
+workers as they store them.  It holds every stored result from its floor id up, so a query whose results all lie
+above the floor is answered from memory; anything reaching further back goes to the database.  Whenever the
+broadcast may have missed results (a dropped subscription, or the tail falling behind) it is reseeded, and queries
+go to the database in the meantime.  Like the stream endpoint, the tail is behind the database by the time a
+result takes to be broadcast.
+
+Workers store and broadcast independently, so results can arrive out of id order.  Queries are only answered up to
+the newest id below which every id has arrived: a poller handed id N+1 before N arrived would move past N and never
+see it.  An id that doesn't arrive within _GAP_TIMEOUT seconds (its insert failed, say) has the tail reseeded.
+
+Results deleted from the database (by retention or archival) are not removed from the tail; they are the oldest
+results, which are normally below its floor.
+"""
+import asyncio
+import bisect
+import time
+
+from dsx_connect.database.async_db import AsyncScanResultsDB
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel, ScanResultsPage, \
+    ScanResultsQuery
+from dsx_connect.taskqueue.result_channel import ScanResultBroadcaster, ScanResultListener
+from dsx_connect.utils.logging import dsx_logging
+
+# seconds a missing id holds up the tail before it is reseeded from the database
+_GAP_TIMEOUT = 10
+
+
+def _id_bounds(conditions: list[FieldCondition]) -> tuple[int | None, int | None]:
+    """The lowest and highest ids the conditions' id ranges allow, None where unbounded."""
+    low = high = None
+    for condition in conditions:
+        if condition.field != ScanResultField.ID or not condition.is_range:
+            continue
+        for bound in (condition.gt + 1 if condition.gt is not None else None, condition.gte):
+            if bound is not None:
+                low = bound if low is None else max(low, bound)
+        for bound in (condition.lt - 1 if condition.lt is not None else None, condition.lte):
+            if bound is not None:
+                high = bound if high is None else min(high, bound)
+    return low, high
+
+
+class ScanResultsTail:
+    def __init__(self, broadcaster: ScanResultBroadcaster, size: int = 1000):
+        self._broadcaster = broadcaster
+        self._size = size
+        self._ids: list[int] = []
+        self._results: dict[int, ScanResultModel] = {}
+        # every stored result with an id >= floor is held; None when every stored result is
+        self._floor: int | None = None
+        # every id up to this one has arrived (or is below the floor); queries are answered up to it
+        self._complete = 0
+        # when the newest id held first got ahead of _complete
+        self._gap_since: float | None = None
+        self._listener: ScanResultListener | None = None
+        self._ready = False
+        self._task: asyncio.Task | None = None
+
+    async def start(self, db: AsyncScanResultsDB):
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._ready = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready and not self._listener.overflowed
+
+    async def _run(self, db: AsyncScanResultsDB):
+        while True:
+            # listen before seeding, so nothing stored in between is missed; anything seen twice is skipped by id
+            self._listener = self._broadcaster.listen()
+            try:
+                await self._seed(db)
+                while not self._listener.overflowed or not self._listener.queue.empty():
+                    if self._gap_since is not None and time.monotonic() - self._gap_since > _GAP_TIMEOUT:
+                        dsx_logging.debug(f"Scan result {self._complete + 1} was never broadcast, reseeding the scan "
+                                          f"results tail")
+                        break
+                    try:
+                        self._add(await asyncio.wait_for(self._listener.queue.get(), timeout=1))
+                    except asyncio.TimeoutError:
+                        continue
+                    while not self._listener.queue.empty():
+                        self._add(self._listener.queue.get_nowait())
+                else:
+                    dsx_logging.debug("Live scan results were missed, reseeding the scan results tail")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                dsx_logging.warning(f"Failed to seed the scan results tail, retrying: {e}")
+                await asyncio.sleep(5)
+            finally:
+                self._ready = False
+                self._broadcaster.unlisten(self._listener)
+
+    async def _seed(self, db: AsyncScanResultsDB):
+        newest = await db.find_where([], descending=True, limit=self._size)
+        self._ids = [scan_result.id for scan_result in reversed(newest)]
+        self._results = {scan_result.id: scan_result for scan_result in newest}
+        self._floor = self._ids[0] if len(newest) == self._size else None
+        self._complete = self._ids[-1] if self._ids else 0
+        self._gap_since = None
+        self._ready = True
+
+    def _add(self, scan_result: ScanResultModel):
+        if scan_result.id < 0 or scan_result.id in self._results or \
+                (self._floor is not None and scan_result.id < self._floor):
+            return
+        # results mostly arrive in id order, though batches stored by different workers can interleave
+        if not self._ids or scan_result.id > self._ids[-1]:
+            self._ids.append(scan_result.id)
+        else:
+            bisect.insort(self._ids, scan_result.id)
+        self._results[scan_result.id] = scan_result
+        if len(self._ids) > self._size:
+            evicted = self._ids.pop(0)
+            del self._results[evicted]
+            self._floor = evicted + 1
+            self._complete = max(self._complete, evicted)
+        while self._complete + 1 in self._results:
+            self._complete += 1
+        if self._ids[-1] <= self._complete:
+            self._gap_since = None
+        elif self._gap_since is None:
+            self._gap_since = time.monotonic()
+
+    def query_page(self, query: ScanResultsQuery) -> ScanResultsPage | None:
+        """The query's page from the tail, or None if it may hold results from below the floor."""
+        if not self.ready:
+            return None
+        conditions = query.conditions()
+        low, high = _id_bounds(conditions)
+        high = self._complete if high is None else min(high, self._complete)
+        covered = self._floor is None or (low is not None and low >= self._floor)
+        # newest first, the page is also complete once it's full: every result above its last is held
+        if not covered and not query.descending:
+            return None
+
+        start = bisect.bisect_left(self._ids, low) if low is not None else 0
+        end = bisect.bisect_right(self._ids, high) if high is not None else len(self._ids)
+        ids = self._ids[start:end]
+        results = []
+        for result_id in reversed(ids) if query.descending else ids:
+            scan_result = self._results[result_id]
+            if all(condition.matches(scan_result) for condition in conditions):
+                results.append(scan_result)
+                if len(results) == query.limit:
+                    break
+        if len(results) < query.limit and not covered:
+            return None
+        return ScanResultsPage.of(results, query.limit)
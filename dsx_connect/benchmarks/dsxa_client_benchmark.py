@@ -0,0 +1,210 @@
+"""
+Throughput benchmark for DSXAClient and scan_request_task.
+
+Starts the mock DSXA server in-process (unless --dsxa-url points at a real scanner) and drives it with one of:
+    sync   DSXAClient.scan_binary from --concurrency threads
+    async  DSXAClient.scan_binary_async with --concurrency scans in flight
+    batch  DSXAClient.scan_binaries_async in batches of --batch-size
+    task   the full scan_request_task (read_file from the mock connector, scan, dispatch) from --concurrency
+           threads, using an in-memory Celery broker unless DSXCONNECT_TASKQUEUE__BROKER is set
+
+and reports files/s, MB/s and latency percentiles.
+
+Example:
+    ```bash
+    python -m dsx_connect.benchmarks.dsxa_client_benchmark --mode async --files 2000 --size 262144 --concurrency 16
+    ```
+Mock scanner behaviour (latency, error and 429 rates) is configured through the DSXA_MOCK_* environment
+variables, see MockDSXAConfig.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import uvicorn
+
+from dsx_connect.benchmarks.mock_dsxa_server import MockDSXA, MockDSXAConfig, MOCK_CONNECTOR_PATH
+
+
+class BenchmarkResult:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.latencies: list[float] = []
+        self.bytes = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, size_in_bytes: int, ok: bool = True):
+        with self._lock:
+            self.latencies.append(latency)
+            self.bytes += size_in_bytes
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+    def __str__(self):
+        files = len(self.latencies)
+        return (f"mode={self.mode} files={files} errors={self.errors} elapsed={self.elapsed:.2f}s "
+                f"files/s={files / self.elapsed:.1f} MB/s={self.bytes / (1024 * 1024) / self.elapsed:.2f} "
+                f"p50={self.percentile(0.5) * 1000:.1f}ms p90={self.percentile(0.9) * 1000:.1f}ms "
+                f"p99={self.percentile(0.99) * 1000:.1f}ms max={self.percentile(1.0) * 1000:.1f}ms")
+
+
+def start_mock_server(mock_config: MockDSXAConfig) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(MockDSXA(mock_config).create_app(), host=mock_config.host,
+                                           port=mock_config.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def payloads(args) -> list[bytes]:
+    # a handful of distinct payloads is enough, generating one per file would dominate the benchmark
+    return [random.randbytes(args.size) for _ in range(min(args.files, 16))]
+
+
+def run_sync(args, client) -> BenchmarkResult:
+    from dsx_connect.dsxa_client.dsxa_client import DSXAScanRequest
+    result = BenchmarkResult("sync")
+    contents = payloads(args)
+
+    def scan(i: int):
+        content = contents[i % len(contents)]
+        start = time.perf_counter()
+        try:
+            client.scan_binary(DSXAScanRequest(binary_data=io.BytesIO(content)))
+            result.record(time.perf_counter() - start, len(content))
+        except Exception:
+            result.record(time.perf_counter() - start, len(content), ok=False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(scan, range(args.files)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_async(args, client) -> BenchmarkResult:
+    from dsx_connect.dsxa_client.dsxa_client import DSXAScanRequest
+    result = BenchmarkResult("async")
+    contents = payloads(args)
+
+    async def main():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def scan(i: int):
+            content = contents[i % len(contents)]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await client.scan_binary_async(DSXAScanRequest(binary_data=io.BytesIO(content)))
+                    result.record(time.perf_counter() - start, len(content))
+                except Exception:
+                    result.record(time.perf_counter() - start, len(content), ok=False)
+
+        await asyncio.gather(*(scan(i) for i in range(args.files)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_batch(args, client) -> BenchmarkResult:
+    from dsx_connect.dsxa_client.dsxa_client import DSXAScanRequest
+    result = BenchmarkResult("batch")
+    contents = payloads(args)
+
+    async def main():
+        for offset in range(0, args.files, args.batch_size):
+            batch = [contents[i % len(contents)] for i in range(offset, min(offset + args.batch_size, args.files))]
+            start = time.perf_counter()
+            try:
+                await client.scan_binaries_async([DSXAScanRequest(binary_data=io.BytesIO(c)) for c in batch])
+                ok = True
+            except Exception:
+                ok = False
+            # every file in the batch waited for the whole batch
+            latency = time.perf_counter() - start
+            for content in batch:
+                result.record(latency, len(content), ok=ok)
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_task(args, connector_url: str) -> BenchmarkResult:
+    # must be configured before the celery app (and its config) is first imported
+    os.environ.setdefault("DSXCONNECT_TASKQUEUE__BROKER", "memory://")
+    os.environ.setdefault("DSXCONNECT_TASKQUEUE__BACKEND", "cache+memory://")
+    os.environ["DSXCONNECT_SCANNER__SCAN_BINARY_URL"] = args.scan_binary_url
+    from dsx_connect.taskworkers.taskworkers import scan_request_task
+    from dsx_connect.models.responses import StatusResponseEnum
+
+    result = BenchmarkResult("task")
+    sizes = MockDSXAConfig().read_file_sizes
+
+    def scan(i: int):
+        location = f"benchmark/file-{i:08d}.bin"
+        start = time.perf_counter()
+        response = scan_request_task.apply(args=[{"location": location, "metainfo": location,
+                                                  "connector_url": connector_url}]).get()
+        result.record(time.perf_counter() - start, random.Random(location).choice(sizes),
+                      ok=response["status"] == StatusResponseEnum.SUCCESS)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(scan, range(args.files)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSXAClient / scan_request_task throughput benchmark")
+    parser.add_argument("--mode", choices=["sync", "async", "batch", "task"], default="async")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=64 * 1024, help="file size in bytes (sync/async/batch)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--connections", type=int, default=8, help="DSXAClient scan_concurrent_connections")
+    parser.add_argument("--hedge", action="store_true", help="enable DSXAClient request hedging")
+    parser.add_argument("--dsxa-url", default=None, help="scan against this DSXA instead of the mock server")
+    args = parser.parse_args()
+
+    mock_config = MockDSXAConfig()
+    if args.dsxa_url:
+        args.scan_binary_url = args.dsxa_url
+    else:
+        start_mock_server(mock_config)
+        args.scan_binary_url = f"http://{mock_config.host}:{mock_config.port}/scan/binary/v2"
+
+    if args.mode == "task":
+        if args.dsxa_url:
+            parser.error("--mode task needs the mock server to stand in for the connector")
+        result = run_task(args, f"http://{mock_config.host}:{mock_config.port}{MOCK_CONNECTOR_PATH}")
+    else:
+        from dsx_connect.dsxa_client.dsxa_client import DSXAClient
+        client = DSXAClient(args.scan_binary_url, scan_concurrent_connections=args.connections,
+                            hedge_enabled=args.hedge)
+        runner = {"sync": run_sync, "async": run_async, "batch": run_batch}[args.mode]
+        result = runner(args, client)
+        if args.hedge:
+            print(f"hedging: {client.hedge_metrics}")
+
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
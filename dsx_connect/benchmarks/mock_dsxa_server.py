@@ -0,0 +1,130 @@
+"""
+A local stand-in for a DSXA scanner, for measuring DSXAClient and task worker throughput without a real
+scanner appliance.
+
+The server answers scan/binary/v2 with realistic DPAVerdictModel2 payloads after a configurable,
+size-dependent delay, and can be told to fail a fraction of requests with 500 or 429.  It also plays the
+part of a connector (read_file / item_action under /mock-connector), so scan_request_task can be driven
+end to end against it.
+
+Run standalone:
+    ```bash
+    DSXA_MOCK_BASE_LATENCY_MS=10 DSXA_MOCK_RATE_429=0.01 python -m dsx_connect.benchmarks.mock_dsxa_server
+    ```
+and point dsx-connect at it with DSXCONNECT_SCANNER__SCAN_BINARY_URL=http://127.0.0.1:8080/scan/binary/v2
+"""
+import asyncio
+import hashlib
+import random
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from pydantic_settings import BaseSettings
+
+from dsx_connect.dsxa_client.verdict_models import DPAVerdictEnum, DPAVerdictModel2, DPAVerdictDetailsModel, \
+    DPAVerdictFileInfoModel, DPAOfficeDataModel
+from dsx_connect.models.connector_models import ScanRequestModel
+from dsx_connect.models.constants import ConnectorEndpoints
+from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
+
+MOCK_CONNECTOR_PATH = "/mock-connector"
+
+
+class MockDSXAConfig(BaseSettings):
+    """
+    Behaviour of the mock scanner.  Latency for a scan is
+    (base_latency_ms + latency_per_mb_ms * size_in_mb) scaled by a log-normal jitter factor.
+    """
+    host: str = "127.0.0.1"
+    port: int = 8080
+
+    base_latency_ms: float = 5.0
+    latency_per_mb_ms: float = 20.0
+    latency_jitter: float = 0.25  # sigma of the log-normal jitter; 0 for deterministic latency
+    error_rate: float = 0.0  # fraction of scans answered with 500
+    rate_429: float = 0.0  # fraction of scans answered with 429 (overloaded)
+    malicious_rate: float = 0.01
+    unsupported_rate: float = 0.0
+
+    # sizes of the files served by the mock connector's read_file, picked per location
+    read_file_sizes: list[int] = [64 * 1024]
+
+    class Config:
+        env_prefix = "DSXA_MOCK_"
+
+
+class MockDSXA:
+    def __init__(self, config: MockDSXAConfig = None):
+        self.config = config or MockDSXAConfig()
+        self.scan_count = 0
+        self._payloads: dict[int, bytes] = {}
+
+    def scan_latency_seconds(self, size_in_bytes: int) -> float:
+        latency_ms = self.config.base_latency_ms + self.config.latency_per_mb_ms * size_in_bytes / (1024 * 1024)
+        if self.config.latency_jitter > 0:
+            latency_ms *= random.lognormvariate(0, self.config.latency_jitter)
+        return latency_ms / 1000
+
+    def verdict(self, content: bytes, scan_duration_in_microseconds: int) -> DPAVerdictModel2:
+        roll = random.random()
+        if roll < self.config.malicious_rate:
+            verdict, description = DPAVerdictEnum.MALICIOUS, "File identified as malicious"
+        elif roll < self.config.malicious_rate + self.config.unsupported_rate:
+            verdict, description = DPAVerdictEnum.UNSUPPORTED, "File type is not supported"
+        else:
+            verdict, description = DPAVerdictEnum.BENIGN, "File identified as benign"
+
+        return DPAVerdictModel2(
+            scan_guid=uuid.uuid4().hex,
+            verdict=verdict,
+            verdict_details=DPAVerdictDetailsModel(event_description=description),
+            file_info=DPAVerdictFileInfoModel(
+                file_type="OOXMLFileType" if content[:2] == b"PK" else "UnknownFileType",
+                file_size_in_bytes=len(content),
+                file_hash=hashlib.sha256(content).hexdigest(),
+                additional_office_data=DPAOfficeDataModel(vba=0, swf=0, load_external_object=0, dde=0,
+                                                          xl4_macros=0, activex=0, ole=0)
+            ),
+            scan_duration_in_microseconds=scan_duration_in_microseconds
+        )
+
+    def read_file_payload(self, location: str) -> bytes:
+        size = random.Random(location).choice(self.config.read_file_sizes)
+        if size not in self._payloads:
+            self._payloads[size] = random.randbytes(size)
+        return self._payloads[size]
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="mock DSXA")
+
+        @app.post("/scan/binary/v2")
+        async def scan_binary(request: Request):
+            content = await request.body()
+            self.scan_count += 1
+            latency = self.scan_latency_seconds(len(content))
+            await asyncio.sleep(latency)
+
+            roll = random.random()
+            if roll < self.config.rate_429:
+                return Response(status_code=429, content=b"Too Many Requests")
+            if roll < self.config.rate_429 + self.config.error_rate:
+                return Response(status_code=500, content=b"Internal Server Error")
+            verdict = self.verdict(content, int(latency * 1_000_000))
+            return Response(content=verdict.model_dump_json(), media_type="application/json")
+
+        @app.post(f"{MOCK_CONNECTOR_PATH}{ConnectorEndpoints.READ_FILE}")
+        async def read_file(scan_request: ScanRequestModel):
+            return Response(content=self.read_file_payload(scan_request.location),
+                            media_type="application/octet-stream")
+
+        @app.post(f"{MOCK_CONNECTOR_PATH}{ConnectorEndpoints.ITEM_ACTION}")
+        async def item_action(scan_request: ScanRequestModel) -> StatusResponse:
+            return StatusResponse(status=StatusResponseEnum.SUCCESS, message=f"Item action on {scan_request.location}")
+
+        return app
+
+
+if __name__ == "__main__":
+    mock_config = MockDSXAConfig()
+    uvicorn.run(MockDSXA(mock_config).create_app(), host=mock_config.host, port=mock_config.port, log_level="warning")
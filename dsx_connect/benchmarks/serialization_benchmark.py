@@ -0,0 +1,104 @@
+"""
+Microbenchmark of the per-file serialization work done on the scan hot path, comparing the previous
+conversions with the current ones:
+
+    verdict parse   DSXAClient turning the scan/binary/v2 response body into a DPAVerdictModel2
+    worker dispatch scan_request_task/scan_result_task converting the verdict for queueing and storage
+    db insert       ScanResultsTinyDB/MongoDB turning a ScanResultModel into a storable dict
+    api encode      GET /scan-results encoding a stored result
+
+Run from the repository root:
+    ```bash
+    python -m dsx_connect.benchmarks.serialization_benchmark --number 20000
+    ```
+"""
+import argparse
+import json
+import timeit
+import warnings
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from dsx_connect.dsxa_client.verdict_models import DPAVerdictModel2
+from dsx_connect.models.scan_models import ScanResultModel, ScanResultStatusEnum
+
+VERDICT_BODY = json.dumps({
+    "scan_guid": "007ea79292ae4261ad82269cd13051b9",
+    "verdict": "Benign",
+    "verdict_details": {"event_description": "File identified as benign"},
+    "file_info": {
+        "file_type": "OOXMLFileType",
+        "file_size_in_bytes": 14844,
+        "file_hash": "286865e7337f30ac2d119d8edc9c36f6a11552eb23c50a1137a19e0ace921e8e",
+        "additional_office_data": {"vba": 0, "swf": 0, "load_external_object": 0, "dde": 0, "xl4_macros": 0,
+                                   "activex": 0, "ole": 0}},
+    "scan_duration_in_microseconds": 10404
+}).encode()
+
+
+def verdict_parse_before():
+    return DPAVerdictModel2(**json.loads(VERDICT_BODY))
+
+
+def verdict_parse_after():
+    return DPAVerdictModel2.model_validate_json(VERDICT_BODY)
+
+
+VERDICT = verdict_parse_after()
+RESULT = ScanResultModel(id=1, scan_request_task_id="4f1c", metadata_tag="file.docx",
+                         status=ScanResultStatusEnum.SCANNED, dpa_verdict=VERDICT)
+
+
+def worker_dispatch_before():
+    # dumped once per queue, then re-validated from the dump in scan_result_task
+    VERDICT.model_dump()
+    verdict_dict = VERDICT.model_dump()
+    ScanResultModel(scan_request_task_id="4f1c", metadata_tag="file.docx",
+                    dpa_verdict=DPAVerdictModel2(**verdict_dict).model_dump())
+
+
+def worker_dispatch_after():
+    verdict_dict = VERDICT.model_dump(mode="json")
+    ScanResultModel(scan_request_task_id="4f1c", metadata_tag="file.docx",
+                    dpa_verdict=DPAVerdictModel2.model_validate(verdict_dict))
+
+
+def db_insert_before():
+    return json.loads(RESULT.json(exclude={"id"}))
+
+
+def db_insert_after():
+    return RESULT.model_dump(mode="json", exclude={"id"})
+
+
+def api_encode_before():
+    return json.dumps(jsonable_encoder(RESULT))
+
+
+def api_encode_after():
+    return orjson.dumps(RESULT.model_dump())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan hot path serialization microbenchmark")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=DeprecationWarning)  # model.json() is deprecated in pydantic 2
+
+    total_before = total_after = 0.0
+    for name, before, after in [("verdict parse", verdict_parse_before, verdict_parse_after),
+                                ("worker dispatch", worker_dispatch_before, worker_dispatch_after),
+                                ("db insert", db_insert_before, db_insert_after),
+                                ("api encode", api_encode_before, api_encode_after)]:
+        before_us = timeit.timeit(before, number=args.number) / args.number * 1_000_000
+        after_us = timeit.timeit(after, number=args.number) / args.number * 1_000_000
+        total_before += before_us
+        total_after += after_us
+        print(f"{name:<16} before={before_us:7.2f}us after={after_us:7.2f}us saved={before_us - after_us:7.2f}us")
+    print(f"{'per file':<16} before={total_before:7.2f}us after={total_after:7.2f}us "
+          f"saved={total_before - total_after:7.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,10 @@ from dsx_connect.dsxa_client.verdict_models import DPASeverityEnum
 class ConfigDatabaseType(str, Enum):
     MEMORY_COLLECTION: str = 'memory'
     TINYDB: str = 'tinydb'
+    LOGSTORE: str = 'logstore'
     SQLITE3: str = 'sqlite3'
     MONGODB: str = 'mongodb'
+    REDIS: str = 'redis'
 
 
 class DatabaseConfig(BaseSettings):
@@ -17,16 +19,57 @@ class DatabaseConfig(BaseSettings):
     Configuration settings for the database.
 
     Attributes:
-        type (str): The type of database to use. Options include 'memory', 'tinydb', 'sqlite3', and 'mongodb'.
-        loc (str): The file location of the database (used for all database types except 'memory').
+        type (str): The type of database to use. Options include 'memory', 'logstore', 'tinydb', 'sqlite3',
+        'mongodb' and 'redis'.
+        loc (str): The file location of the database (used for all database types except 'memory'), or for
+        'mongodb' and 'redis' its URL (e.g. redis://redis:6379/1).  scan_stats_db_type and scan_stats_db likewise
+        for the scan stats, which can be 'memory', 'logstore', 'tinydb' or 'redis'.
         retain (int): Database retention setting. Set to -1 to retain forever, 0 to retain nothing,
         or a positive integer N to retain N records.
+        retain_seconds (float): If positive, records older than this many seconds are deleted.
+        retention_sweep_interval_seconds (float): How often retention is enforced.  Retention is enforced in bulk,
+        every retain/10 inserts or this often, so the record count can briefly exceed retain by up to 10%.
+        write_batch_size (int): By default (1) every scan result, and the stats it contributes to, is written
+        before its task completes.  Set higher to have workers buffer results and write them in batches of up to
+        this many, for higher scan rates.  A buffered result has already been acknowledged, so if a worker is
+        killed outright (rather than shut down) up to this many results, or write_batch_interval_seconds worth,
+        are lost.
+        write_batch_interval_seconds (float): The longest a result waits in the buffer before it is written.
+        scan_stats_rollups_db (str): SQLite database of per-minute, per-hour and per-day scan stats, for each
+        connector.  Set to '' to disable the rollups.
+        scan_stats_rollup_minutes / _hours / _days (int): How many buckets of each resolution to keep (-1 for all).
+        archive_dir (str): If set, results older than archive_after_seconds are moved out of the database into
+        Parquet files under this directory, partitioned by date and connector.  Requires pyarrow.  Retention
+        (retain, retain_seconds) then archives the results it is due to remove instead of deleting them.
+        archive_after_seconds (float): The age at which results are archived.
+        archive_interval_seconds (float): How often workers archive.
+        tail_cache_size (int): The API keeps this many of the newest results in memory, kept current from the
+        live scan results (so taskqueue.scan_result_channel must be set), and answers polls for new results
+        (since_id) and the latest pages from it.  Set to 0 to disable.
+        async_threads (int): The API's async endpoints run database calls (for backends without an async driver)
+        in worker threads, up to this many at a time for results and as many again for stats.
     """
     type: str = ConfigDatabaseType.TINYDB
     loc: str = "data/dsx-connect.db.json"
     retain: int = 1000
+    retain_seconds: float = -1
+    retention_sweep_interval_seconds: float = 60
+    write_batch_size: int = 1
+    write_batch_interval_seconds: float = 0.5
 
+    scan_stats_db_type: str = ConfigDatabaseType.TINYDB
     scan_stats_db: str = "data/scan-stats.db.json"
+    scan_stats_rollups_db: str = "data/scan-stats-rollups.db"
+    scan_stats_rollup_minutes: int = 24 * 60
+    scan_stats_rollup_hours: int = 30 * 24
+    scan_stats_rollup_days: int = 365
+
+    archive_dir: str = ""
+    archive_after_seconds: float = 7 * 24 * 3600
+    archive_interval_seconds: float = 3600
+
+    tail_cache_size: int = 1000
+    async_threads: int = 8
 
     class Config:
         env_nested_delimiter = "__"
@@ -36,10 +79,39 @@ class ScannerConfig(BaseSettings):
     # scan_binary_url: str = "http://a668960fee4324868b4154722ad9a909-856481437.us-east-1.elb.amazonaws.com/scan/binary/v2"
     scan_binary_url: str = "http://0.0.0.0:8080/scan/binary/v2"
 
+    # Hedged requests: re-send scans slower than the observed p95 for their size class and take the first answer
+    hedge_enabled: bool = False
+    hedge_scan_binary_urls: list[str] = []  # alternate DSXA endpoints for hedged attempts (default: scan_binary_url)
+    hedge_max_ratio: float = 0.1  # never hedge more than this fraction of scans
+    hedge_overload_cooldown_seconds: float = 30.0  # suspend hedging this long after DSXA answers 429/503
+    hedge_max_in_flight: int | None = None  # most hedged scans in flight at once (default: scan_concurrent_connections)
+
     class Config:
         env_nested_delimiter = "__"
 
 
+class PreScanFilterConfig(BaseSettings):
+    """
+    Rules applied by the scan request worker before a file is sent to DSXA.  Skipped files are recorded with a
+    NOT_SCANNED (size rules) or UNSUPPORTED (extension/type rules) verdict.
+
+    Attributes:
+        enabled (bool): Apply the pre-scan filter.
+        max_file_size_in_bytes (int): Skip files larger than this.  -1 for no limit.
+        skip_zero_byte_files (bool): Skip empty files.
+        skip_extensions (list[str]): File extensions (e.g. ".mp4", ".log.gz") that are never scanned.
+        skip_mime_types (list[str]): MIME types, sniffed from the file's magic bytes, that are never scanned.
+            Wildcards are allowed, e.g. "video/*".
+        sniff_bytes (int): Number of leading bytes read to sniff the MIME type.
+    """
+    enabled: bool = False
+    max_file_size_in_bytes: int = -1
+    skip_zero_byte_files: bool = True
+    skip_extensions: list[str] = []
+    skip_mime_types: list[str] = []
+    sniff_bytes: int = 8192
+
+
 class ScanResultTaskWorkerConfig(BaseSettings):
     syslog_server_url: str = "127.0.0.1"
     syslog_server_port: int = 514
@@ -58,6 +130,58 @@ class TaskQueueConfig(BaseSettings):
     scan_request_task: str = "dsx_connect.taskworkers.taskworkers.scan_request_task"
     verdict_action_task: str = "dsx_connect.taskworkers.taskworkers.verdict_action_task"
     scan_result_task: str = "dsx_connect.taskworkers.taskworkers.scan_result_task"  # New task
+    archive_scan_results_task: str = "dsx_connect.taskworkers.taskworkers.archive_scan_results_task"
+
+    # Scan request intake: the API publishes scan requests off the event loop, coalescing bursts into batches
+    enqueue_batch_window_ms: float = 2.0
+    enqueue_max_batch_size: int = 500
+    enqueue_publisher_threads: int = 4
+
+    # Redis used for live scan results and scan job tracking, the broker's if not set (and the broker is Redis)
+    redis_url: str = ""
+
+    # Redis pub/sub channel scan_result_task publishes stored results on, for live streaming by the API.
+    # Set to '' to disable.
+    scan_result_channel: str = "dsx-connect:scan-results"
+
+    # Full scan job counters are kept in Redis for this long after the job's last activity
+    scan_job_ttl_seconds: int = 7 * 24 * 3600
+
+
+class ServerConfig(BaseSettings):
+    """
+    Settings for the API server, used by dsx-connect-start.py --production.
+
+    Attributes:
+        workers (int): Number of API worker processes.
+        keepalive_timeout (int): Seconds an idle keep-alive connection (e.g. from a connector) is held open.
+        backlog (int): Maximum number of pending connections.
+        limit_concurrency (int): Maximum concurrent connections per worker before responding 503, 0 for no limit.
+        graceful_timeout (int): Seconds workers are given to finish in-flight requests on shutdown/restart.
+    """
+    host: str = "0.0.0.0"
+    port: int = 8586
+    workers: int = 4
+    keepalive_timeout: int = 30
+    backlog: int = 2048
+    limit_concurrency: int = 0
+    graceful_timeout: int = 30
+
+
+class HealthConfig(BaseSettings):
+    """
+    Background health probing of DSXA, the broker, the databases and recently seen connectors.
+
+    Attributes:
+        interval_seconds (float): Seconds between probes of each dependency.
+        timeout_seconds (float): Seconds a probe may take before the dependency is considered unhealthy.
+        history (int): Number of probe latencies kept per dependency.
+        connector_idle_seconds (float): Stop probing a connector this long after its last scan request.
+    """
+    interval_seconds: float = 10.0
+    timeout_seconds: float = 5.0
+    history: int = 30
+    connector_idle_seconds: float = 3600.0
 
 
 class SecurityConfig(BaseSettings):
@@ -68,6 +192,9 @@ class DSXConnectConfig(BaseSettings):
     results_database: DatabaseConfig = DatabaseConfig()
     scanner: ScannerConfig = ScannerConfig()
     taskqueue: TaskQueueConfig = TaskQueueConfig()
+    prescan_filter: PreScanFilterConfig = PreScanFilterConfig()
+    server: ServerConfig = ServerConfig()
+    health: HealthConfig = HealthConfig()
 
     scan_result_task_worker: ScanResultTaskWorkerConfig = ScanResultTaskWorkerConfig()
 
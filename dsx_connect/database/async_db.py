@@ -0,0 +1,108 @@
+"""
+Async interfaces to the scan results and stats databases, for the API's async endpoints.
+
+Every database has one, from its asynchronous() method.  By default calls run the synchronous database in worker
+threads, limited to a few at a time, so a burst of slow queries (a dashboard opening, say) waits for those threads
+rather than tying up the event loop or the threadpool the rest of the API shares.  Databases with an async driver
+(MongoDB, Redis) override the reads with native async ones.
+"""
+from __future__ import annotations
+
+import functools
+from itertools import islice
+from typing import TYPE_CHECKING, AsyncIterator, Callable, TypeVar
+
+import anyio.to_thread
+
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel, ScanResultsPage, \
+    ScanResultsQuery, ScanStatsModel
+
+if TYPE_CHECKING:
+    from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+    from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB
+
+T = TypeVar("T")
+
+# results pulled from a synchronous iterator per trip to a worker thread
+_CHUNK_SIZE = 500
+
+
+class _ThreadOffload:
+    def __init__(self, threads: int):
+        self._threads = threads
+        self._limiter: anyio.CapacityLimiter | None = None
+
+    async def _run(self, function: Callable[..., T], *args, **kwargs) -> T:
+        if self._limiter is None:
+            # created on first use, as it belongs to the running event loop
+            self._limiter = anyio.CapacityLimiter(self._threads)
+        return await anyio.to_thread.run_sync(functools.partial(function, *args, **kwargs), limiter=self._limiter)
+
+
+class AsyncScanResultsDB(_ThreadOffload):
+    """The async counterpart of ScanResultsBaseDB."""
+
+    def __init__(self, db: ScanResultsBaseDB, threads: int = 8):
+        super().__init__(threads)
+        self.db = db
+
+    def __str__(self):
+        return str(self.db)
+
+    async def insert_many(self, scan_results: list[ScanResultModel]) -> list[int]:
+        return await self._run(self.db.insert_many, scan_results)
+
+    async def delete(self, key, value) -> bool:
+        return await self._run(self.db.delete, key, value)
+
+    async def delete_many(self, ids: list[int]) -> int:
+        return await self._run(self.db.delete_many, ids)
+
+    async def count(self) -> int:
+        return await self._run(len, self.db)
+
+    async def iter_where(self, conditions: list[FieldCondition],
+                         descending: bool = False) -> AsyncIterator[ScanResultModel]:
+        iterator = self.db.iter_where(conditions, descending)
+        while True:
+            chunk = await self._run(lambda: list(islice(iterator, _CHUNK_SIZE)))
+            for scan_result in chunk:
+                yield scan_result
+            if len(chunk) < _CHUNK_SIZE:
+                return
+
+    async def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                         limit: int | None = None) -> list[ScanResultModel]:
+        return await self._run(self.db.find_where, conditions, descending, limit)
+
+    async def find(self, key, value) -> list[ScanResultModel]:
+        return await self.find_where([FieldCondition(field=ScanResultField.parse(key), equals=value)])
+
+    def iter_query(self, query: ScanResultsQuery) -> AsyncIterator[ScanResultModel]:
+        return self.iter_where(query.conditions(), query.descending)
+
+    async def query(self, query: ScanResultsQuery) -> list[ScanResultModel]:
+        return await self.find_where(query.conditions(), query.descending, query.limit)
+
+    async def query_page(self, query: ScanResultsQuery) -> ScanResultsPage:
+        return ScanResultsPage.of(await self.query(query), query.limit)
+
+
+class AsyncScanStatsDB(_ThreadOffload):
+    """The async counterpart of ScanStatsBaseDB."""
+
+    def __init__(self, db: ScanStatsBaseDB, threads: int = 8):
+        super().__init__(threads)
+        self.db = db
+
+    def __str__(self):
+        return str(self.db)
+
+    async def get(self) -> ScanStatsModel:
+        return await self._run(self.db.get)
+
+    async def upsert(self, stats: ScanStatsModel):
+        await self._run(self.db.upsert, stats)
+
+    async def merge(self, delta: ScanStatsModel):
+        await self._run(self.db.merge, delta)
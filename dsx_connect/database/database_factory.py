@@ -1,8 +1,16 @@
+from dsx_connect.database.scan_results_archive import ScanResultsArchiver
+from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.database.scan_results_logstore import ScanResultsLogStore
 from dsx_connect.database.scan_stats_collection import ScanStatsCollection
+from dsx_connect.database.scan_stats_logstore import ScanStatsLogStore
+from dsx_connect.database.scan_stats_redis import ScanStatsRedisDB
+from dsx_connect.database.scan_stats_rollups import ScanStatsRollups
 from dsx_connect.database.scan_stats_tinydb import ScanStatsTinyDB
 from dsx_connect.config import ConfigDatabaseType
+from dsx_connect.models.scan_models import ScanStatsResolution
 from dsx_connect.database.scan_results_collection import ScanResultsCollection
 from dsx_connect.database.scan_results_mongodb import ScanResultsMongoDB
+from dsx_connect.database.scan_results_redis import ScanResultsRedisDB
 from dsx_connect.database.scan_results_sqlite import ScanResultsSQLiteDB
 from dsx_connect.database.scan_results_tinydb import ScanResultsTinyDB
 from dsx_connect.utils.logging import dsx_logging
@@ -11,24 +19,42 @@ from dsx_connect.utils.logging import dsx_logging
 def database_scan_results_factory(database_type: str = 'tinydb',
                                   database_loc: str = 'data',
                                   retain: int = -1,
-                                  collection_name: str = 'scan_results'):
+                                  collection_name: str = 'scan_results',
+                                  retain_seconds: float = -1,
+                                  retention_sweep_interval: float = 60,
+                                  archived: bool = False):
+    """
+    archived: results are archived (results_database.archive_dir is set).  Retention is then left to the workers'
+    RetentionSweeper, which archives what retention is due to delete, rather than enforced by inserts or expired by
+    MongoDB.
+    """
     scan_results_db = None
-    if database_type == ConfigDatabaseType.TINYDB:
-        scan_results_db = ScanResultsTinyDB(database_loc, collection_name=collection_name, retain=retain)
-        dsx_logging.debug(f'Scan results TinyDB database initialized at: {database_loc} Retention policy: {retain}')
+    retention = dict(retain=retain, retain_seconds=retain_seconds, retention_sweep_interval=retention_sweep_interval)
+    if database_type == ConfigDatabaseType.LOGSTORE:
+        scan_results_db = ScanResultsLogStore(database_loc, collection_name=collection_name, **retention)
+        dsx_logging.debug(f'Scan results log store initialized at: {database_loc} Retention policy: {retention}')
+    elif database_type == ConfigDatabaseType.TINYDB:
+        scan_results_db = ScanResultsTinyDB(database_loc, collection_name=collection_name, **retention)
+        dsx_logging.debug(f'Scan results TinyDB database initialized at: {database_loc} Retention policy: {retention}')
     elif database_type == ConfigDatabaseType.SQLITE3:
         scan_results_db = ScanResultsSQLiteDB(database_loc,
                                               collection_name=collection_name,
-                                              retain=retain)
-        dsx_logging.debug(f'Scan results SQLite3 database initialized at: {database_loc} Retention policy: {retain}')
+                                              **retention)
+        dsx_logging.debug(f'Scan results SQLite3 database initialized at: {database_loc} Retention policy: {retention}')
     elif database_type == ConfigDatabaseType.MONGODB:
         loc, db_name = database_loc.rsplit('/', 1)
-        scan_results_db = ScanResultsMongoDB(loc, db_name=db_name, collection_name=collection_name, retain=retain)
-        dsx_logging.debug(f'Scan results Mongo database initialized at: {database_loc} Retention policy: {retain}')
+        scan_results_db = ScanResultsMongoDB(loc, db_name=db_name, collection_name=collection_name,
+                                             ttl_index=not archived, **retention)
+        dsx_logging.debug(f'Scan results Mongo database initialized at: {database_loc} Retention policy: {retention}')
+    elif database_type == ConfigDatabaseType.REDIS:
+        scan_results_db = ScanResultsRedisDB(database_loc, collection_name=collection_name, **retention)
+        dsx_logging.debug(f'Scan results Redis database initialized at: {database_loc} Retention policy: {retention}')
     else:
-        scan_results_db = ScanResultsCollection(retain=retain)
-        dsx_logging.debug(f'Scan results collection in memory. Retention policy: {retain}')
+        scan_results_db = ScanResultsCollection(**retention)
+        dsx_logging.debug(f'Scan results collection in memory. Retention policy: {retention}')
 
+    if archived:
+        scan_results_db.leave_retention_to_sweeper()
     return scan_results_db
 
 
@@ -36,11 +62,46 @@ def database_scan_stats_factory(database_type: str = 'tinydb',
                                 database_loc: str = 'data',
                                 collection_name: str = 'scan_stats'):
     scan_stats_db = None
-    if database_type == ConfigDatabaseType.TINYDB:
+    if database_type == ConfigDatabaseType.LOGSTORE:
+        scan_stats_db = ScanStatsLogStore(database_loc, collection_name=collection_name)
+        dsx_logging.debug(f'Scan stats log store initialized at: {database_loc}')
+    elif database_type == ConfigDatabaseType.TINYDB:
         scan_stats_db = ScanStatsTinyDB(database_loc, collection_name=collection_name)
         dsx_logging.debug(f'Scan stats TinyDB database initialized at: {database_loc}')
+    elif database_type == ConfigDatabaseType.REDIS:
+        scan_stats_db = ScanStatsRedisDB(database_loc, collection_name=collection_name)
+        dsx_logging.debug(f'Scan stats Redis database initialized at: {database_loc}')
     else:
         scan_stats_db = ScanStatsCollection()
         dsx_logging.debug(f'Scan stats collection in memory.')
 
     return scan_stats_db
+
+
+def scan_results_archiver_factory(scan_results_db: ScanResultsBaseDB, archive_dir: str,
+                                  archive_after_seconds: float = 7 * 24 * 3600,
+                                  archive_interval: float = 3600) -> ScanResultsArchiver | None:
+    if not archive_dir:
+        return None
+    try:
+        archiver = ScanResultsArchiver(scan_results_db, archive_dir, archive_after_seconds=archive_after_seconds,
+                                       archive_interval=archive_interval)
+    except ImportError:
+        dsx_logging.warning(f'Scan results archive dir {archive_dir} is set, but pyarrow is not installed: scan '
+                            f'results will not be archived')
+        return None
+    dsx_logging.debug(f'Scan results archived to: {archive_dir} after {archive_after_seconds} seconds')
+    return archiver
+
+
+def scan_stats_rollups_factory(database_loc: str = 'data/scan-stats-rollups.db',
+                               retain_minutes: int = 24 * 60,
+                               retain_hours: int = 30 * 24,
+                               retain_days: int = 365) -> ScanStatsRollups | None:
+    if not database_loc:
+        dsx_logging.debug('Scan stats rollups disabled.')
+        return None
+    retain_buckets = {ScanStatsResolution.MINUTE: retain_minutes, ScanStatsResolution.HOUR: retain_hours,
+                      ScanStatsResolution.DAY: retain_days}
+    dsx_logging.debug(f'Scan stats rollups initialized at: {database_loc} Retention policy: {retain_buckets}')
+    return ScanStatsRollups(database_loc, retain_buckets=retain_buckets)
@@ -0,0 +1,279 @@
+"""
+An append-only, log-structured record store in a local file, shared safely between processes.
+
+Every change is appended to the file as one line, "<crc32 as 8 hex digits> <JSON [id, record]>", where a null
+record is a tombstone marking id deleted.  Nothing is ever rewritten in place, so the cost of a write does not
+grow with the size of the store.
+
+- Each process keeps an in-memory index of id -> (offset, length) of the live line for that id, and catches up with
+  lines other processes appended by reading the file from where it last stopped.  Lines are only consumed up to the
+  last newline, and lines whose checksum doesn't match (e.g. torn by a crash mid-write) are skipped.
+- Appends are serialized across processes with flock on a sidecar lock file (<path>.lock), so ids allocated under
+  the lock are unique and increasing.  Where flock isn't available (Windows) only threads within a process are
+  serialized.
+- Optional secondary indexes (value -> ids of the records with it) are kept alongside, built from each record as its
+  line is read, so records can be looked up by a field without reading the file.
+- Once superseded and deleted lines outweigh the live ones, the store is compacted: live lines are copied to a new
+  file which atomically replaces the old one.  Other processes notice the new inode and rebuild their index.
+"""
+import contextlib
+import os
+import pathlib
+import tempfile
+import threading
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable, Iterator
+
+import orjson
+
+from dsx_connect.utils.logging import dsx_logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_CRC_LENGTH = 8
+
+
+def _encode(record_id: int, record: dict | None) -> bytes:
+    payload = orjson.dumps([record_id, record])
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+class AppendOnlyLog:
+    def __init__(self, path: str, compact_min_bytes: int = 1024 * 1024,
+                 indexes: dict[str, Callable[[dict], object]] | None = None):
+        """
+        Args:
+            path: the log file, created if it doesn't exist.
+            compact_min_bytes: don't compact until superseded and deleted lines take up at least this much.
+            indexes: secondary indexes to maintain, name -> function returning a record's (hashable) value for it,
+                or None to leave the record out of that index.  See lookup().
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._compact_min_bytes = compact_min_bytes
+        self._index_functions = indexes or {}
+        self._thread_lock = threading.RLock()
+        self._exclusive_depth = 0
+        self._pid = None
+        self._lock_file = None
+        self._file = None
+        self._open()
+
+    def __str__(self):
+        return f'log: {self.path}'
+
+    def _open(self):
+        if self._pid != os.getpid():
+            # flock belongs to the open file description, which a forked child shares with its parent
+            self._pid = os.getpid()
+            self._lock_file = open(f"{self.path}.lock", "a+b")
+            self._exclusive_depth = 0
+        # 'a' so every write is appended, whichever process wrote last; reads are positional
+        self._file = open(self.path, "a+b", buffering=0)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._index: dict[int, tuple[int, int]] = {}
+        self._secondary: dict[str, dict[object, set[int]]] = {name: {} for name in self._index_functions}
+        self._secondary_values: dict[int, tuple] = {}  # id -> the record's value in each secondary index
+        self._read_offset = 0
+        self._dead_bytes = 0
+        self._max_id = 0
+        self._catch_up()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Hold the exclusive lock, across processes.  Reentrant within a thread."""
+        with self._thread_lock:
+            if self._pid != os.getpid():
+                self._open()
+            if self._exclusive_depth == 0 and fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._exclusive_depth += 1
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._exclusive_depth -= 1
+                if self._exclusive_depth == 0 and fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Pick up whatever other processes have appended, or the compacted file that replaced ours."""
+        try:
+            replaced = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            replaced = True
+        if replaced or self._pid != os.getpid():
+            self._open()
+        else:
+            self._catch_up()
+
+    def _catch_up(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self._read_offset:
+            return
+        data = os.pread(self._file.fileno(), size - self._read_offset, self._read_offset)
+        end = data.rfind(b"\n") + 1  # a trailing partial line is still being written
+        position = 0
+        while position < end:
+            newline = data.index(b"\n", position)
+            self._apply(data[position:newline], self._read_offset + position, newline + 1 - position)
+            position = newline + 1
+        self._read_offset += end
+
+    def _apply(self, line: bytes, offset: int, length: int):
+        payload = line[_CRC_LENGTH + 1:]
+        try:
+            valid = int(line[:_CRC_LENGTH], 16) == zlib.crc32(payload)
+            record_id, record = orjson.loads(payload) if valid else (None, None)
+        except (ValueError, TypeError):
+            valid = False
+        if not valid:
+            if line:
+                dsx_logging.warning(f"Skipping corrupt record at offset {offset} of {self.path}")
+            self._dead_bytes += length
+            return
+
+        self._max_id = max(self._max_id, record_id)
+        superseded = self._index.pop(record_id, None)
+        if superseded:
+            self._dead_bytes += superseded[1]
+            if self._secondary:
+                self._unindex(record_id)
+        if record is None:
+            self._dead_bytes += length
+        else:
+            self._index[record_id] = (offset, length)
+            if self._secondary:
+                self._index_record(record_id, record)
+
+    def _index_record(self, record_id: int, record: dict):
+        values = tuple(function(record) for function in self._index_functions.values())
+        self._secondary_values[record_id] = values
+        for index, value in zip(self._secondary.values(), values):
+            if value is not None:
+                index.setdefault(value, set()).add(record_id)
+
+    def _unindex(self, record_id: int):
+        for index, value in zip(self._secondary.values(), self._secondary_values.pop(record_id, ())):
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del index[value]
+
+    def _write(self, lines: list[bytes]):
+        """Append lines.  Must hold the exclusive lock."""
+        data = b"".join(lines)
+        size = os.fstat(self._file.fileno()).st_size
+        if size and os.pread(self._file.fileno(), 1, size - 1) != b"\n":
+            # terminate a line left torn by a writer that died mid-write, so it doesn't swallow ours
+            data = b"\n" + data
+        view = memoryview(data)
+        while view:
+            view = view[self._file.write(view):]
+        self._catch_up()
+
+    def append(self, records: list[dict]) -> list[int]:
+        """Append new records in one write, returning the ids assigned to them."""
+        with self.exclusive():
+            first_id = self._max_id + 1
+            self._write([_encode(first_id + i, record) for i, record in enumerate(records)])
+            return list(range(first_id, first_id + len(records)))
+
+    def put(self, record_id: int, record: dict):
+        """Write record under record_id, replacing any record already there."""
+        with self.exclusive():
+            self._write([_encode(record_id, record)])
+            self._maybe_compact()
+
+    def delete(self, record_ids: list[int]) -> int:
+        """Delete records, returning how many existed."""
+        with self.exclusive():
+            tombstones = [_encode(record_id, None) for record_id in record_ids if record_id in self._index]
+            if tombstones:
+                self._write(tombstones)
+                self._maybe_compact()
+            return len(tombstones)
+
+    def get(self, record_id: int) -> dict | None:
+        with self._thread_lock:
+            self._refresh()
+            location = self._index.get(record_id)
+            return self._read(self._file, location) if location else None
+
+    def lookup(self, index: str, values: Iterable) -> set[int]:
+        """The ids of the live records whose value in the secondary index is any of values."""
+        with self._thread_lock:
+            self._refresh()
+            secondary = self._secondary[index]
+            return set().union(*(secondary.get(value, ()) for value in values))
+
+    def ids(self) -> list[int]:
+        """The ids of all live records, in ascending order."""
+        with self._thread_lock:
+            self._refresh()
+            return sorted(self._index)
+
+    def scan(self, descending: bool = False, after: int | None = None,
+             ids: Iterable[int] | None = None) -> Iterator[tuple[int, dict]]:
+        """
+        Yield (id, record) for every live record (or only those among ids), in id order, starting after id after
+        (in that order).  Iterates over a snapshot, unaffected by later writes or compaction.
+        """
+        with self._thread_lock:
+            self._refresh()
+            ids = sorted(self._index) if ids is None else sorted(i for i in ids if i in self._index)
+            if after is not None:
+                ids = ids[:bisect_left(ids, after)] if descending else ids[bisect_right(ids, after):]
+            if descending:
+                ids.reverse()
+            # keeping a reference to the file keeps it readable should compaction replace it mid-iteration
+            file = self._file
+            locations = [(record_id, self._index[record_id]) for record_id in ids]
+        for record_id, location in locations:
+            yield record_id, self._read(file, location)
+
+    @staticmethod
+    def _read(file, location: tuple[int, int]) -> dict:
+        offset, length = location
+        line = os.pread(file.fileno(), length - 1, offset)
+        return orjson.loads(line[_CRC_LENGTH + 1:])[1]
+
+    def __len__(self):
+        with self._thread_lock:
+            self._refresh()
+            return len(self._index)
+
+    def _maybe_compact(self):
+        live_bytes = self._read_offset - self._dead_bytes
+        if self._dead_bytes >= max(self._compact_min_bytes, live_bytes):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with only its live records."""
+        with self.exclusive():
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    # a tombstone for the highest id ever assigned, so ids of deleted records aren't reused
+                    f.write(_encode(self._max_id, None))
+                    for record_id in sorted(self._index):
+                        offset, length = self._index[record_id]
+                        f.write(os.pread(self._file.fileno(), length, offset))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                pathlib.Path(tmp_path).unlink(missing_ok=True)
+                raise
+            dead_bytes = self._dead_bytes
+            self._open()
+        dsx_logging.debug(f"Compacted {self.path}, reclaimed {dead_bytes} bytes")
+
+    def close(self):
+        self._file.close()
+        self._lock_file.close()
@@ -0,0 +1,55 @@
+import threading
+
+from dsx_connect.database.scan_results_archive import ScanResultsArchiver
+from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.utils.logging import dsx_logging
+
+
+class RetentionSweeper:
+    """
+    Enforces a scan results database's retention in the background, every interval seconds.
+
+    Inserts already enforce retention every so many records, this makes sure results age out even while nothing
+    is being inserted.  Given an archiver, the sweeper archives results as they come due and, in place of deleting
+    them, archives the results retention is due to delete.  Set the database to leave retention to the sweeper
+    (database_scan_results_factory(archived=True)), or inserts (and MongoDB's TTL index) delete them unarchived.
+    """
+
+    def __init__(self, scan_results_db: ScanResultsBaseDB, interval: float = 60,
+                 archiver: ScanResultsArchiver | None = None):
+        self._scan_results_db = scan_results_db
+        self._archiver = archiver
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            if self._archiver is not None:
+                # retention moves results to the archive rather than deleting them; if another process is
+                # archiving, it does this in its turn
+                try:
+                    self._archiver.archive_due()
+                    self._archiver.archive_retained()
+                except Exception as e:
+                    dsx_logging.warning(f"Archiving scan results to {self._archiver} failed: {e}")
+                continue
+            try:
+                deleted = self._scan_results_db.enforce_retention()
+                if deleted:
+                    dsx_logging.debug(f"Retention sweep deleted {deleted} scan results from {self._scan_results_db}")
+            except Exception as e:
+                dsx_logging.warning(f"Retention sweep of {self._scan_results_db} failed: {e}")
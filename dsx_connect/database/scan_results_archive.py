@@ -0,0 +1,195 @@
+"""
+Archival of older scan results from the (hot) results database into Parquet files, for long term, cheap to query,
+verdict history.
+
+Results are written with the columns of the CSV export (the verdict flattened) plus the full verdict as JSON, zstd
+compressed, and partitioned Hive style by the UTC date and connector they were stored under:
+
+    <archive_dir>/date=2025-01-31/connector=http%3A%2F%2Fconnector%3A8590/part-<first id>-<last id>.parquet
+
+so a partitioned dataset reader (pyarrow.dataset, DuckDB, Spark, ...) can prune by date and connector.  Once a
+file is written, the results in it are deleted from the results database.
+
+Requires pyarrow, which is optional: without it nothing is archived.
+"""
+import contextlib
+import datetime
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel
+from dsx_connect.utils.logging import dsx_logging
+from dsx_connect.utils.scan_results_export import CSV_COLUMNS, flatten_result
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, pip install pyarrow to archive scan results
+    pyarrow = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# the partition value pyarrow (and Hive) read back as null
+_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+_INTEGER_COLUMNS = {"id", "file_size_in_bytes", "scan_duration_in_microseconds"}
+
+
+def _schema():
+    fields = [(column, pyarrow.int64() if column in _INTEGER_COLUMNS
+               else pyarrow.float64() if column == "timestamp" else pyarrow.string()) for column in CSV_COLUMNS]
+    return pyarrow.schema(fields + [("dpa_verdict", pyarrow.string())])
+
+
+class ScanResultsArchiver:
+    """
+    Moves scan results older than archive_after_seconds from a results database into Parquet files under
+    archive_dir.  Only one process archives into a directory at a time, others skip their turn.
+    """
+
+    def __init__(self, scan_results_db: ScanResultsBaseDB, archive_dir: str, archive_after_seconds: float,
+                 archive_interval: float = 3600, batch_size: int = 10000):
+        """
+        Args:
+            scan_results_db: the database to archive results from.
+            archive_dir: the root of the partitioned archive, created if it doesn't exist.
+            archive_after_seconds: results stored longer ago than this are archived.
+            archive_interval: the least time, in seconds, between archive runs by archive_due().
+            batch_size: results read (and held in memory) per round of file writes and deletes.
+        """
+        if pyarrow is None:
+            raise ImportError("Archiving scan results requires pyarrow")
+        self._scan_results_db = scan_results_db
+        self.archive_dir = pathlib.Path(archive_dir)
+        self._archive_after_seconds = archive_after_seconds
+        self._archive_interval = archive_interval
+        self._batch_size = batch_size
+        self._schema = _schema()
+        self._last_run = 0.0
+        self._lock = threading.Lock()
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+    def __str__(self):
+        return f'archive: {self.archive_dir}'
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """Yields whether this process got to archive: False if another thread or process already is."""
+        if not self._lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            with open(self.archive_dir / ".lock", "a+b") as lock_file:
+                if fcntl:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                yield True
+        finally:
+            self._lock.release()
+
+    def archive_due(self) -> int:
+        """Archive, if archive_interval has passed since the last run."""
+        if time.monotonic() - self._last_run < self._archive_interval:
+            return 0
+        return self.archive()
+
+    def archive(self, older_than: float | None = None) -> int:
+        """
+        Archive the results stored before older_than (epoch seconds, by default archive_after_seconds ago),
+        returning how many were archived.
+        """
+        if older_than is None:
+            older_than = time.time() - self._archive_after_seconds
+        self._last_run = time.monotonic()
+        archived = 0
+        with self._exclusive() as exclusive:
+            if not exclusive:
+                dsx_logging.debug(f"Skipping scan results archival, {self} is being archived by another process")
+                return 0
+            archived = self._archive_where([FieldCondition(field=ScanResultField.TIMESTAMP, lt=older_than)])
+        if archived:
+            dsx_logging.info(f"Archived {archived} scan results stored before "
+                             f"{datetime.datetime.fromtimestamp(older_than, datetime.timezone.utc):%Y-%m-%d %H:%M:%S} "
+                             f"to {self.archive_dir}")
+        return archived
+
+    def archive_retained(self) -> bool:
+        """
+        Archive every result the database's retention is due to delete: those beyond its retention count and those
+        older than its retention age, however recently they were stored.  Returns False, having archived nothing,
+        if another process is archiving.
+        """
+        self._last_run = time.monotonic()
+        with self._exclusive() as exclusive:
+            if not exclusive:
+                return False
+            archived = 0
+            cutoff = self._scan_results_db.retention_cutoff()
+            if cutoff is not None:
+                archived += self._archive_where([FieldCondition(field=ScanResultField.TIMESTAMP, lt=cutoff)])
+            excess = self._scan_results_db.retention_excess()
+            if excess > 0:
+                # the oldest results, by id
+                archived += self._archive_where([], limit=excess)
+        if archived:
+            dsx_logging.info(f"Archived {archived} scan results beyond the results database's retention to "
+                             f"{self.archive_dir}")
+        return True
+
+    def _archive_where(self, conditions: list[FieldCondition], limit: int | None = None) -> int:
+        """Archive the oldest results (up to limit) matching the conditions, a batch at a time."""
+        archived = 0
+        # each round re-queries from the start: the previous round's results are gone from the database
+        while limit is None or archived < limit:
+            batch_size = self._batch_size if limit is None else min(self._batch_size, limit - archived)
+            batch = self._scan_results_db.find_where(conditions, limit=batch_size)
+            if not batch:
+                break
+            archived += self._archive_batch(batch)
+            if len(batch) < batch_size:
+                break
+        return archived
+
+    def _archive_batch(self, results: list[ScanResultModel]) -> int:
+        partitions: dict[tuple[str, str], list[ScanResultModel]] = defaultdict(list)
+        for result in results:
+            date = datetime.datetime.fromtimestamp(result.timestamp, datetime.timezone.utc).strftime("%Y-%m-%d")
+            connector = urllib.parse.quote(result.connector_url, safe="") if result.connector_url else _NULL_PARTITION
+            partitions[date, connector].append(result)
+
+        for (date, connector), partition in partitions.items():
+            self._write(self.archive_dir / f"date={date}" / f"connector={connector}", partition)
+        # only once every file is in place, so a failed write leaves its results in the database to be retried
+        return self._scan_results_db.delete_many([result.id for result in results])
+
+    def _write(self, directory: pathlib.Path, results: list[ScanResultModel]):
+        rows = [flatten_result(result) + [result.dpa_verdict.model_dump_json() if result.dpa_verdict else None]
+                for result in results]
+        columns = list(zip(*rows))
+        table = pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{results[0].id:012d}-{results[-1].id:012d}.parquet"
+        # written aside and renamed into place, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".parquet")
+        os.close(fd)
+        try:
+            pyarrow.parquet.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
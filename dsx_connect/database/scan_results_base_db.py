@@ -1,11 +1,30 @@
+import time
 from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Iterator
 
-from dsx_connect.models.scan_models import ScanResultModel
+from dsx_connect.database.async_db import AsyncScanResultsDB
+from dsx_connect.models.scan_models import (FieldCondition, ScanResultField, ScanResultModel, ScanResultsQuery,
+                                            ScanResultsPage)
 
 
 class ScanResultsBaseDB(ABC):
-    def __init__(self, retain: int = -1):
+    def __init__(self, retain: int = -1, retain_seconds: float = -1, retention_sweep_interval: float = 60):
+        """
+        Args:
+            retain: -1 to retain every result, 0 to retain none, N to retain the newest N.
+            retain_seconds: if positive, results older than this are deleted.
+            retention_sweep_interval: the longest time, in seconds, an insert goes without enforcing retention.
+        """
         self._retain = retain
+        self._retain_seconds = retain_seconds
+        self._retention_sweep_interval = retention_sweep_interval
+        # Retention is enforced in bulk every so many inserts rather than after each one, so the store can
+        # overshoot retain by up to 10% between sweeps
+        self._retention_sweep_every = max(1, retain // 10) if retain > 0 else None
+        self._inserts_since_sweep = 0
+        self._last_sweep = time.monotonic()
+        self._retention_deferred = False
 
     @abstractmethod
     def read_all(self) -> list[ScanResultModel]:
@@ -17,28 +36,118 @@ class ScanResultsBaseDB(ABC):
         """Insert a new record into the JSON file."""
         pass
 
+    @abstractmethod
+    def insert_many(self, scan_results: list[ScanResultModel]) -> list[int]:
+        """Insert several records in one write, setting and returning their ids."""
+        pass
+
     @abstractmethod
     def delete(self, key, value) -> ScanResultModel:
         """Delete a record from the JSON file based on a key-value pair."""
         pass
 
+    def delete_many(self, ids: list[int]) -> int:
+        """Delete the records with these ids, returning how many were deleted."""
+        return sum(bool(self.delete('id', result_id)) for result_id in ids)
+
     @abstractmethod
-    def delete_oldest(self):
-        """Delete the oldest record.  Typically used in conjunction with record retention limit maintain a
-        specific record count."""
+    def delete_oldest(self, count: int = 1) -> int:
+        """Delete the count oldest records, returning how many were deleted.  Used to enforce the record retention
+        limit."""
         pass
 
-    @abstractmethod
+    def delete_older_than(self, timestamp: float) -> int:
+        """Delete records stored before timestamp (epoch seconds), returning how many were deleted.  Used to
+        enforce the retention age."""
+        expired = [result.id for result in self.read_all() if result.timestamp is not None
+                   and result.timestamp < timestamp]
+        for result_id in expired:
+            self.delete('id', result_id)
+        return len(expired)
+
     def find(self, key, value) -> list[ScanResultModel] | None:
-        """Find records in the JSON file based on a key-value pair."""
-        pass
+        """Find the records whose field key (a ScanResultField value, e.g. 'dpa_verdict.file_info.file_hash')
+        equals value, in id order."""
+        return self.find_where([FieldCondition(field=ScanResultField.parse(key), equals=value)])
+
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        """
+        Yield every record matching all of the conditions, ordered by id.
+
+        This default filters read_all() in Python; backends override it to answer the conditions from their
+        indexes, reading only the records that match rather than every record.
+        """
+        results = [result for result in self.read_all()
+                   if all(condition.matches(result) for condition in conditions)]
+        results.sort(key=lambda result: result.id, reverse=descending)
+        yield from results
+
+    def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                   limit: int | None = None) -> list[ScanResultModel]:
+        """Return the records (up to limit) matching all of the conditions, ordered by id."""
+        return list(islice(self.iter_where(conditions, descending), limit))
+
+    def iter_query(self, query: ScanResultsQuery) -> Iterator[ScanResultModel]:
+        """
+        Yield every record matching the query's filters, after its cursor, ordered by id.  query.limit is ignored;
+        use query() for a page.
+        """
+        return self.iter_where(query.conditions(), query.descending)
+
+    def query(self, query: ScanResultsQuery) -> list[ScanResultModel]:
+        """Return up to query.limit records matching the query."""
+        return self.find_where(query.conditions(), query.descending, query.limit)
+
+    def query_page(self, query: ScanResultsQuery) -> ScanResultsPage:
+        return ScanResultsPage.of(self.query(query), query.limit)
+
+    def asynchronous(self, threads: int = 8) -> AsyncScanResultsDB:
+        """
+        This database's async interface, for use from the event loop.  Calls run in up to threads worker threads,
+        unless the backend has a native async driver.
+        """
+        return AsyncScanResultsDB(self, threads)
 
     @abstractmethod
     def __len__(self) -> int:
         """Return the number of records in the database."""
         pass
 
-    def _check_retain_limit(self):
-        """Check if the retain limit is exceeded and delete the oldest record if necessary."""
-        if self._retain > 0 and len(self) > self._retain:
-            self.delete_oldest()
+    def leave_retention_to_sweeper(self):
+        """
+        Stop inserts from enforcing retention, leaving it to a RetentionSweeper: one with an archiver archives the
+        results retention is due to delete, rather than deleting them.
+        """
+        self._retention_deferred = True
+
+    def retention_excess(self) -> int:
+        """How many records are beyond the retention count."""
+        return max(0, len(self) - self._retain) if self._retain > 0 else 0
+
+    def retention_cutoff(self) -> float | None:
+        """Records stored before this time (epoch seconds) are beyond the retention age; None if there is none."""
+        return time.time() - self._retain_seconds if self._retain_seconds > 0 else None
+
+    def enforce_retention(self) -> int:
+        """Delete, in bulk, every record beyond the retention count or older than the retention age."""
+        self._inserts_since_sweep = 0
+        self._last_sweep = time.monotonic()
+        deleted = 0
+        if self._retain > 0:
+            deleted += self._delete_beyond_retain()
+        if self._retain_seconds > 0:
+            deleted += self.delete_older_than(time.time() - self._retain_seconds)
+        return deleted
+
+    def _delete_beyond_retain(self) -> int:
+        excess = len(self) - self._retain
+        return self.delete_oldest(excess) if excess > 0 else 0
+
+    def _check_retain_limit(self, inserted: int = 1):
+        """Called after inserts, enforces retention once enough inserts or time have gone by since the last sweep."""
+        if self._retention_deferred or (self._retention_sweep_every is None and self._retain_seconds <= 0):
+            return
+        self._inserts_since_sweep += inserted
+        if ((self._retention_sweep_every is not None and self._inserts_since_sweep >= self._retention_sweep_every)
+                or time.monotonic() - self._last_sweep >= self._retention_sweep_interval):
+            self.enforce_retention()
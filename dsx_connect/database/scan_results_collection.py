@@ -1,46 +1,224 @@
+import math
+import sys
+import threading
+import weakref
+from typing import Iterator
+
 from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
-from dsx_connect.models.scan_models import ScanResultModel
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel
+
+# ScanResultModel fields (and nested verdict fields) with a hash index, id -> set of ids
+_INDEXED_FIELDS = {
+    'scan_request_task_id': lambda model: model.scan_request_task_id,
+    'metadata_tag': lambda model: model.metadata_tag,
+    'connector_url': lambda model: model.connector_url,
+    'dpa_verdict.verdict': lambda model: model.dpa_verdict.verdict if model.dpa_verdict else None,
+    'dpa_verdict.file_info.file_hash':
+        lambda model: model.dpa_verdict.file_info.file_hash if model.dpa_verdict and model.dpa_verdict.file_info
+        else None,
+}
 
 
 class ScanResultsCollection(ScanResultsBaseDB):
+    """
+    Scan results in memory, for ephemeral deployments.
+
+    Ids are assigned consecutively, so results are kept in a buffer of slots addressed by id: the result with id i
+    is in slot i - first id, looking one up is arithmetic and appending is O(1).  Deleting a result just empties its
+    slot, emptied slots at the front are trimmed away as the oldest results go, so with a retain limit the buffer
+    behaves as a ring of retain results, the oldest evicted as each new one arrives.  Commonly queried fields have
+    hash indexes, and verdict file info is shared between results for the same file.
+    """
 
-    def __init__(self, retain: int = -1):
-        super().__init__(retain)
-        self.collection = []
+    def __init__(self, retain: int = -1, retain_seconds: float = -1, retention_sweep_interval: float = 60):
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
+        # the count limit is enforced as each result is inserted, only the age limit needs sweeping
+        self._retention_sweep_every = None
+        self._slots: list[ScanResultModel | None] = []
+        self._first_id = 1  # id of _slots[0]
+        self._head = 0  # the slots before this one are all empty
         self.next_id = 1
+        self._count = 0
+        self._indexes: dict[str, dict] = {field: {} for field in _INDEXED_FIELDS}
+        self._file_infos = weakref.WeakValueDictionary()  # file hash -> DPAVerdictFileInfoModel
+        self._lock = threading.RLock()
 
     def insert(self, model: ScanResultModel) -> int:
         if self._retain == 0:
             return -1 # Do nothing if retain is 0 (store nothing)
-
-        model.id = self.next_id
-        self.collection.append(model)
-        self.next_id += 1
-        self._check_retain_limit()  # Check and enforce the retention limit
+        self.insert_many([model])
         return model.id
 
-    def delete(self, id: int) -> bool:
-        for i, model in enumerate(self.collection):
-            if model.id == id:
-                del self.collection[i]
-                return True
-        return False
-
-    def delete_oldest(self) -> bool:
-        if self.collection:
-            record = self.collection.pop(0)  # Remove the oldest record
-            return True
-        return False
-
-    def read_all(self) -> [ScanResultModel]:
-        return self.collection
-
-    def find(self, key: str, value: str) -> list[ScanResultModel] | None:
-        models = []
-        for model in self.collection:
-            if getattr(model, key, None) == value:
-                models.append(model)
-        return models
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
+        with self._lock:
+            for model in models:
+                model.id = self.next_id
+                self.next_id += 1
+                self._compact(model)
+                self._slots.append(model)
+                self._count += 1
+                self._index(model)
+            if self._retain > 0 and self._count > self._retain and not self._retention_deferred:
+                self.delete_oldest(self._count - self._retain)
+        self._check_retain_limit(len(models))  # Check and enforce the retention age
+        return [model.id for model in models]
+
+    def _compact(self, model: ScanResultModel):
+        # connectors and verdict descriptions repeat across results, as does the file info of a file scanned again
+        # (only assigned when not already shared, pydantic attribute assignment isn't free)
+        if model.connector_url:
+            connector_url = sys.intern(model.connector_url)
+            if connector_url is not model.connector_url:
+                model.connector_url = connector_url
+        verdict = model.dpa_verdict
+        if verdict is None:
+            return
+        details = verdict.verdict_details
+        if details and details.event_description:
+            event_description = sys.intern(details.event_description)
+            if event_description is not details.event_description:
+                details.event_description = event_description
+        file_info = verdict.file_info
+        if file_info is not None and file_info.file_hash:
+            shared = self._file_infos.get(file_info.file_hash)
+            if shared is None or shared != file_info:
+                self._file_infos[file_info.file_hash] = file_info
+            elif shared is not file_info:
+                verdict.file_info = shared
+
+    def _index(self, model: ScanResultModel):
+        for field, value_of in _INDEXED_FIELDS.items():
+            value = value_of(model)
+            if value is not None:
+                self._indexes[field].setdefault(value, set()).add(model.id)
+
+    def _unindex(self, model: ScanResultModel):
+        for field, value_of in _INDEXED_FIELDS.items():
+            value = value_of(model)
+            ids = self._indexes[field].get(value)
+            if ids is not None:
+                ids.discard(model.id)
+                if not ids:
+                    del self._indexes[field][value]
+
+    def _get(self, model_id: int) -> ScanResultModel | None:
+        slot = model_id - self._first_id
+        return self._slots[slot] if 0 <= slot < len(self._slots) else None
+
+    def _remove(self, model_id: int) -> bool:
+        model = self._get(model_id)
+        if model is None:
+            return False
+        self._slots[model_id - self._first_id] = None
+        self._count -= 1
+        self._unindex(model)
+        return True
+
+    def _trim(self):
+        # move the head past emptied slots, dropping them once they are half the buffer (which keeps it amortized
+        # O(1), where dropping each one as it empties would shift the whole buffer every time, like list.pop(0))
+        while self._head < len(self._slots) and self._slots[self._head] is None:
+            self._head += 1
+        if self._head > len(self._slots) // 2:
+            del self._slots[:self._head]
+            self._first_id += self._head
+            self._head = 0
+
+    def delete(self, key, value=None) -> bool:
+        # also accepts delete(id), as before
+        if value is None:
+            key, value = 'id', key
+        with self._lock:
+            if key == 'id':
+                deleted = self._remove(int(value))
+            else:
+                deleted = [self._remove(model.id) for model in self.find(key, value)]
+            self._trim()
+            return bool(deleted)
+
+    def delete_many(self, ids: list[int]) -> int:
+        with self._lock:
+            deleted = sum(self._remove(result_id) for result_id in ids)
+            self._trim()
+        return deleted
+
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        deleted = 0
+        with self._lock:
+            for slot in range(self._head, len(self._slots)):
+                if deleted == count:
+                    break
+                model = self._slots[slot]
+                if model is not None:
+                    self._remove(model.id)
+                    deleted += 1
+            self._trim()
+        return deleted
+
+    def delete_older_than(self, timestamp: float) -> int:
+        # ids are assigned in insertion order, which is (near enough) time order, so stop at the first result
+        # inside the retention window rather than visiting every result
+        deleted = 0
+        with self._lock:
+            for slot in range(self._head, len(self._slots)):
+                model = self._slots[slot]
+                if model is None or model.timestamp is None:
+                    continue
+                if model.timestamp >= timestamp:
+                    break
+                self._remove(model.id)
+                deleted += 1
+            self._trim()
+        return deleted
+
+    def read_all(self) -> list[ScanResultModel]:
+        with self._lock:
+            return [model for model in self._slots[self._head:] if model is not None]
+
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        # equality and IN conditions on indexed fields are answered from the hash indexes, id conditions by
+        # arithmetic on the buffer; only the candidates they leave are checked against the remaining conditions.
+        # The candidate ids are snapshotted, as inserts and retention change the buffer while an export streams, and
+        # each is looked up as it's reached, those deleted in the meantime are skipped.
+        with self._lock:
+            first, last = self._first_id + self._head, self._first_id + len(self._slots) - 1
+            candidates = []
+            remaining = []
+            for condition in conditions:
+                if condition.field == ScanResultField.ID and condition.is_range:
+                    if condition.gt is not None:
+                        first = max(first, math.floor(condition.gt) + 1)
+                    if condition.gte is not None:
+                        first = max(first, math.ceil(condition.gte))
+                    if condition.lt is not None:
+                        last = min(last, math.ceil(condition.lt) - 1)
+                    if condition.lte is not None:
+                        last = min(last, math.floor(condition.lte))
+                elif condition.field == ScanResultField.ID:
+                    candidates.append({condition.equals} if condition.equals is not None else set(condition.one_of))
+                elif condition.field.value in self._indexes and not condition.is_range:
+                    index = self._indexes[condition.field.value]
+                    values = [condition.equals] if condition.equals is not None else condition.one_of
+                    candidates.append(set().union(*(index.get(value, ()) for value in values)))
+                else:
+                    remaining.append(condition)
+
+            if candidates:
+                candidates.sort(key=len)
+                ids = sorted((model_id for model_id in set.intersection(*candidates) if first <= model_id <= last),
+                             reverse=descending)
+            else:
+                ids = range(last, first - 1, -1) if descending else range(first, last + 1)
+
+        for model_id in ids:
+            with self._lock:
+                model = self._get(model_id)
+            if model is not None and all(condition.matches(model) for condition in remaining):
+                yield model
 
     def __len__(self):
-        return len(self.collection)
+        return self._count
@@ -0,0 +1,142 @@
+import pathlib
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List
+
+from dsx_connect.database.log_store import AppendOnlyLog
+from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel, ScanResultStatusEnum
+from dsx_connect.utils.logging import dsx_logging
+
+
+def _field(record: dict, key: str):
+    # dotted keys reach into the verdict, e.g. dpa_verdict.file_info.file_hash
+    value = record
+    for part in key.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+# fields with a secondary (hash) index in the log
+_INDEXED_FIELDS = ('scan_request_task_id', 'metadata_tag', 'connector_url', 'dpa_verdict.verdict',
+                   'dpa_verdict.file_info.file_hash')
+
+
+class ScanResultsLogStore(ScanResultsBaseDB):
+    """
+    Scan results in an append-only log file (see log_store), which any number of API and worker processes can
+    share.  Inserts append a line rather than rewriting the file, so their cost stays flat as the store grows.
+    Commonly queried fields are indexed in memory, so looking results up by them reads only the matching lines.
+    """
+
+    def __init__(self, db_path: str, collection_name: str = 'scan_results', retain: int = -1,
+                 retain_seconds: float = -1, retention_sweep_interval: float = 60):
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
+        self.db_path = db_path
+        self.log = AppendOnlyLog(db_path, indexes={field: lambda record, field=field: _field(record, field)
+                                                   for field in _INDEXED_FIELDS})
+
+    def __str__(self) -> str:
+        return f'db: {self.db_path}'
+
+    def insert(self, model: ScanResultModel) -> int:
+        if self._retain == 0:
+            dsx_logging.debug('(Retention set to 0, storing nothing)')
+            return -1  # Do nothing if retain is 0 (store nothing)
+        self.insert_many([model])
+        return model.id
+
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
+        ids = self.log.append([model.model_dump(mode="json", exclude={"id"}) for model in models])
+        for model, model_id in zip(models, ids):
+            model.id = model_id
+        self._check_retain_limit(len(models))
+        return ids
+
+    def delete(self, key: str, value) -> bool:
+        if key == 'id':
+            return self.log.delete([int(value)]) > 0
+        return self.log.delete([model.id for model in self.find(key, value)]) > 0
+
+    def delete_many(self, ids: list[int]) -> int:
+        return self.log.delete(ids)
+
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        return self.log.delete(self.log.ids()[:count])
+
+    def delete_older_than(self, timestamp: float) -> int:
+        # ids are assigned in insertion order, which is (near enough) time order, so stop at the first result
+        # inside the retention window rather than reading every result
+        expired = []
+        for record_id, record in self.log.scan():
+            if record.get('timestamp') is None:
+                continue
+            if record['timestamp'] >= timestamp:
+                break
+            expired.append(record_id)
+        return self.log.delete(expired)
+
+    def read_all(self) -> List[ScanResultModel]:
+        return [ScanResultModel(id=record_id, **record) for record_id, record in self.log.scan()]
+
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        # equality and IN conditions on indexed fields narrow the ids to read, as do id conditions; the rest are
+        # checked against each record read, before a model is built for it
+        ids = None
+        id_conditions = []
+        remaining = []
+        for condition in conditions:
+            if condition.field == ScanResultField.ID:
+                id_conditions.append(condition)
+            elif condition.field.value in _INDEXED_FIELDS and not condition.is_range:
+                values = [condition.equals] if condition.equals is not None else condition.one_of
+                matching = self.log.lookup(condition.field.value, values)
+                ids = matching if ids is None else ids & matching
+            else:
+                remaining.append(condition)
+        if id_conditions:
+            ids = sorted(ids) if ids is not None else self.log.ids()
+            # id ranges (a page cursor, say) are a slice of the sorted ids
+            start, stop = 0, len(ids)
+            for condition in id_conditions:
+                if condition.gt is not None:
+                    start = max(start, bisect_right(ids, condition.gt))
+                if condition.gte is not None:
+                    start = max(start, bisect_left(ids, condition.gte))
+                if condition.lt is not None:
+                    stop = min(stop, bisect_left(ids, condition.lt))
+                if condition.lte is not None:
+                    stop = min(stop, bisect_right(ids, condition.lte))
+            ids = ids[start:stop]
+            for condition in id_conditions:
+                if not condition.is_range:
+                    ids = [record_id for record_id in ids if condition.matches_value(record_id)]
+
+        for record_id, record in self.log.scan(descending=descending, ids=ids):
+            if all(condition.matches_value(_field(record, condition.field.value)) for condition in remaining):
+                yield ScanResultModel(id=record_id, **record)
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+
+if __name__ == "__main__":
+    pathlib.Path('test1.jsonl').unlink(missing_ok=True)
+
+    service = ScanResultsLogStore('test1.jsonl', retain=5)
+    for task_id in 'ABBBCABBBC':
+        service.insert(ScanResultModel(scan_request_task_id=task_id, metadata_tag=f'test-{task_id}',
+                                       status=ScanResultStatusEnum.SCANNED))
+
+    print("All records:")
+    print(service.read_all())
+
+    print("\nRecords matching 'scan_request_task_id=B':")
+    print(service.find('scan_request_task_id', 'B'))
+
+    print(f'\nlength: {len(service)}')
@@ -1,37 +1,130 @@
-from pymongo import MongoClient
-import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator
 
+from pymongo import ASCENDING, AsyncMongoClient, MongoClient, ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+
+from dsx_connect.database.async_db import AsyncScanResultsDB
 from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
-from dsx_connect.models.scan_models import ScanResultModel
+from dsx_connect.models.scan_models import FieldCondition, ScanResultModel
+from dsx_connect.utils.logging import dsx_logging
+
+# the fields scan results are looked up and filtered on; filters are paged in id order, hence the compound indexes
+_INDEXES = [
+    [('scan_request_task_id', ASCENDING)],
+    [('metadata_tag', ASCENDING), ('id', ASCENDING)],
+    [('dpa_verdict.verdict', ASCENDING), ('id', ASCENDING)],
+    [('connector_url', ASCENDING), ('id', ASCENDING)],
+    [('dpa_verdict.file_info.file_hash', ASCENDING)],
+    [('timestamp', ASCENDING)],
+]
+
+
+def _filter(conditions: list[FieldCondition]) -> dict:
+    mongo_filter = {}
+    for condition in conditions:
+        if condition.equals is not None:
+            term = condition.equals
+        elif condition.one_of is not None:
+            term = {'$in': condition.one_of}
+        else:
+            term = {f'${bound}': getattr(condition, bound) for bound in ('gt', 'gte', 'lt', 'lte')
+                    if getattr(condition, bound) is not None}
+        field = condition.field.value
+        if field in mongo_filter:
+            # several conditions on one field (a filter and the cursor, say) must all hold
+            mongo_filter.setdefault('$and', []).append({field: term})
+        else:
+            mongo_filter[field] = term
+    return mongo_filter
 
 
 class ScanResultsMongoDB(ScanResultsBaseDB):
-    def __init__(self, db_uri: str, db_name: str, collection_name: str = 'scan_results', retain: int = -1):
-        super().__init__(retain)
+    def __init__(self, db_uri: str, db_name: str, collection_name: str = 'scan_results', retain: int = -1,
+                 retain_seconds: float = -1, retention_sweep_interval: float = 60, insert_batch_size: int = 1000,
+                 ttl_index: bool = True):
+        """
+        Args:
+            ttl_index: have MongoDB itself expire results retain_seconds after they were stored.  Set to False when
+                results are archived, so none is deleted before it has been.
+        """
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
+        self.db_uri = db_uri
         self.client = MongoClient(db_uri)
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
+        # ids are allocated from a per-collection counter document, atomically, however many workers insert
+        self.counters = self.db['counters']
+        self._insert_batch_size = insert_batch_size
+        self._ttl_index = ttl_index and retain_seconds > 0
+        try:
+            self._ensure_indexes()
+            if self._ttl_index:
+                self._ensure_ttl_index(int(retain_seconds))
+            else:
+                self._drop_ttl_index()
+        except PyMongoError as e:
+            dsx_logging.warning(f'Unable to set up indexes on {self}: {e}')
+
+    def _ensure_indexes(self):
+        self.collection.create_index('id', unique=True)
+        for keys in _INDEXES:
+            self.collection.create_index(keys)
+        # a collection written before the counter existed: start the counter past its highest id
+        last_record = self.collection.find_one(sort=[('id', -1)], projection={'id': True})
+        if last_record:
+            self.counters.update_one({'_id': self.collection.name}, {'$max': {'seq': last_record['id']}},
+                                     upsert=True)
+
+    def _ensure_ttl_index(self, expire_after_seconds: int):
+        """Have MongoDB itself expire results retain_seconds after they were stored, via a TTL index on created_at."""
+        try:
+            self.collection.create_index('created_at', name='created_at_ttl', expireAfterSeconds=expire_after_seconds)
+        except OperationFailure:
+            # the index exists with a different expiry
+            self.db.command('collMod', self.collection.name,
+                            index={'name': 'created_at_ttl', 'expireAfterSeconds': expire_after_seconds})
+
+    def _drop_ttl_index(self):
+        """Drop a TTL index left from when results were expired by MongoDB, so it stops deleting them."""
+        if 'created_at_ttl' in self.collection.index_information():
+            self.collection.drop_index('created_at_ttl')
+            dsx_logging.info(f'Dropped the created_at_ttl index from {self}, results are no longer expired by MongoDB')
 
     def __str__(self):
         return f'db: {self.db.name}   collection: {self.collection.name}'
 
+    def _allocate_ids(self, count: int) -> int:
+        """Reserve count consecutive ids, returning the first."""
+        counter = self.counters.find_one_and_update({'_id': self.collection.name}, {'$inc': {'seq': count}},
+                                                    upsert=True, return_document=ReturnDocument.AFTER)
+        return counter['seq'] - count + 1
+
     def insert(self, model: ScanResultModel) -> int:
         if self._retain == 0:
             return -1  # Do nothing if retain is 0 (store nothing)
+        self.insert_many([model])
+        return model.id
 
-    # Generate the next available integer id by checking the highest current id
-        last_record = self.collection.find_one(sort=[("id", -1)])  # Sort by id descending
-        next_id = (last_record["id"] + 1) if last_record else 1
-
-        model_dict = json.loads(model.json(exclude={"id"}))
-        model_dict["id"] = next_id  # Add the custom integer id
-        self.collection.insert_one(model_dict)
-
-        model.id = next_id  # Set the model id to the newly generated one
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
 
-        self._check_retain_limit()
+        next_id = self._allocate_ids(len(models))
+        created_at = datetime.now(timezone.utc)
+        documents = []
+        for model in models:
+            model_dict = model.model_dump(mode="json", exclude={"id"})
+            model_dict["id"] = model.id = next_id  # Add the custom integer id
+            next_id += 1
+            if self._ttl_index:
+                model_dict["created_at"] = created_at  # TTL indexes only expire BSON dates
+            documents.append(model_dict)
+        for start in range(0, len(documents), self._insert_batch_size):
+            self.collection.insert_many(documents[start:start + self._insert_batch_size], ordered=False)
 
-        return model.id
+        self._check_retain_limit(len(models))
+        return [model.id for model in models]
 
     def delete(self, key: str, value: str) -> bool:
         if key == 'id':
@@ -41,28 +134,87 @@ class ScanResultsMongoDB(ScanResultsBaseDB):
 
         return result.deleted_count > 0
 
-    def delete_oldest(self):
-        oldest_record = self.collection.find_one(sort=[('_id', 1)])
-        if oldest_record:
-            self.collection.delete_one({"_id": oldest_record['_id']})
+    def delete_many(self, ids: list[int]) -> int:
+        return self.collection.delete_many({'id': {'$in': list(ids)}}).deleted_count
+
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        last = self.collection.find_one(sort=[('id', 1)], skip=count - 1, projection={'id': True})
+        if last is None:
+            return self.collection.delete_many({}).deleted_count
+        return self.collection.delete_many({'id': {'$lte': last['id']}}).deleted_count
+
+    def delete_older_than(self, timestamp: float) -> int:
+        # normally the TTL index has already removed these
+        return self.collection.delete_many({'timestamp': {'$lt': timestamp}}).deleted_count
+
+    def _delete_beyond_retain(self) -> int:
+        newest_retained = self.collection.find_one(sort=[('id', -1)], skip=self._retain - 1, projection={'id': True})
+        if newest_retained is None:
+            return 0
+        return self.collection.delete_many({'id': {'$lt': newest_retained['id']}}).deleted_count
 
     def read_all(self) -> list[ScanResultModel]:
         # Fetch all records and map them to ScanResultModel objects using the integer id
-        records = self.collection.find()
-        return [ScanResultModel(id=record['id'], **{k: v for k, v in record.items() if k != 'id'}) for record in records]
+        records = self.collection.find(projection={'_id': False}).sort('id', 1)
+        return [ScanResultModel(**record) for record in records]
 
-    def find(self, key: str, value: str) -> list[ScanResultModel] | None:
-        # Search by integer id if key is 'id', otherwise search by other fields
-        if key == 'id':
-            result = self.collection.find_one({'id': int(value)})
-            results = [result] if result else []
-        else:
-            results = self.collection.find({key: value})
+    def _find(self, conditions: list[FieldCondition], descending: bool):
+        return (self.collection.find(_filter(conditions), projection={'_id': False})
+                .sort('id', -1 if descending else 1))
 
-        return [ScanResultModel(id=result['id'], **{k: v for k, v in result.items() if k != 'id'}) for result in results]
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        for record in self._find(conditions, descending).batch_size(1000):
+            yield ScanResultModel(**record)
+
+    def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                   limit: int | None = None) -> list[ScanResultModel]:
+        cursor = self._find(conditions, descending)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [ScanResultModel(**record) for record in cursor]
 
     def __len__(self):
-        return self.collection.count_documents({})
+        return self.collection.estimated_document_count()  # from collection metadata, rather than a scan
+
+    def asynchronous(self, threads: int = 8) -> 'AsyncScanResultsMongoDB':
+        return AsyncScanResultsMongoDB(self, threads)
+
+
+class AsyncScanResultsMongoDB(AsyncScanResultsDB):
+    """Reads scan results with PyMongo's async client; writes, from the API, go through worker threads."""
+
+    def __init__(self, db: ScanResultsMongoDB, threads: int = 8):
+        super().__init__(db, threads)
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            # created on first use, as the client belongs to the running event loop
+            client = AsyncMongoClient(self.db.db_uri)
+            self._collection = client[self.db.db.name][self.db.collection.name]
+        return self._collection
+
+    def _find(self, conditions: list[FieldCondition], descending: bool):
+        return (self.collection.find(_filter(conditions), projection={'_id': False})
+                .sort('id', -1 if descending else 1))
+
+    async def iter_where(self, conditions: list[FieldCondition],
+                         descending: bool = False) -> AsyncIterator[ScanResultModel]:
+        async for record in self._find(conditions, descending).batch_size(1000):
+            yield ScanResultModel(**record)
+
+    async def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                         limit: int | None = None) -> list[ScanResultModel]:
+        cursor = self._find(conditions, descending)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [ScanResultModel(**record) async for record in cursor]
+
+    async def count(self) -> int:
+        return await self.collection.estimated_document_count()
 
 
 if __name__ == "__main__":
@@ -70,25 +222,25 @@ if __name__ == "__main__":
     service = ScanResultsMongoDB('mongodb://localhost:27017', 'dpx-db')
 
     # Insert sample records
-    service.insert(ScanResultModel(dpa_proxy_scan_id='A'))
-    service.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    service.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    service.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    service.insert(ScanResultModel(dpa_proxy_scan_id='C'))
+    service.insert(ScanResultModel(scan_request_task_id='A'))
+    service.insert(ScanResultModel(scan_request_task_id='B'))
+    service.insert(ScanResultModel(scan_request_task_id='B'))
+    service.insert(ScanResultModel(scan_request_task_id='B'))
+    service.insert(ScanResultModel(scan_request_task_id='C'))
 
     # Read all records
     print("All records:")
     print(service.read_all())
 
     # Find records matching a key-value pair
-    print("\nRecords matching 'dpa_proxy_scan_id=B':")
-    matching_records = service.find("dpa_proxy_scan_id", "B")
+    print("\nRecords matching 'scan_request_task_id=B':")
+    matching_records = service.find("scan_request_task_id", "B")
     print(matching_records)
 
-    service.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    service.insert(ScanResultModel(dpa_proxy_scan_id='C'))
-    print("\nRecords matching 'dpa_proxy_scan_id=B':")
-    matching_records = service.find("dpa_proxy_scan_id", "B")
+    service.insert(ScanResultModel(scan_request_task_id='B'))
+    service.insert(ScanResultModel(scan_request_task_id='C'))
+    print("\nRecords matching 'scan_request_task_id=B':")
+    matching_records = service.find("scan_request_task_id", "B")
     print(matching_records)
 
     print("\nRecords matching 'id=2':")
@@ -99,6 +251,6 @@ if __name__ == "__main__":
     service.delete('id', '2')
     print(service.read_all())
 
-    print("\nDeleting 'dpa_proxy_scan_id=B':")
-    service.delete('dpa_proxy_scan_id', 'B')
+    print("\nDeleting 'scan_request_task_id=B':")
+    service.delete('scan_request_task_id', 'B')
     print(service.read_all())
@@ -0,0 +1,344 @@
+import heapq
+from itertools import islice
+from typing import AsyncIterator, Iterator
+
+import orjson
+import redis
+import redis.asyncio
+
+from dsx_connect.database.async_db import AsyncScanResultsDB
+from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel, ScanResultStatusEnum
+
+# fields with an index: a sorted set of the ids of the results with each value, scored by id
+_INDEXED_FIELDS = (ScanResultField.SCAN_REQUEST_TASK_ID, ScanResultField.METADATA_TAG, ScanResultField.CONNECTOR_URL,
+                   ScanResultField.VERDICT, ScanResultField.FILE_HASH)
+_PAGE_SIZE = 1000
+
+
+class _QueryPlan:
+    """
+    How a list of conditions is answered: the ids are walked, in order, from the smallest index sorted set
+    matching an equality or IN condition (or every id, without one), within any id range; the results are then
+    fetched a page at a time and checked against the remaining conditions.
+    """
+
+    def __init__(self, conditions: list[FieldCondition], index_key):
+        self.low, self.high = float('-inf'), float('inf')
+        self.exact_ids = None
+        self.candidates: list[tuple[list[str], FieldCondition]] = []  # (index keys, condition)
+        self.remaining: list[FieldCondition] = []
+        for condition in conditions:
+            if condition.field == ScanResultField.ID and condition.is_range:
+                if condition.gt is not None:
+                    self.low = max(self.low, condition.gt + 1)
+                if condition.gte is not None:
+                    self.low = max(self.low, condition.gte)
+                if condition.lt is not None:
+                    self.high = min(self.high, condition.lt - 1)
+                if condition.lte is not None:
+                    self.high = min(self.high, condition.lte)
+            elif condition.field == ScanResultField.ID:
+                ids = {condition.equals} if condition.equals is not None else set(condition.one_of)
+                self.exact_ids = ids if self.exact_ids is None else self.exact_ids & ids
+            elif condition.field in _INDEXED_FIELDS and not condition.is_range:
+                values = [condition.equals] if condition.equals is not None else condition.one_of
+                self.candidates.append(([index_key(condition.field, value) for value in values], condition))
+            else:
+                self.remaining.append(condition)
+
+    @property
+    def candidate_keys(self) -> list[str]:
+        return [key for keys, _ in self.candidates for key in keys]
+
+    def choose(self, cardinalities: list[int]) -> list[str] | None:
+        """
+        Given the cardinalities of candidate_keys, the index keys to walk, or None to walk exact_ids (if set) or
+        every id.  The other candidates' conditions are added to those remaining.
+        """
+        if self.exact_ids is not None or not self.candidates:
+            self.remaining += [condition for _, condition in self.candidates]
+            return None
+        sizes = []
+        cardinalities = iter(cardinalities)
+        for keys, _ in self.candidates:
+            sizes.append(sum(islice(cardinalities, len(keys))))
+        chosen = sizes.index(min(sizes))
+        self.remaining += [condition for i, (_, condition) in enumerate(self.candidates) if i != chosen]
+        return self.candidates[chosen][0]
+
+    def sorted_exact_ids(self, descending: bool) -> list[int]:
+        return sorted((model_id for model_id in self.exact_ids if self.low <= model_id <= self.high),
+                      reverse=descending)
+
+
+class ScanResultsRedisDB(ScanResultsBaseDB):
+    """
+    Scan results in Redis, shared by every API and worker process on every node that can reach it.
+
+    Under the key prefix (dsxconnect:<collection>):
+    - next_id: the id counter, incremented by the size of each insert batch
+    - data: a hash of id -> result JSON
+    - ids: a sorted set of every id (scored by id), which orders and pages results and caps them for retention
+    - timestamps: a sorted set of ids scored by timestamp, for age retention
+    - index:<field>:<value>: a sorted set, scored by id, per value of each indexed field
+
+    Inserts and deletes update all of these in one MULTI/EXEC transaction, so other clients never see a result
+    half written.
+    """
+
+    def __init__(self, redis_url: str, collection_name: str = 'scan_results', retain: int = -1,
+                 retain_seconds: float = -1, retention_sweep_interval: float = 60):
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
+        self.redis_url = redis_url
+        # connections are pooled, and the pool is replaced in a forked child
+        self.redis = redis.Redis.from_url(redis_url)
+        self.prefix = f'dsxconnect:{collection_name}'
+        self._next_id_key = f'{self.prefix}:next_id'
+        self._data_key = f'{self.prefix}:data'
+        self._ids_key = f'{self.prefix}:ids'
+        self._timestamps_key = f'{self.prefix}:timestamps'
+
+    def __str__(self) -> str:
+        return f'redis: {self.redis_url}   prefix: {self.prefix}'
+
+    def _index_key(self, field: ScanResultField, value) -> str:
+        return f'{self.prefix}:index:{field.value}:{value}'
+
+    def _index_keys(self, model: ScanResultModel) -> list[str]:
+        keys = []
+        for field in _INDEXED_FIELDS:
+            value = field.value_of(model)
+            if value is not None:
+                keys.append(self._index_key(field, getattr(value, 'value', value)))
+        return keys
+
+    def insert(self, model: ScanResultModel) -> int:
+        if self._retain == 0:
+            return -1  # Do nothing if retain is 0 (store nothing)
+        self.insert_many([model])
+        return model.id
+
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
+
+        next_id = self.redis.incrby(self._next_id_key, len(models)) - len(models) + 1
+        data = {}
+        index_entries: dict[str, dict[int, int]] = {}
+        timestamps = {}
+        for model in models:
+            model.id = next_id
+            next_id += 1
+            data[model.id] = orjson.dumps(model.model_dump(mode="json", exclude={"id"}))
+            if model.timestamp is not None:
+                timestamps[model.id] = model.timestamp
+            for key in self._index_keys(model):
+                index_entries.setdefault(key, {})[model.id] = model.id
+
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self._data_key, mapping=data)
+        pipeline.zadd(self._ids_key, {model_id: model_id for model_id in data})
+        if timestamps:
+            pipeline.zadd(self._timestamps_key, timestamps)
+        for key, entries in index_entries.items():
+            pipeline.zadd(key, entries)
+        pipeline.execute()
+
+        self._check_retain_limit(len(models))
+        return [model.id for model in models]
+
+    def delete(self, key: str, value) -> bool:
+        if key == 'id':
+            return self.delete_many([int(value)]) > 0
+        return self.delete_many([model.id for model in self.find(key, value)]) > 0
+
+    def delete_many(self, ids: list[int]) -> int:
+        deleted = 0
+        for start in range(0, len(ids), _PAGE_SIZE):
+            chunk = ids[start:start + _PAGE_SIZE]
+            # the results themselves are needed, to know which index entries to remove
+            models = [model for model in self._get_many(chunk) if model is not None]
+            if not models:
+                continue
+            pipeline = self.redis.pipeline(transaction=True)
+            pipeline.hdel(self._data_key, *(model.id for model in models))
+            pipeline.zrem(self._ids_key, *(model.id for model in models))
+            pipeline.zrem(self._timestamps_key, *(model.id for model in models))
+            for model in models:
+                for index_key in self._index_keys(model):
+                    pipeline.zrem(index_key, model.id)
+            deleted += pipeline.execute()[0]
+        return deleted
+
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        return self.delete_many([int(model_id) for model_id in self.redis.zrange(self._ids_key, 0, count - 1)])
+
+    def delete_older_than(self, timestamp: float) -> int:
+        expired = self.redis.zrangebyscore(self._timestamps_key, '-inf', f'({timestamp}')
+        return self.delete_many([int(model_id) for model_id in expired])
+
+    def read_all(self) -> list[ScanResultModel]:
+        return list(self.iter_where([]))
+
+    def _get_many(self, ids: list[int]) -> list[ScanResultModel | None]:
+        if not ids:
+            return []
+        return [ScanResultModel(id=model_id, **orjson.loads(record)) if record is not None else None
+                for model_id, record in zip(ids, self.redis.hmget(self._data_key, ids))]
+
+    def _iter_ids(self, key: str, low: float, high: float, descending: bool) -> Iterator[int]:
+        """The ids in a sorted set scored by id, within [low, high], a page at a time."""
+        while low <= high:
+            if descending:
+                page = self.redis.zrevrangebyscore(key, high, low, start=0, num=_PAGE_SIZE)
+            else:
+                page = self.redis.zrangebyscore(key, low, high, start=0, num=_PAGE_SIZE)
+            for model_id in page:
+                yield int(model_id)
+            if len(page) < _PAGE_SIZE:
+                return
+            if descending:
+                high = int(page[-1]) - 1
+            else:
+                low = int(page[-1]) + 1
+
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        plan = _QueryPlan(conditions, self._index_key)
+        cardinalities = []
+        if plan.exact_ids is None and plan.candidates:
+            pipeline = self.redis.pipeline(transaction=False)
+            for key in plan.candidate_keys:
+                pipeline.zcard(key)
+            cardinalities = pipeline.execute()
+        keys = plan.choose(cardinalities)
+
+        if plan.exact_ids is not None:
+            ids = iter(plan.sorted_exact_ids(descending))
+        elif keys:
+            ids = heapq.merge(*(self._iter_ids(key, plan.low, plan.high, descending) for key in keys),
+                              reverse=descending)
+        else:
+            ids = self._iter_ids(self._ids_key, plan.low, plan.high, descending)
+
+        while page := list(islice(ids, _PAGE_SIZE)):
+            yield from self._matching(page, plan.remaining)
+
+    def _matching(self, ids: list[int], conditions: list[FieldCondition]) -> Iterator[ScanResultModel]:
+        for model in self._get_many(ids):
+            # (deleted since its id was read)
+            if model is not None and all(condition.matches(model) for condition in conditions):
+                yield model
+
+    def __len__(self) -> int:
+        return self.redis.zcard(self._ids_key)
+
+    def asynchronous(self, threads: int = 8) -> 'AsyncScanResultsRedisDB':
+        return AsyncScanResultsRedisDB(self, threads)
+
+
+class AsyncScanResultsRedisDB(AsyncScanResultsDB):
+    """Reads scan results with redis-py's asyncio client; writes, from the API, go through worker threads."""
+
+    def __init__(self, db: ScanResultsRedisDB, threads: int = 8):
+        super().__init__(db, threads)
+        self._redis = None
+
+    @property
+    def redis(self) -> redis.asyncio.Redis:
+        if self._redis is None:
+            # created on first use, as its connections belong to the running event loop
+            self._redis = redis.asyncio.Redis.from_url(self.db.redis_url)
+        return self._redis
+
+    async def _get_many(self, ids: list[int]) -> list[ScanResultModel | None]:
+        if not ids:
+            return []
+        return [ScanResultModel(id=model_id, **orjson.loads(record)) if record is not None else None
+                for model_id, record in zip(ids, await self.redis.hmget(self.db._data_key, ids))]
+
+    async def _iter_ids(self, key: str, low: float, high: float, descending: bool) -> AsyncIterator[int]:
+        while low <= high:
+            if descending:
+                page = await self.redis.zrevrangebyscore(key, high, low, start=0, num=_PAGE_SIZE)
+            else:
+                page = await self.redis.zrangebyscore(key, low, high, start=0, num=_PAGE_SIZE)
+            for model_id in page:
+                yield int(model_id)
+            if len(page) < _PAGE_SIZE:
+                return
+            if descending:
+                high = int(page[-1]) - 1
+            else:
+                low = int(page[-1]) + 1
+
+    async def iter_where(self, conditions: list[FieldCondition],
+                         descending: bool = False) -> AsyncIterator[ScanResultModel]:
+        plan = _QueryPlan(conditions, self.db._index_key)
+        cardinalities = []
+        if plan.exact_ids is None and plan.candidates:
+            async with self.redis.pipeline(transaction=False) as pipeline:
+                for key in plan.candidate_keys:
+                    pipeline.zcard(key)
+                cardinalities = await pipeline.execute()
+        keys = plan.choose(cardinalities)
+
+        page = []
+        async for model_id in self._plan_ids(plan, keys, descending):
+            page.append(model_id)
+            if len(page) == _PAGE_SIZE:
+                for model in await self._matching(page, plan.remaining):
+                    yield model
+                page = []
+        for model in await self._matching(page, plan.remaining):
+            yield model
+
+    async def _plan_ids(self, plan: _QueryPlan, keys: list[str] | None, descending: bool) -> AsyncIterator[int]:
+        if plan.exact_ids is not None:
+            for model_id in plan.sorted_exact_ids(descending):
+                yield model_id
+        elif keys and len(keys) > 1:
+            # an IN condition: its indexes (the smallest candidate's) are read whole and merged
+            ids = [model_id for key in keys async for model_id in self._iter_ids(key, plan.low, plan.high,
+                                                                                  descending)]
+            for model_id in sorted(ids, reverse=descending):
+                yield model_id
+        else:
+            async for model_id in self._iter_ids(keys[0] if keys else self.db._ids_key, plan.low, plan.high,
+                                                 descending):
+                yield model_id
+
+    async def _matching(self, ids: list[int], conditions: list[FieldCondition]) -> list[ScanResultModel]:
+        return [model for model in await self._get_many(ids)
+                if model is not None and all(condition.matches(model) for condition in conditions)]
+
+    async def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                         limit: int | None = None) -> list[ScanResultModel]:
+        results = []
+        if limit == 0:
+            return results
+        async for model in self.iter_where(conditions, descending):
+            results.append(model)
+            if len(results) == limit:
+                break
+        return results
+
+    async def count(self) -> int:
+        return await self.redis.zcard(self.db._ids_key)
+
+
+if __name__ == "__main__":
+    service = ScanResultsRedisDB('redis://localhost:6379/0', collection_name='scan_results_test', retain=5)
+    for task_id in 'ABBBCABBBC':
+        service.insert(ScanResultModel(scan_request_task_id=task_id, metadata_tag=f'test-{task_id}',
+                                       status=ScanResultStatusEnum.SCANNED))
+
+    print("All records:")
+    print(service.read_all())
+
+    print("\nRecords matching 'scan_request_task_id=B':")
+    print(service.find('scan_request_task_id', 'B'))
+
+    print(f'\nlength: {len(service)}')
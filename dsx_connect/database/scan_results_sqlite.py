@@ -1,151 +1,332 @@
+import os
 import pathlib
 import sqlite3
-import json
-from typing import List, Optional
+import threading
+import time
+from typing import Iterator, List
 
 from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
-from dsx_connect.models.scan_models import ScanResultModel
-import threading
+from dsx_connect.dsxa_client.verdict_models import DPAVerdictModel2
+from dsx_connect.models.scan_models import FieldCondition, ScanResultModel, ScanResultStatusEnum
+from dsx_connect.utils.logging import dsx_logging
+
+# ScanResultModel fields (and nested verdict fields) that are stored in their own, indexed, columns
+_COLUMNS = {
+    'id': 'id',
+    'scan_request_task_id': 'scan_request_task_id',
+    'metadata_tag': 'metadata_tag',
+    'status': 'status',
+    'connector_url': 'connector_url',
+    'timestamp': 'timestamp',
+    'dpa_verdict.verdict': 'verdict',
+    'dpa_verdict.file_info.file_hash': 'file_hash',
+}
+_RANGE_OPERATORS = (('gt', '>'), ('gte', '>='), ('lt', '<'), ('lte', '<='))
+_SELECT = ('SELECT id, scan_request_task_id, metadata_tag, status, connector_url, timestamp, dpa_verdict '
+           'FROM {table}')
+_PAGE_SIZE = 1000
+
 
 class ScanResultsSQLiteDB(ScanResultsBaseDB):
-    def __init__(self, db_path: str, collection_name: str, retain: int = -1):
-        super().__init__(retain)
+    """
+    Scan results in a SQLite database.
+
+    The fields results are filtered on (task id, metadata tag, verdict, file hash, connector and timestamp) are
+    stored in indexed columns, alongside the full verdict as JSON.  The database is in WAL mode, so readers never
+    block the writer; each thread (and each process, after a fork) gets its own connection, and writes are
+    batched into a single executemany transaction per insert_many call.
+    """
+
+    def __init__(self, db_path: str, collection_name: str = 'scan_results', retain: int = -1,
+                 retain_seconds: float = -1, retention_sweep_interval: float = 60, busy_timeout: float = 30.0):
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
         self.db_path = db_path
-        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.connection.execute("PRAGMA journal_mode=WAL")  # NEW # Enable WAL for better concurrency
-        self.cursor = self.connection.cursor()
+        self.table = collection_name
+        self._busy_timeout = busy_timeout
+        pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._pid = os.getpid()
         self.create_table()
-        self.lock = threading.Lock()  # NEW # Lock to manage write operations
+
+    def __str__(self) -> str:
+        return f'db: {self.db_path}   table: {self.table}'
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        if self._pid != os.getpid():
+            # connections must not be shared with a forked child, start over with fresh ones
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._connections = []
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # autocommit mode, transactions are begun explicitly where they are needed
+            connection = sqlite3.connect(self.db_path, timeout=self._busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
 
     def create_table(self):
-        """Create the scan_results table if it doesn't exist."""
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scan_results (
+        """Create the results table and its indexes if they don't exist."""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._set_aside_legacy_table(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.table} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dpa_proxy_scan_id TEXT NOT NULL,
-                file_tag TEXT,
-                quarantined BOOLEAN NOT NULL CHECK (quarantined IN (0, 1)),
+                scan_request_task_id TEXT NOT NULL,
+                metadata_tag TEXT,
                 status TEXT NOT NULL,
-                dpa_verdict TEXT,  -- Stored as JSON
-                file_reputation INTEGER
+                connector_url TEXT,
+                timestamp REAL,
+                verdict TEXT,
+                file_hash TEXT,
+                dpa_verdict TEXT  -- the full DPAVerdictModel2, as JSON
             )
         ''')
-        self.connection.commit()
+        for column in ('scan_request_task_id', 'metadata_tag', 'verdict', 'file_hash', 'connector_url', 'timestamp'):
+            connection.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_{column} ON {self.table} ({column})')
+
+    def _set_aside_legacy_table(self, connection: sqlite3.Connection):
+        """
+        Rename a results table with an older schema (e.g. dpa_proxy_scan_id and file_tag columns) out of the way,
+        so a new one is created in its place.  Its rows don't map onto today's results, so they aren't migrated.
+        """
+        columns = {row[1] for row in connection.execute(f'PRAGMA table_info({self.table})')}
+        expected = set(_COLUMNS.values()) | {'dpa_verdict'}
+        if not columns or expected <= columns:
+            return
+        legacy_table = f'{self.table}_legacy_{int(time.time())}'
+        connection.execute(f'ALTER TABLE {self.table} RENAME TO {legacy_table}')
+        # indexes keep their names when their table is renamed, which would stop the new table's being created
+        for (index,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                                           "AND sql IS NOT NULL", (legacy_table,)).fetchall():
+            connection.execute(f'DROP INDEX {index}')
+        dsx_logging.warning(f'{self.db_path}: table {self.table} has an older schema (columns: '
+                            f'{", ".join(sorted(columns))}); renamed it to {legacy_table} and created a new '
+                            f'{self.table}.  The old results are left in {legacy_table} and can be dropped.')
+
+    def close(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
 
     def insert(self, model: ScanResultModel) -> int:
         if self._retain == 0:
-            return  # Do nothing if retain is 0 (store nothing)
+            dsx_logging.debug('(Retention set to 0, storing nothing)')
+            return -1  # Do nothing if retain is 0 (store nothing)
+        self.insert_many([model])
+        return model.id
+
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        """
+        Insert models in a single transaction, setting each one's id.
 
-        """Insert a ScanResultModel into the database and return the doc_id."""
-        verdict_json = model.dpa_verdict.json() if model.dpa_verdict else None
-        with self.lock:  # Ensure only one thread writes at a time
-            with self.connection:
-                self.cursor.execute('''
-                    INSERT INTO scan_results (dpa_proxy_scan_id, file_tag, quarantined, status, dpa_verdict, file_reputation)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (model.dpa_proxy_scan_id, model.file_tag, model.quarantined, model.status, verdict_json, model.file_reputation))
+        Ids are allocated up front under the write lock (BEGIN IMMEDIATE), so the rows can be written with one
+        executemany and ids stay unique across processes writing to the same file.
+        """
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
 
-                # Check if we need to enforce the retention limit
-                self._check_retain_limit()
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # AUTOINCREMENT's sequence, so ids of deleted results are never handed out again
+            row = connection.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (self.table,)).fetchone()
+            next_id = (row[0] if row else 0) + 1
+            rows = []
+            for model in models:
+                model.id = next_id
+                next_id += 1
+                rows.append(self._model_to_row(model))
+            connection.executemany(
+                f'INSERT INTO {self.table} (id, scan_request_task_id, metadata_tag, status, connector_url, timestamp, '
+                f'verdict, file_hash, dpa_verdict) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            for model in models:
+                model.id = -1
+            raise
+        self._check_retain_limit(len(models))
+        return [model.id for model in models]
 
-                return self.cursor.lastrowid
+    def delete(self, key: str, value) -> bool:
+        column = self._column(key)
+        if column == 'id':
+            value = int(value)
+        cursor = self.connection.execute(f'DELETE FROM {self.table} WHERE {column} = ?', (value,))
+        return cursor.rowcount > 0
 
-    def delete(self, doc_id: int) -> bool:
-        """Delete a record by its doc_id (primary key)."""
-        with self.lock:  # Ensure delete is thread-safe
-            with self.connection:
-                self.cursor.execute('DELETE FROM scan_results WHERE id = ?', (doc_id,))
-                return self.cursor.rowcount > 0
+    def delete_many(self, ids: list[int]) -> int:
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = connection.executemany(f'DELETE FROM {self.table} WHERE id = ?',
+                                             ((result_id,) for result_id in ids)).rowcount
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return deleted
 
-    def delete_oldest(self):
-        self.cursor.execute('DELETE FROM scan_results WHERE id = (SELECT id FROM scan_results ORDER BY id LIMIT 1)')
-        self.connection.commit()
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        cursor = self.connection.execute(
+            f'DELETE FROM {self.table} WHERE id IN (SELECT id FROM {self.table} ORDER BY id LIMIT ?)', (count,))
+        return cursor.rowcount
+
+    def delete_older_than(self, timestamp: float) -> int:
+        return self.connection.execute(f'DELETE FROM {self.table} WHERE timestamp < ?', (timestamp,)).rowcount
+
+    def _delete_beyond_retain(self) -> int:
+        # a range delete below the retain-th newest id, found by walking the primary key rather than counting rows
+        return self.connection.execute(
+            f'DELETE FROM {self.table} WHERE id < (SELECT id FROM {self.table} ORDER BY id DESC LIMIT 1 OFFSET ?)',
+            (self._retain - 1,)).rowcount
 
     def read_all(self) -> List[ScanResultModel]:
-        """Return all records as ScanResultModel objects."""
-        with self.lock:  # Reading can also be thread-safe to avoid simultaneous modification
-            self.cursor.execute('SELECT * FROM scan_results')
-            rows = self.cursor.fetchall()
+        rows = self.connection.execute(_SELECT.format(table=self.table) + ' ORDER BY id').fetchall()
+        return [self._row_to_model(row) for row in rows]
+
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        where, params = self._where(conditions)
+
+        # Read in keyset pages rather than holding a cursor open, so a slow consumer (an export, say) neither pins
+        # a read snapshot nor needs to stay on the thread whose connection the cursor belongs to.
+        id_condition = 'id < ?' if descending else 'id > ?'
+        order = 'DESC' if descending else 'ASC'
+        last_id = None
+        while True:
+            page_conditions = where + ([id_condition] if last_id is not None else [])
+            page_params = params + ([last_id] if last_id is not None else [])
+            page_where = f' WHERE {" AND ".join(page_conditions)}' if page_conditions else ''
+            rows = self.connection.execute(
+                _SELECT.format(table=self.table) + f'{page_where} ORDER BY id {order} LIMIT {_PAGE_SIZE}',
+                page_params).fetchall()
+            for row in rows:
+                yield self._row_to_model(row)
+            if len(rows) < _PAGE_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def find_where(self, conditions: list[FieldCondition], descending: bool = False,
+                   limit: int | None = None) -> list[ScanResultModel]:
+        if limit is None or limit > _PAGE_SIZE:
+            return super().find_where(conditions, descending, limit)
+        where, params = self._where(conditions)
+        where = f' WHERE {" AND ".join(where)}' if where else ''
+        rows = self.connection.execute(
+            _SELECT.format(table=self.table) + f'{where} ORDER BY id {"DESC" if descending else "ASC"} LIMIT ?',
+            params + [limit]).fetchall()
         return [self._row_to_model(row) for row in rows]
 
-    def find(self, key: str, value) -> Optional[List[ScanResultModel]]:
-        """Find records based on a key-value pair."""
-        query = f"SELECT * FROM scan_results WHERE {key} = ?"
-        self.cursor.execute(query, (value,))
-        rows = self.cursor.fetchall()
-        return [self._row_to_model(row) for row in rows] if rows else None
+    @classmethod
+    def _where(cls, conditions: list[FieldCondition]) -> tuple[list[str], list]:
+        """The conditions as SQL terms (to be ANDed) and their parameters.  Every searchable field is an indexed
+        column, so SQLite answers them from an index."""
+        terms = []
+        params = []
+        for condition in conditions:
+            column = cls._column(condition.field.value)
+            if condition.equals is not None:
+                terms.append(f'{column} = ?')
+                params.append(condition.equals)
+            elif condition.one_of is not None:
+                if not condition.one_of:
+                    terms.append('0')  # IN () matches nothing
+                else:
+                    terms.append(f'{column} IN ({", ".join("?" * len(condition.one_of))})')
+                    params.extend(condition.one_of)
+            else:
+                for bound, operator in _RANGE_OPERATORS:
+                    if getattr(condition, bound) is not None:
+                        terms.append(f'{column} {operator} ?')
+                        params.append(getattr(condition, bound))
+        return terms, params
+
+    def __len__(self) -> int:
+        return self.connection.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
 
-    def __len__(self):
-        self.cursor.execute('SELECT COUNT(*) FROM scan_results')
-        count = self.cursor.fetchone()[0]
-        return count
+    @staticmethod
+    def _column(key: str) -> str:
+        # only known columns are ever interpolated into SQL
+        try:
+            return _COLUMNS[key]
+        except KeyError:
+            raise ValueError(f'Scan results cannot be searched by {key}, use one of: {", ".join(_COLUMNS)}')
 
-    def _row_to_model(self, row):
-        """Convert a database row to a ScanResultModel."""
-        dpa_verdict = json.loads(row[5]) if row[5] else None
+    @staticmethod
+    def _model_to_row(model: ScanResultModel) -> tuple:
+        verdict = model.dpa_verdict
+        return (model.id, model.scan_request_task_id, model.metadata_tag, model.status, model.connector_url,
+                model.timestamp,
+                verdict.verdict.value if verdict and verdict.verdict else None,
+                verdict.file_info.file_hash if verdict and verdict.file_info else None,
+                verdict.model_dump_json() if verdict else None)
 
+    @staticmethod
+    def _row_to_model(row: tuple) -> ScanResultModel:
         return ScanResultModel(
             id=row[0],
-            dpa_proxy_scan_id=row[1],
-            file_tag=row[2],
-            quarantined=bool(row[3]),
-            status=row[4],
-            dpa_verdict=json.loads(row[5]) if row[5] else None,
-            file_reputation=row[6]
+            scan_request_task_id=row[1],
+            metadata_tag=row[2],
+            status=row[3],
+            connector_url=row[4],
+            timestamp=row[5],
+            dpa_verdict=DPAVerdictModel2.model_validate_json(row[6]) if row[6] else None
         )
 
 
 # Example Usage
 if __name__ == "__main__":
-    if pathlib.Path('test1.db').exists():
-        pathlib.Path('test1.db').unlink()
-    if pathlib.Path('test2.db').exists():
-        pathlib.Path('test2.db').unlink()
-    if pathlib.Path('test3.db').exists():
-        pathlib.Path('test3.db').unlink()
+    for db_file in ['test1.db', 'test2.db', 'test3.db']:
+        for suffix in ['', '-wal', '-shm']:
+            pathlib.Path(db_file + suffix).unlink(missing_ok=True)
 
-    db = ScanResultsSQLiteDB('test1.db', collection_name='scan_results')
+    db = ScanResultsSQLiteDB('test1.db')
 
     # Insert sample records
-    db.insert(ScanResultModel(dpa_proxy_scan_id='A'))
-    db.insert(ScanResultModel(dpa_proxy_scan_id='B', quarantined=True))
+    db.insert(ScanResultModel(scan_request_task_id='A', metadata_tag='test-A', status=ScanResultStatusEnum.SCANNED))
+    db.insert(ScanResultModel(scan_request_task_id='B', metadata_tag='test-B', status=ScanResultStatusEnum.SCANNED))
 
     # Read all records
     print("All records:")
     print(db.read_all())
 
     # Find specific records
-    print("\nRecords matching 'dpa_proxy_scan_id=B':")
-    matching_records = db.find("dpa_proxy_scan_id", 'B')
-    print(matching_records)
+    print("\nRecords matching 'scan_request_task_id=B':")
+    print(db.find("scan_request_task_id", 'B'))
 
     # Delete record by id
     print("\nDeleting record with id=2:")
-    db.delete(2)
+    db.delete('id', 2)
     print(db.read_all())
 
-    testdb = ScanResultsSQLiteDB('test2.db', collection_name='scan_results', retain=5)
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='A'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='C'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='A'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='C'))
-
+    testdb = ScanResultsSQLiteDB('test2.db', retain=5)
+    testdb.insert_many([ScanResultModel(scan_request_task_id=task_id, status=ScanResultStatusEnum.SCANNED)
+                        for task_id in 'ABBBCABBBC'])
     print(f'length: {len(testdb)}')
-
     print("All records:")
     print(testdb.read_all())
 
     # don't retain anything
-    testdb = ScanResultsSQLiteDB('test3.db', collection_name='scan_results', retain=0)
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='A'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-    testdb.insert(ScanResultModel(dpa_proxy_scan_id='B'))
-
+    testdb = ScanResultsSQLiteDB('test3.db', retain=0)
+    testdb.insert(ScanResultModel(scan_request_task_id='A'))
+    testdb.insert(ScanResultModel(scan_request_task_id='B'))
     print(f'length: {len(testdb)}')
@@ -1,21 +1,24 @@
 import pathlib
-from typing import Optional, List
+from functools import reduce
+from typing import Iterator, List
 
 from tinydb import TinyDB, Query
-import json
 
 from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
+from dsx_connect.database.tinydb_storage import LockedJSONStorage
 from dsx_connect.utils.logging import dsx_logging
-from dsx_connect.models.scan_models import ScanResultModel, ScanResultStatusEnum
+from dsx_connect.models.scan_models import FieldCondition, ScanResultField, ScanResultModel, ScanResultStatusEnum
 
 
 class ScanResultsTinyDB(ScanResultsBaseDB):
-    def __init__(self, db_path: str, collection_name: str = 'scan_results', retain: int = -1):
-        super().__init__(retain)
+    def __init__(self, db_path: str, collection_name: str = 'scan_results', retain: int = -1,
+                 retain_seconds: float = -1, retention_sweep_interval: float = 60):
+        super().__init__(retain, retain_seconds, retention_sweep_interval)
         self.db_path = db_path
         pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = TinyDB(db_path)
-        self.collection = self.db.table(collection_name)
+        # the file is shared with other processes, so TinyDB's per-process query cache would go stale
+        self.db = TinyDB(db_path, storage=LockedJSONStorage)
+        self.collection = self.db.table(collection_name, cache_size=0)
 
     def __str__(self) -> str:
         return f'db: {self.db_path}   collection: {self.collection.name}'
@@ -25,46 +28,95 @@ class ScanResultsTinyDB(ScanResultsBaseDB):
             dsx_logging.debug('(Retention set to 0, storing nothing)')
             return -1  # Do nothing if retain is 0 (store nothing)
 
-        # Exclude the 'id' field when inserting, as TinyDB will assign a doc_id
-        doc_id = self.collection.insert(json.loads(model.json(exclude={"id"})))
-        model.id = doc_id  # Update the model with the assigned doc_id
-        self._check_retain_limit()  # Enforce retention limit
-        return doc_id
+        self.insert_many([model])
+        return model.id
+
+    def insert_many(self, models: list[ScanResultModel]) -> list[int]:
+        if self._retain == 0 or not models:
+            return [-1] * len(models)
+        with self.db.storage.exclusive():
+            # Other processes insert too, so the next doc_id TinyDB remembers from our last insert may be taken
+            self.collection._next_id = None
+            # Exclude the 'id' field when inserting, as TinyDB will assign a doc_id.  One file rewrite for the batch.
+            doc_ids = self.collection.insert_multiple(model.model_dump(mode="json", exclude={"id"})
+                                                      for model in models)
+        for model, doc_id in zip(models, doc_ids):
+            model.id = doc_id  # Update the model with the assigned doc_id
+        self._check_retain_limit(len(models))  # Enforce retention limit, every so many inserts
+        return doc_ids
 
     def delete(self, key: str, value: str) -> bool:
         scan = Query()
-        if key == 'id':
-            doc_id = int(value)
-            result = self.collection.remove(doc_ids=[doc_id])
-        else:
-            result = self.collection.remove(getattr(scan, key) == value)
+        with self.db.storage.exclusive():
+            if key == 'id':
+                doc_id = int(value)
+                result = self.collection.remove(doc_ids=[doc_id])
+            else:
+                result = self.collection.remove(getattr(scan, key) == value)
         return bool(result)
 
-    def delete_oldest(self) -> bool:
-        if len(self.collection) > 0:
-            oldest_record = self.collection.all()[0]
-            self.collection.remove(doc_ids=[oldest_record.doc_id])
-            return True
-        return False
+    def delete_many(self, ids: list[int]) -> int:
+        # one remove, so one rewrite of the file
+        with self.db.storage.exclusive():
+            stored = {doc.doc_id for doc in self.collection}
+            existing = [doc_id for doc_id in ids if doc_id in stored]
+            if existing:
+                self.collection.remove(doc_ids=existing)
+        return len(existing)
+
+    def delete_oldest(self, count: int = 1) -> int:
+        if count <= 0:
+            return 0
+        # every removal rewrites the whole file, so the oldest records all go in one remove
+        with self.db.storage.exclusive():
+            oldest = sorted(doc.doc_id for doc in self.collection)[:count]
+            if oldest:
+                self.collection.remove(doc_ids=oldest)
+        return len(oldest)
+
+    def delete_older_than(self, timestamp: float) -> int:
+        with self.db.storage.exclusive():
+            removed = self.collection.remove(Query().timestamp.test(lambda t: t is not None and t < timestamp))
+        return len(removed)
 
     def read_all(self) -> List[ScanResultModel]:
         return [ScanResultModel(id=item.doc_id, **item) for item in self.collection.all()]
 
-    def find(self, key: str, value: str) -> Optional[List[ScanResultModel]]:
-        # Handle search by 'id' (TinyDB doc_id)
-        if key == 'id':
-            result = self.collection.get(doc_id=int(value))
-            results = [result] if result else []
+    def iter_where(self, conditions: list[FieldCondition], descending: bool = False) -> Iterator[ScanResultModel]:
+        # TinyDB has no secondary indexes: ids are looked up directly (they're doc_ids), anything else is a scan of
+        # the documents, but models are only built for the records that match and are consumed.
+        id_conditions = [condition for condition in conditions if condition.field == ScanResultField.ID]
+        field_conditions = [self._condition(condition) for condition in conditions
+                            if condition.field != ScanResultField.ID]
+        doc_ids = None
+        for condition in id_conditions:
+            if condition.equals is not None or condition.one_of is not None:
+                ids = {condition.equals} if condition.equals is not None else set(condition.one_of)
+                doc_ids = ids if doc_ids is None else doc_ids & ids
+
+        if doc_ids is not None:
+            documents = [doc for doc in (self.collection.get(doc_id=doc_id) for doc_id in doc_ids)
+                         if doc is not None and all(condition(doc) for condition in field_conditions)]
+        elif field_conditions:
+            documents = self.collection.search(reduce(lambda a, b: a & b, field_conditions))
         else:
-            scan = Query()
-            # Determine the type of the key in the database
-            sample_item = self.collection.all()[0] if self.collection else None
-            if sample_item:
-                db_value_type = type(sample_item.get(key))
-                value = db_value_type(value)
-            results = self.collection.search(getattr(scan, key) == value)
-
-        return [ScanResultModel(id=result.doc_id, **result) for result in results]
+            documents = self.collection.all()
+
+        documents = [doc for doc in documents if all(condition.matches_value(doc.doc_id)
+                                                     for condition in id_conditions)]
+        documents.sort(key=lambda doc: doc.doc_id, reverse=descending)
+        for doc in documents:
+            yield ScanResultModel(id=doc.doc_id, **doc)
+
+    @staticmethod
+    def _condition(condition: FieldCondition):
+        field = reduce(getattr, condition.field.value.split('.'), Query())
+        if condition.equals is not None:
+            return field == condition.equals
+        if condition.one_of is not None:
+            return field.one_of(condition.one_of)
+        # results stored without a value (a timestamp, say) never match a range (and must not be compared with one)
+        return field.test(lambda value: condition.matches_value(value))
 
     def __len__(self) -> int:
         return len(self.collection)  # Use TinyDB's len() for efficient counting
@@ -1,5 +1,55 @@
 from abc import ABC, abstractmethod
+
+from dsx_connect.database.async_db import AsyncScanStatsDB
 from dsx_connect.models.scan_models import ScanStatsModel
+from dsx_connect.utils.quantile_sketch import QuantileSketch
+
+_PERCENTILES = (('50', 0.5), ('90', 0.9), ('99', 0.99), ('999', 0.999))
+
+
+def with_averages(stats: ScanStatsModel) -> ScanStatsModel:
+    """Fill in stats' averages (and the totals in other units) from its totals."""
+    stats.total_scan_time_in_seconds = stats.total_scan_time_in_microseconds / 1000000
+    if stats.files_scanned > 0:
+        stats.avg_file_size = int(stats.total_file_size / stats.files_scanned)
+        stats.avg_scan_time_in_microseconds = int(stats.total_scan_time_in_microseconds / stats.files_scanned)
+        stats.avg_scan_time_in_milliseconds = stats.avg_scan_time_in_microseconds / 1000
+        stats.avg_scan_time_in_seconds = stats.avg_scan_time_in_milliseconds / 1000
+    return stats
+
+
+def with_percentiles(stats: ScanStatsModel) -> ScanStatsModel:
+    """Fill in stats' percentiles (and medians) from its quantile sketches."""
+    for sketch, field_format in ((stats.scan_time_sketch, 'p{}_scan_time_in_microseconds'),
+                                 (stats.file_size_sketch, 'p{}_file_size_in_bytes')):
+        if sketch:
+            sketch = QuantileSketch.from_dict(sketch)
+            for percentile, fraction in _PERCENTILES:
+                setattr(stats, field_format.format(percentile), sketch.quantile(fraction))
+    stats.median_scan_time_in_microseconds = stats.p50_scan_time_in_microseconds
+    stats.median_file_size_in_bytes = stats.p50_file_size_in_bytes
+    return stats
+
+
+def merge_scan_stats(total: ScanStatsModel, delta: ScanStatsModel) -> ScanStatsModel:
+    """Add the stats of a batch of results (delta) to total, in place."""
+    # totals start out at -1, meaning none yet
+    total.files_scanned += delta.files_scanned
+    total.total_scan_time_in_microseconds = (max(total.total_scan_time_in_microseconds, 0) +
+                                             max(delta.total_scan_time_in_microseconds, 0))
+    total.total_file_size = max(total.total_file_size, 0) + max(delta.total_file_size, 0)
+    if delta.longest_scan_time_in_microseconds > total.longest_scan_time_in_microseconds:
+        total.longest_scan_time_in_microseconds = delta.longest_scan_time_in_microseconds
+        total.longest_scan_time_in_milliseconds = delta.longest_scan_time_in_milliseconds
+        total.longest_scan_time_in_seconds = delta.longest_scan_time_in_seconds
+        total.longest_scan_time_file = delta.longest_scan_time_file
+        total.longest_scan_time_file_size_in_bytes = delta.longest_scan_time_file_size_in_bytes
+    for field in ('scan_time_sketch', 'file_size_sketch'):
+        if getattr(delta, field):
+            sketch = QuantileSketch.from_dict(getattr(total, field))
+            sketch.merge(QuantileSketch.from_dict(getattr(delta, field)))
+            setattr(total, field, sketch.to_dict())
+    return with_percentiles(with_averages(total))
 
 
 class ScanStatsBaseDB(ABC):
@@ -14,3 +64,14 @@ class ScanStatsBaseDB(ABC):
     @abstractmethod
     def get(self) -> ScanStatsModel:
         pass
+
+    def merge(self, delta: ScanStatsModel):
+        """
+        Add the stats of a batch of results to the stored stats.  This default reads, merges and writes back;
+        backends shared between processes override it to do so under a lock, or with atomic increments.
+        """
+        self.upsert(merge_scan_stats(self.get(), delta))
+
+    def asynchronous(self, threads: int = 8) -> AsyncScanStatsDB:
+        """This database's async interface, for use from the event loop."""
+        return AsyncScanStatsDB(self, threads)
@@ -1,4 +1,3 @@
-import json
 from dsx_connect.models.scan_models import ScanStatsModel
 from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB
 
@@ -9,7 +8,7 @@ class ScanStatsCollection(ScanStatsBaseDB):
         self._record = None  # Only one stats record now
 
     def upsert(self, stats: ScanStatsModel):
-        stats_dict = json.loads(stats.json())
+        stats_dict = stats.model_dump(mode="json")
         if self._record:
             self._record.update(stats_dict)
         else:
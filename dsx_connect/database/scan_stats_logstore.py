@@ -0,0 +1,36 @@
+from dsx_connect.database.log_store import AppendOnlyLog
+from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB
+from dsx_connect.models.scan_models import ScanStatsModel
+
+_STATS_ID = 1
+
+
+class ScanStatsLogStore(ScanStatsBaseDB):
+    """
+    Scan stats in an append-only log file.  Each upsert appends the new stats, superseded ones are reclaimed when
+    the log is compacted.
+    """
+
+    def __init__(self, db_path: str, collection_name: str = 'scan_stats'):
+        super().__init__()
+        self.db_path = db_path
+        self.log = AppendOnlyLog(db_path)
+
+        with self.log.exclusive():
+            if self.log.get(_STATS_ID) is None:
+                self.upsert(ScanStatsModel())
+
+    def upsert(self, stats: ScanStatsModel):
+        self.log.put(_STATS_ID, stats.model_dump(mode="json"))
+
+    def merge(self, delta: ScanStatsModel):
+        # under the log's lock, so workers' updates don't overwrite each other
+        with self.log.exclusive():
+            super().merge(delta)
+
+    def get(self) -> ScanStatsModel:
+        record = self.log.get(_STATS_ID)
+        return ScanStatsModel(**record) if record else ScanStatsModel()
+
+    def __len__(self):
+        return len(self.log)
@@ -0,0 +1,126 @@
+import orjson
+import redis
+import redis.asyncio
+
+from dsx_connect.database.async_db import AsyncScanStatsDB
+from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB, with_averages, with_percentiles
+from dsx_connect.models.scan_models import ScanStatsModel
+
+# fields that are added to by each batch, with HINCRBY, so concurrent workers' updates never overwrite each other
+_COUNTERS = ('files_scanned', 'total_scan_time_in_microseconds', 'total_file_size')
+_SKETCHES = ('scan_time_sketch', 'file_size_sketch')
+
+
+class ScanStatsRedisDB(ScanStatsBaseDB):
+    """
+    Scan stats in Redis, updated atomically by any number of workers on any number of nodes.
+
+    The totals are fields of a hash (dsxconnect:<collection>), incremented in place; averages are worked out from
+    them when read.  Likewise each quantile sketch is a hash (dsxconnect:<collection>:<sketch>) of its bin counts,
+    and percentiles are read from it.  The longest scan is the top member of a sorted set scored by scan time,
+    trimmed to that one member as each batch is added.
+    """
+
+    def __init__(self, redis_url: str, collection_name: str = 'scan_stats'):
+        super().__init__()
+        self.redis_url = redis_url
+        self.redis = redis.Redis.from_url(redis_url)
+        self.key = f'dsxconnect:{collection_name}'
+        self._longest_key = f'{self.key}:longest'
+        self._sketch_keys = {sketch: f'{self.key}:{sketch}' for sketch in _SKETCHES}
+
+    def __str__(self) -> str:
+        return f'redis: {self.redis_url}   key: {self.key}'
+
+    def upsert(self, stats: ScanStatsModel):
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self.key, mapping={field: max(getattr(stats, field), 0) for field in _COUNTERS})
+        pipeline.delete(self._longest_key, *self._sketch_keys.values())
+        for sketch, key in self._sketch_keys.items():
+            counts = self._sketch_counts(getattr(stats, sketch))
+            if counts:
+                pipeline.hset(key, mapping=counts)
+        if stats.longest_scan_time_in_microseconds >= 0:
+            pipeline.zadd(self._longest_key, {self._longest_member(stats): stats.longest_scan_time_in_microseconds})
+        pipeline.execute()
+
+    def merge(self, delta: ScanStatsModel):
+        pipeline = self.redis.pipeline(transaction=True)
+        for field in _COUNTERS:
+            if getattr(delta, field) > 0:
+                pipeline.hincrby(self.key, field, getattr(delta, field))
+        for sketch, key in self._sketch_keys.items():
+            for field, count in self._sketch_counts(getattr(delta, sketch)).items():
+                pipeline.hincrby(key, field, count)
+        if delta.longest_scan_time_in_microseconds >= 0:
+            # gt: a file scanned again, faster, keeps its longer time
+            pipeline.zadd(self._longest_key, {self._longest_member(delta): delta.longest_scan_time_in_microseconds},
+                          gt=True)
+            pipeline.zremrangebyrank(self._longest_key, 0, -2)
+        pipeline.execute()
+
+    @staticmethod
+    def _longest_member(stats: ScanStatsModel) -> bytes:
+        return orjson.dumps([stats.longest_scan_time_file, stats.longest_scan_time_file_size_in_bytes])
+
+    @staticmethod
+    def _sketch_counts(sketch: dict | None) -> dict[str, int]:
+        """A sketch's counts as hash fields: 'zeros', and each bin's number."""
+        if not sketch:
+            return {}
+        counts = {str(value_bin): count for value_bin, count in sketch['bins'].items()}
+        if sketch['zeros']:
+            counts['zeros'] = sketch['zeros']
+        return counts
+
+    def _queue_get(self, pipeline):
+        pipeline.hgetall(self.key)
+        pipeline.zrange(self._longest_key, -1, -1, withscores=True)
+        for key in self._sketch_keys.values():
+            pipeline.hgetall(key)
+
+    def get(self) -> ScanStatsModel:
+        pipeline = self.redis.pipeline(transaction=True)
+        self._queue_get(pipeline)
+        return self._stats(*pipeline.execute())
+
+    @staticmethod
+    def _stats(fields: dict, longest: list, *sketches: dict) -> ScanStatsModel:
+        if not fields:
+            return ScanStatsModel()
+
+        stats = ScanStatsModel(**{field.decode(): int(value) for field, value in fields.items()
+                                  if field.decode() in _COUNTERS})
+        for sketch, counts in zip(_SKETCHES, sketches):
+            if counts:
+                counts = {field.decode(): int(count) for field, count in counts.items()}
+                setattr(stats, sketch, {'zeros': counts.pop('zeros', 0), 'bins': counts})
+        if longest:
+            member, microseconds = longest[0]
+            stats.longest_scan_time_file, stats.longest_scan_time_file_size_in_bytes = orjson.loads(member)
+            stats.longest_scan_time_in_microseconds = int(microseconds)
+            stats.longest_scan_time_in_milliseconds = stats.longest_scan_time_in_microseconds / 1000
+            stats.longest_scan_time_in_seconds = stats.longest_scan_time_in_milliseconds / 1000
+        return with_percentiles(with_averages(stats))
+
+    def __len__(self):
+        return 1 if self.redis.exists(self.key) else 0
+
+    def asynchronous(self, threads: int = 8) -> 'AsyncScanStatsRedisDB':
+        return AsyncScanStatsRedisDB(self, threads)
+
+
+class AsyncScanStatsRedisDB(AsyncScanStatsDB):
+    """Reads scan stats with redis-py's asyncio client."""
+
+    def __init__(self, db: ScanStatsRedisDB, threads: int = 8):
+        super().__init__(db, threads)
+        self._redis = None
+
+    async def get(self) -> ScanStatsModel:
+        if self._redis is None:
+            # created on first use, as its connections belong to the running event loop
+            self._redis = redis.asyncio.Redis.from_url(self.db.redis_url)
+        async with self._redis.pipeline(transaction=True) as pipeline:
+            self.db._queue_get(pipeline)
+            return self.db._stats(*await pipeline.execute())
@@ -0,0 +1,225 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import orjson
+
+from dsx_connect.models.scan_models import ScanResultModel, ScanStatsBucketModel, ScanStatsResolution
+from dsx_connect.utils.logging import dsx_logging
+from dsx_connect.utils.quantile_sketch import QuantileSketch
+
+# how often (seconds) buckets past their retention are deleted
+_PRUNE_INTERVAL = 60
+
+
+class _Bucket:
+    """The running totals of one bucket, while merging."""
+
+    def __init__(self):
+        self.files_scanned = 0
+        self.total_file_size = 0
+        self.total_scan_time = 0
+        self.longest_scan_time = 0
+        self.verdicts: dict[str, int] = defaultdict(int)
+        self.histogram = QuantileSketch()
+
+    @classmethod
+    def from_row(cls, row: tuple) -> '_Bucket':
+        bucket = cls()
+        (bucket.files_scanned, bucket.total_file_size, bucket.total_scan_time, bucket.longest_scan_time,
+         verdicts, histogram) = row
+        bucket.verdicts.update(orjson.loads(verdicts))
+        bucket.histogram = QuantileSketch.from_dict({'bins': orjson.loads(histogram)})
+        return bucket
+
+    def to_row(self) -> tuple:
+        return (self.files_scanned, self.total_file_size, self.total_scan_time, self.longest_scan_time,
+                orjson.dumps(self.verdicts).decode(),
+                orjson.dumps(self.histogram.bins, option=orjson.OPT_NON_STR_KEYS).decode())
+
+    def add(self, scan_result: ScanResultModel):
+        verdict = scan_result.dpa_verdict
+        self.files_scanned += 1
+        self.total_file_size += verdict.file_info.file_size_in_bytes if verdict.file_info else 0
+        self.total_scan_time += verdict.scan_duration_in_microseconds
+        self.longest_scan_time = max(self.longest_scan_time, verdict.scan_duration_in_microseconds)
+        if verdict.verdict is not None:
+            self.verdicts[verdict.verdict.value] += 1
+        # (the stored histogram has no bin for zero, so a 0us scan counts as 1us)
+        self.histogram.add(max(verdict.scan_duration_in_microseconds, 1))
+
+    def merge(self, other: '_Bucket'):
+        self.files_scanned += other.files_scanned
+        self.total_file_size += other.total_file_size
+        self.total_scan_time += other.total_scan_time
+        self.longest_scan_time = max(self.longest_scan_time, other.longest_scan_time)
+        for verdict, count in other.verdicts.items():
+            self.verdicts[verdict] += count
+        self.histogram.merge(other.histogram)
+
+    def to_model(self, resolution: ScanStatsResolution, start: int, connector_url: str | None) -> ScanStatsBucketModel:
+        count = self.files_scanned
+        return ScanStatsBucketModel(
+            resolution=resolution, start=start, connector_url=connector_url, files_scanned=count,
+            total_file_size=self.total_file_size, total_scan_time_in_microseconds=self.total_scan_time,
+            avg_scan_time_in_microseconds=self.total_scan_time // count if count else -1,
+            p50_scan_time_in_microseconds=self.histogram.quantile(0.5),
+            p90_scan_time_in_microseconds=self.histogram.quantile(0.9),
+            p99_scan_time_in_microseconds=self.histogram.quantile(0.99),
+            p999_scan_time_in_microseconds=self.histogram.quantile(0.999),
+            longest_scan_time_in_microseconds=self.longest_scan_time,
+            verdicts=dict(self.verdicts))
+
+
+class ScanStatsRollups:
+    """
+    Scan throughput and latency rolled up into per-minute, per-hour and per-day buckets for each connector, in a
+    SQLite database shared by the worker processes (which record scanned results) and the API (which reads them).
+
+    A bucket holds the files scanned, bytes, verdict counts and scan times of the results stored within it; scan
+    times are kept as a log-binned histogram (a QuantileSketch), so buckets can be merged (across connectors, say)
+    and their percentiles still read back.  Each resolution keeps a bounded number of buckets, older ones are
+    deleted.
+    """
+
+    def __init__(self, db_path: str, retain_buckets: dict[ScanStatsResolution, int] | None = None,
+                 busy_timeout: float = 30.0):
+        """
+        Args:
+            db_path: the SQLite database file, created if it doesn't exist.
+            retain_buckets: how many buckets of each resolution to keep, -1 to keep them all.  By default a day
+                of minutes, 30 days of hours and a year of days.
+        """
+        self.db_path = db_path
+        self._retain_buckets = {ScanStatsResolution.MINUTE: 24 * 60, ScanStatsResolution.HOUR: 30 * 24,
+                                ScanStatsResolution.DAY: 365}
+        self._retain_buckets.update(retain_buckets or {})
+        self._busy_timeout = busy_timeout
+        self._last_prune = 0.0
+        pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS scan_stats_rollups (
+                resolution TEXT NOT NULL,
+                start INTEGER NOT NULL,  -- epoch seconds at which the bucket begins
+                connector_url TEXT NOT NULL,
+                files_scanned INTEGER NOT NULL,
+                total_file_size INTEGER NOT NULL,
+                total_scan_time INTEGER NOT NULL,
+                longest_scan_time INTEGER NOT NULL,
+                verdicts TEXT NOT NULL,  -- verdict -> count, as JSON
+                histogram TEXT NOT NULL,  -- scan time bin -> count, as JSON
+                PRIMARY KEY (resolution, start, connector_url)
+            ) WITHOUT ROWID
+        ''')
+
+    def __str__(self) -> str:
+        return f'db: {self.db_path}'
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use (and afresh in a forked child)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=self._busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def record(self, scan_results: list[ScanResultModel]):
+        """Add scanned results to the buckets of every resolution they fall in, in one transaction."""
+        now = time.time()
+        changes: dict[tuple[str, int, str], _Bucket] = defaultdict(_Bucket)
+        for scan_result in scan_results:
+            if scan_result.dpa_verdict is None:
+                continue
+            timestamp = scan_result.timestamp if scan_result.timestamp is not None else now
+            for resolution in ScanStatsResolution:
+                changes[resolution.value, resolution.bucket_start(timestamp), scan_result.connector_url or ''] \
+                    .add(scan_result)
+        if not changes:
+            return
+
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = []
+            for key, change in changes.items():
+                row = connection.execute(
+                    'SELECT files_scanned, total_file_size, total_scan_time, longest_scan_time, verdicts, histogram '
+                    'FROM scan_stats_rollups WHERE resolution = ? AND start = ? AND connector_url = ?', key).fetchone()
+                if row is not None:
+                    change.merge(_Bucket.from_row(row))
+                rows.append(key + change.to_row())
+            connection.executemany('INSERT OR REPLACE INTO scan_stats_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        if now - self._last_prune >= _PRUNE_INTERVAL:
+            self.prune(now)
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete the buckets beyond each resolution's retention, returning how many were deleted."""
+        now = time.time() if now is None else now
+        self._last_prune = now
+        deleted = 0
+        for resolution, retain in self._retain_buckets.items():
+            if retain < 0:
+                continue
+            oldest_retained = resolution.bucket_start(now) - (retain - 1) * resolution.seconds
+            deleted += self.connection.execute('DELETE FROM scan_stats_rollups WHERE resolution = ? AND start < ?',
+                                               (resolution.value, oldest_retained)).rowcount
+        if deleted:
+            dsx_logging.debug(f'Deleted {deleted} expired scan stats buckets from {self}')
+        return deleted
+
+    def buckets(self, resolution: ScanStatsResolution, start_time: float | None = None,
+                end_time: float | None = None, connector_url: str | None = None,
+                by_connector: bool = False) -> list[ScanStatsBucketModel]:
+        """
+        The buckets of a resolution beginning within [start_time, end_time), oldest first.  Only those of
+        connector_url if given; otherwise each connector's buckets if by_connector, else all connectors' merged.
+        """
+        conditions = ['resolution = ?']
+        params: list = [resolution.value]
+        if start_time is not None:
+            conditions.append('start >= ?')
+            params.append(resolution.bucket_start(start_time))
+        if end_time is not None:
+            conditions.append('start < ?')
+            params.append(end_time)
+        if connector_url is not None:
+            conditions.append('connector_url = ?')
+            params.append(connector_url)
+        rows = self.connection.execute(
+            'SELECT start, connector_url, files_scanned, total_file_size, total_scan_time, longest_scan_time, '
+            f'verdicts, histogram FROM scan_stats_rollups WHERE {" AND ".join(conditions)} '
+            'ORDER BY start, connector_url', params).fetchall()
+
+        merged: dict[tuple[int, str | None], _Bucket] = {}
+        for row in rows:
+            key = (row[0], (row[1] or None) if connector_url is not None or by_connector else None)
+            bucket = _Bucket.from_row(row[2:])
+            if key in merged:
+                merged[key].merge(bucket)
+            else:
+                merged[key] = bucket
+        return [bucket.to_model(resolution, start, bucket_connector)
+                for (start, bucket_connector), bucket in merged.items()]
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -1,8 +1,8 @@
 import pathlib
-import json
 from tinydb import TinyDB
 from dsx_connect.models.scan_models import ScanStatsModel
 from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB
+from dsx_connect.database.tinydb_storage import LockedJSONStorage
 
 
 class ScanStatsTinyDB(ScanStatsBaseDB):
@@ -10,19 +10,26 @@ class ScanStatsTinyDB(ScanStatsBaseDB):
         super().__init__()
         self.db_path = db_path
         pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.db = TinyDB(db_path)
-        self.collection = self.db.table(collection_name)
+        self.db = TinyDB(db_path, storage=LockedJSONStorage)
+        self.collection = self.db.table(collection_name, cache_size=0)
 
-        if not self.collection:
-            self.upsert(ScanStatsModel())
+        with self.db.storage.exclusive():
+            if not self.collection:
+                self.upsert(ScanStatsModel())
 
     def upsert(self, stats: ScanStatsModel):
-        stats_dict = json.loads(stats.json())
-        if self.collection:
-            doc_id = self.collection.all()[0].doc_id
-            self.collection.update(stats_dict, doc_ids=[doc_id])
-        else:
-            self.collection.insert(stats_dict)
+        stats_dict = stats.model_dump(mode="json")
+        with self.db.storage.exclusive():
+            if self.collection:
+                doc_id = self.collection.all()[0].doc_id
+                self.collection.update(stats_dict, doc_ids=[doc_id])
+            else:
+                self.collection.insert(stats_dict)
+
+    def merge(self, delta: ScanStatsModel):
+        # under the file lock, so workers' updates don't overwrite each other
+        with self.db.storage.exclusive():
+            super().merge(delta)
 
     def get(self) -> ScanStatsModel:
         result = self.collection.all()
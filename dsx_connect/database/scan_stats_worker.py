@@ -1,48 +1,37 @@
 from dsx_connect.database.scan_stats_base_db import ScanStatsBaseDB
+from dsx_connect.database.scan_stats_rollups import ScanStatsRollups
 from dsx_connect.models.scan_models import ScanResultModel, ScanStatsModel
-
-import heapq
-
-
-class MedianTracker:
-    def __init__(self):
-        self.min_heap = []  # Min-heap for the larger half
-        self.max_heap = []  # Max-heap for the smaller half
-
-    def add_value(self, value: int):
-        # Add value to max-heap (negative for max-heap behavior with heapq)
-        if not self.max_heap or value <= -self.max_heap[0]:
-            heapq.heappush(self.max_heap, -value)
-        else:
-            heapq.heappush(self.min_heap, value)
-
-        # Balance the heaps
-        if len(self.max_heap) > len(self.min_heap) + 1:
-            heapq.heappush(self.min_heap, -heapq.heappop(self.max_heap))
-        elif len(self.min_heap) > len(self.max_heap):
-            heapq.heappush(self.max_heap, -heapq.heappop(self.min_heap))
-
-    def get_median(self) -> int:
-        if len(self.max_heap) > len(self.min_heap):
-            return -self.max_heap[0]
-        else:
-            return int((-self.max_heap[0] + self.min_heap[0]) / 2)
+from dsx_connect.utils.quantile_sketch import QuantileSketch
 
 
 class ScanStatsWorker:
-    def __init__(self, scan_stats_db: ScanStatsBaseDB = None):
+    def __init__(self, scan_stats_db: ScanStatsBaseDB = None, rollups: ScanStatsRollups | None = None):
         self._scan_stats_db = scan_stats_db
-        self.scan_time_median_tracker = MedianTracker()
-        self.file_size_median_tracker = MedianTracker()
+        self._rollups = rollups  # time-bucketed stats, alongside the all-time ones
 
     def insert(self, scan_result: ScanResultModel):
-        self._update_stats(scan_result)
-
-    def _update_stats(self, scan_result: ScanResultModel):
-        # Update and persist global stats
-        total_stats = self._scan_stats_db.get()
-        self._calculate_stats(total_stats, scan_result)
-        self._scan_stats_db.upsert(total_stats)
+        self.insert_many([scan_result])
+
+    def insert_many(self, scan_results: list[ScanResultModel]):
+        """Fold a batch of results into the stats, with a single merge into the stored stats."""
+        if scan_results:
+            self._update_stats(scan_results)
+            if self._rollups is not None:
+                self._rollups.record(scan_results)
+
+    def _update_stats(self, scan_results: list[ScanResultModel]):
+        # Compute the batch's stats, then merge them into the global stats (atomically, where the database can)
+        batch_stats = ScanStatsModel(total_scan_time_in_microseconds=0, total_file_size=0)
+        # the batch's scan times and file sizes are sketched, and merged into the stored sketches, so the
+        # percentiles are those of every worker's results
+        scan_times, file_sizes = QuantileSketch(), QuantileSketch()
+        for scan_result in scan_results:
+            self._calculate_stats(batch_stats, scan_result)
+            scan_times.add(scan_result.dpa_verdict.scan_duration_in_microseconds)
+            file_sizes.add(scan_result.dpa_verdict.file_info.file_size_in_bytes)
+        batch_stats.scan_time_sketch = scan_times.to_dict()
+        batch_stats.file_size_sketch = file_sizes.to_dict()
+        self._scan_stats_db.merge(batch_stats)
 
     def _calculate_stats(self, stats: ScanStatsModel, scan_result: ScanResultModel):
         # Update cumulative stats
@@ -65,12 +54,5 @@ class ScanStatsWorker:
             stats.longest_scan_time_file = scan_result.metadata_tag
             stats.longest_scan_time_file_size_in_bytes = scan_result.dpa_verdict.file_info.file_size_in_bytes
 
-        # Add scan time to the median tracker and update the median
-        self.scan_time_median_tracker.add_value(scan_result.dpa_verdict.scan_duration_in_microseconds)
-        stats.median_scan_time_in_microseconds = self.scan_time_median_tracker.get_median()
-
-        self.file_size_median_tracker.add_value(scan_result.dpa_verdict.file_info.file_size_in_bytes)
-        stats.median_file_size_in_bytes = self.file_size_median_tracker.get_median()
-
     def get_scan_stats(self) -> ScanStatsModel:
         return self._scan_stats_db.get()
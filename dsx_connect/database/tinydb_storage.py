@@ -0,0 +1,104 @@
+"""
+A TinyDB storage that is safe to share between processes: the API server's worker processes read the same results
+and stats files the Celery workers write.
+
+- Reads and writes are serialized across processes with flock on a sidecar lock file (<path>.lock): shared for
+  reads, exclusive for writes.  Where flock isn't available (Windows) only threads within a process are serialized.
+- Writes go to a temporary file which then replaces the database file, so a reader always sees a complete,
+  consistent snapshot, never a partially written file.
+- Parsed contents are cached, keyed on the file's inode, size and mtime, so a reader only re-reads and re-parses
+  the file when another process has actually changed it.
+
+A read-modify-write (e.g. TinyDB's insert, which reads the table, assigns the next id and writes it back) must
+hold the lock across both halves: wrap it in exclusive().
+"""
+import contextlib
+import os
+import pathlib
+import tempfile
+import threading
+
+import orjson
+from tinydb.storages import Storage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LockedJSONStorage(Storage):
+    def __init__(self, path: str, **kwargs):
+        super().__init__()
+        self._path = pathlib.Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(f"{path}.lock", "a+b")
+        self._thread_lock = threading.RLock()
+        self._exclusive_depth = 0
+        self._cache = None
+        self._cache_key = None
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Hold the exclusive lock, e.g. across a read-modify-write.  Reentrant within a thread."""
+        with self._thread_lock:
+            if self._exclusive_depth == 0 and fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._exclusive_depth += 1
+            try:
+                yield
+            except BaseException:
+                # the cached tables may have been modified in place by an update that didn't get written
+                self._cache = self._cache_key = None
+                raise
+            finally:
+                self._exclusive_depth -= 1
+                if self._exclusive_depth == 0 and fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def _shared(self):
+        with self._thread_lock:
+            if self._exclusive_depth:
+                yield
+                return
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _stat_key(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def read(self) -> dict | None:
+        with self._shared():
+            key = self._stat_key()
+            if key is None or key[1] == 0:
+                return None
+            if key != self._cache_key:
+                self._cache = orjson.loads(self._path.read_bytes())
+                self._cache_key = key
+            return self._cache
+
+    def write(self, data: dict):
+        with self.exclusive():
+            fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, prefix=f".{self._path.name}.")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(orjson.dumps(data))
+                os.replace(tmp_path, self._path)
+            except BaseException:
+                pathlib.Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._cache = data
+            self._cache_key = self._stat_key()
+
+    def close(self):
+        self._lock_file.close()
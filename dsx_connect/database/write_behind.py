@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+from dsx_connect.utils.logging import dsx_logging
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """
+    Collects items and hands them to flush in batches: as soon as max_batch_size items are buffered, or once the
+    oldest buffered item has waited flush_interval seconds.
+
+    Size-triggered flushes run in the thread that added the last item, so a producer that outpaces the store is
+    slowed down to its pace; interval-triggered flushes run in a background thread.  Items are only written when
+    flushed: call close() (e.g. on process shutdown) to flush what is still buffered.  A max_batch_size of 1 writes
+    every item before add() returns.
+
+    flush is called with one batch at a time, in the order items were added, and is expected to handle (and
+    report) its own failures; an exception it raises is logged and the batch dropped.
+    """
+
+    def __init__(self, flush: Callable[[list[T]], None], max_batch_size: int = 100, flush_interval: float = 0.5,
+                 name: str = "write-behind"):
+        self._flush = flush
+        self._max_batch_size = max(1, max_batch_size)
+        self._flush_interval = flush_interval
+        self._name = name
+        self._items: list[T] = []
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+        # held while a batch is being written, so batches are written one at a time and in order
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if self._max_batch_size > 1:
+            self._flusher = threading.Thread(target=self._run, name=name, daemon=True)
+            self._flusher.start()
+
+    def add(self, item: T):
+        with self._lock:
+            self._items.append(item)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._items) >= self._max_batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered now."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._items, self._oldest = self._items, [], None
+            if not batch:
+                return
+            try:
+                self._flush(batch)
+            except Exception as e:
+                dsx_logging.error(f"{self._name}: failed to write a batch of {len(batch)}: {e}", exc_info=True)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def close(self):
+        """Stop the background flusher and write whatever is still buffered."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _run(self):
+        while not self._closed.wait(min(self._flush_interval, 0.1)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self._flush_interval
+            if due:
+                self.flush()
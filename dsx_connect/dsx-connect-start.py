@@ -25,9 +25,15 @@ A helper script to run the DSX-Connect FastAPI app (dsx_connect.app.dsx_connect_
 serving an API for scanning file paths and rendering verdicts.
 
 The app provides a Swagger/Redoc UI at http://<host>:<port>/docs or can be accessed via any REST API client (e.g., Postman, cURL).
+
+By default a single process is run with auto-reload, for development.  With --production the app is served by
+DSXCONNECT_SERVER__WORKERS processes (see ServerConfig for keep-alive, backlog and concurrency settings):
+    - if gunicorn is installed, by gunicorn with uvicorn workers and the app preloaded, so imports happen once in
+      the master and are shared copy-on-write by the forked workers, and crashed workers are replaced
+    - otherwise by uvicorn's own process manager, where each worker imports the app itself
 """
 
-import os
+import argparse
 import sys
 import pathlib
 import uvicorn
@@ -36,11 +42,68 @@ import uvicorn
 dist_root = pathlib.Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(dist_root))
 
-if __name__ == "__main__":
+APP = "dsx_connect.app.dsx_connect_app:app"
+
+
+def run_gunicorn(server_config) -> bool:
+    try:
+        from gunicorn.app.base import BaseApplication
+        from uvicorn.workers import UvicornWorker
+    except ImportError:
+        return False
+
+    class DSXConnectWorker(UvicornWorker):
+        # gunicorn has no setting that maps to uvicorn's limit_concurrency
+        CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "limit_concurrency": server_config.limit_concurrency or None}
+
+    class DSXConnectApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{server_config.host}:{server_config.port}")
+            self.cfg.set("workers", server_config.workers)
+            self.cfg.set("worker_class", DSXConnectWorker)
+            self.cfg.set("keepalive", server_config.keepalive_timeout)
+            self.cfg.set("backlog", server_config.backlog)
+            self.cfg.set("graceful_timeout", server_config.graceful_timeout)
+            self.cfg.set("preload_app", True)
+
+        def load(self):
+            from dsx_connect.app.dsx_connect_app import app
+            return app
+
+    DSXConnectApplication().run()
+    return True
+
+
+def run_uvicorn(server_config):
     uvicorn.run(
-        "dsx_connect.app.dsx_connect_app:app",
-        host="0.0.0.0",
-        port=8586,
-        reload=True,  # Set to False in production with multiple workers
-        workers=1
-    )
\ No newline at end of file
+        APP,
+        host=server_config.host,
+        port=server_config.port,
+        workers=server_config.workers,
+        timeout_keep_alive=server_config.keepalive_timeout,
+        backlog=server_config.backlog,
+        limit_concurrency=server_config.limit_concurrency or None,
+        timeout_graceful_shutdown=server_config.graceful_timeout
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the dsx-connect API")
+    parser.add_argument("--production", action="store_true",
+                        help="run multiple worker processes, without auto-reload")
+    args = parser.parse_args()
+
+    from dsx_connect.config import ConfigManager
+    server_config = ConfigManager.get_config().server
+
+    if args.production:
+        if not run_gunicorn(server_config):
+            run_uvicorn(server_config)
+    else:
+        uvicorn.run(
+            APP,
+            host=server_config.host,
+            port=server_config.port,
+            reload=True,  # development only, use --production for multiple workers
+            workers=1
+        )
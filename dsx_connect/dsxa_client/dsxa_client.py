@@ -1,9 +1,14 @@
+import concurrent.futures
 import io
+import itertools
+import threading
 import logging
 import asyncio
+import time
 from typing import List
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_log
+from dsx_connect.dsxa_client.hedging import DSXAHedgeMetrics, HedgePolicy, ScanLatencyTracker
 from dsx_connect.dsxa_client.verdict_models import DPAVerdictModel2
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
 from dsx_connect.utils.logging import dsx_logging
@@ -21,19 +26,56 @@ class DSXAScanRequest:
 class DSXAClient:
     def __init__(self, scan_binary_url: str,
                  scan_concurrent_connections: int = 5,
-                 timeout: int = 600):
+                 timeout: int = 600,
+                 hedge_enabled: bool = False,
+                 hedge_scan_binary_urls: List[str] = None,
+                 hedge_max_ratio: float = 0.1,
+                 hedge_overload_cooldown_seconds: float = 30.0,
+                 hedge_max_in_flight: int | None = None):
+        """
+        Args:
+            scan_binary_url: DSXA scan/binary/v2 endpoint.
+            scan_concurrent_connections: maximum connections held open to DSXA.
+            timeout: request timeout in seconds.
+            hedge_enabled: if True, a scan that has not completed within the observed p95 latency for its
+                file size class is sent a second time, and whichever attempt answers first wins.
+            hedge_scan_binary_urls: alternate DSXA endpoints to send hedged attempts to.  If empty, the hedge
+                is sent to scan_binary_url over a separate pooled connection.
+            hedge_max_ratio: upper bound on hedged attempts as a fraction of all scans.
+            hedge_overload_cooldown_seconds: how long hedging stays suspended after DSXA answers 429/503.
+            hedge_max_in_flight: for the sync client, the most hedged scans in flight at once (by default
+                scan_concurrent_connections).  A hedged scan counts until both of its attempts have finished, and
+                scans are not hedged while this many are.
+        """
         self._scan_binary_url = scan_binary_url
         # self._protected_entity_id = protected_entity_id
         self._scan_concurrent_connections = scan_concurrent_connections
+        self._hedge_max_in_flight = hedge_max_in_flight or scan_concurrent_connections
+        # hedged attempts get connections of their own, so they never hold up new scans
+        max_connections = scan_concurrent_connections + (self._hedge_max_in_flight if hedge_enabled else 0)
         self._client_config = {
             "timeout": httpx.Timeout(timeout, read=timeout, connect=timeout),
-            "limits": httpx.Limits(max_connections=scan_concurrent_connections),
+            "limits": httpx.Limits(max_connections=max_connections),
             "verify": False
         }
         self.aclient = httpx.AsyncClient(**self._client_config)
         # Sync client for synchronous methods
         self.client = httpx.Client(**self._client_config)
 
+        self._hedge_enabled = hedge_enabled
+        self._hedge_urls = list(hedge_scan_binary_urls) if hedge_scan_binary_urls else [scan_binary_url]
+        self._hedge_url_index = itertools.count()
+        self.hedge_metrics = DSXAHedgeMetrics()
+        self._latency_tracker = ScanLatencyTracker()
+        self._hedge_policy = HedgePolicy(self.hedge_metrics,
+                                         max_ratio=hedge_max_ratio,
+                                         overload_cooldown_seconds=hedge_overload_cooldown_seconds)
+        # hedged scans (both attempts) in flight, for the sync client
+        self._hedge_slots = threading.BoundedSemaphore(self._hedge_max_in_flight)
+        self._executor_lock = threading.Lock()
+        self._attempt_executor = None
+        self._hedge_executor = None
+
     async def __aenter__(self):
         if not self.aclient:
             self.aclient = httpx.AsyncClient(**self._client_config)
@@ -45,6 +87,13 @@ class DSXAClient:
     def __str__(self):
         return f'Scan binary url: {self._scan_binary_url}'
 
+    def close(self):
+        """Close the sync client and hedging executors.  The async client is closed via __aexit__."""
+        self.client.close()
+        for executor in (self._attempt_executor, self._hedge_executor):
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10), reraise=True)
     async def reconnect(self):
         """Reinitialize the AsyncClient if the connection is lost."""
@@ -64,21 +113,13 @@ class DSXAClient:
     def scan_binary(self, scan_request: DSXAScanRequest) -> DPAVerdictModel2:
         """Synchronous version of scan_binary_async."""
         try:
-            headers = {}
-            if scan_request.protected_entity:
-                headers["protected_entity"] = scan_request.protected_entity
-            if scan_request.metadata_info:
-                headers["X-Custom-Metadata"] = scan_request.metadata_info
+            headers = self._scan_headers(scan_request)
             scan_request.binary_data.seek(0)  # Reset stream position
+            content = scan_request.binary_data.read()
 
-            response = self.client.post(
-                self._scan_binary_url,
-                headers=headers,
-                content=scan_request.binary_data.read()
-            )
-            response.raise_for_status()
-            verdict = response.json()
-            return DPAVerdictModel2(**verdict)
+            if self._hedge_enabled:
+                return self._hedged_post(content, headers)
+            return self._post(self._scan_binary_url, content, headers)
         except httpx.HTTPStatusError as e:
             logging.error(f"HTTP error during sync scan: {e.response.status_code}")
             raise
@@ -94,24 +135,13 @@ class DSXAClient:
     )
     async def _scan_binary_async(self, scan_request: DSXAScanRequest) -> DPAVerdictModel2:
         try:
-            headers = {} #"Content-Type": "application/octet-stream"}
-            if scan_request.protected_entity:
-                headers["protected_entity"] = scan_request.protected_entity
-            if scan_request.metadata_info:
-                headers["X-Custom-Metadata"] = scan_request.metadata_info
+            headers = self._scan_headers(scan_request)  # No need for Content-Type, httpx will handle it
             scan_request.binary_data.seek(0)  # Reset the stream position just in case
+            content = scan_request.binary_data.read()
 
-            response = await self.aclient.post(
-                self._scan_binary_url,
-                headers=headers,  # No need for Content-Type, httpx will handle it
-                content=scan_request.binary_data.read()  # Use content instead of files
-            )
-
-            response.raise_for_status()
-
-            verdict = response.json()
-            dpa_verdict = DPAVerdictModel2(**verdict)
-            return dpa_verdict
+            if self._hedge_enabled:
+                return await self._hedged_post_async(content, headers)
+            return await self._post_async(self._scan_binary_url, content, headers)
         except httpx.HTTPStatusError as e:
             logging.error(f"HTTP error during scan: {e.response.status_code}")
             raise
@@ -119,6 +149,149 @@ class DSXAClient:
             logging.error(f"Error during binary scan: {e}")
             raise
 
+    @staticmethod
+    def _scan_headers(scan_request: DSXAScanRequest) -> dict:
+        headers = {}
+        if scan_request.protected_entity:
+            headers["protected_entity"] = scan_request.protected_entity
+        if scan_request.metadata_info:
+            headers["X-Custom-Metadata"] = scan_request.metadata_info
+        return headers
+
+    def _observe(self, response: httpx.Response, size_in_bytes: int, started: float):
+        self._hedge_policy.observe_status(response.status_code)
+        if response.is_success:
+            self._latency_tracker.add(size_in_bytes, time.perf_counter() - started)
+
+    def _post(self, url: str, content: bytes, headers: dict) -> DPAVerdictModel2:
+        started = time.perf_counter()
+        response = self.client.post(url, headers=headers, content=content)
+        self._observe(response, len(content), started)
+        response.raise_for_status()
+        return DPAVerdictModel2.model_validate_json(response.content)
+
+    async def _post_async(self, url: str, content: bytes, headers: dict) -> DPAVerdictModel2:
+        started = time.perf_counter()
+        response = await self.aclient.post(url, headers=headers, content=content)
+        self._observe(response, len(content), started)
+        response.raise_for_status()
+        return DPAVerdictModel2.model_validate_json(response.content)
+
+    def _hedge_delay(self, size_in_bytes: int) -> float | None:
+        self.hedge_metrics.increment("requests")
+        return self._latency_tracker.hedge_delay(size_in_bytes)
+
+    def _next_hedge_url(self) -> str:
+        return self._hedge_urls[next(self._hedge_url_index) % len(self._hedge_urls)]
+
+    def _hedge_won(self, url: str, size_in_bytes: int):
+        self.hedge_metrics.increment("hedge_wins")
+        dsx_logging.debug(f"Hedged scan ({size_in_bytes} bytes) answered first from {url}. {self.hedge_metrics}")
+
+    async def _hedged_post_async(self, content: bytes, headers: dict) -> DPAVerdictModel2:
+        delay = self._hedge_delay(len(content))
+        primary = asyncio.ensure_future(self._post_async(self._scan_binary_url, content, headers))
+        attempts = {primary}
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done or not self._hedge_policy.may_hedge():
+                return await primary
+
+            hedge_url = self._next_hedge_url()
+            self.hedge_metrics.increment("hedged")
+            hedge = asyncio.ensure_future(self._post_async(hedge_url, content, headers))
+            attempts.add(hedge)
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is hedge:
+                            self._hedge_won(hedge_url, len(content))
+                        return attempt.result()
+            # both attempts failed, surface the primary's error
+            return primary.result()
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+
+    def _executors(self) -> tuple[concurrent.futures.ThreadPoolExecutor, concurrent.futures.ThreadPoolExecutor]:
+        with self._executor_lock:
+            if self._attempt_executor is None:
+                # Primary attempts, sized so the primaries abandoned by in-flight hedges never hold up new scans
+                self._attempt_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._scan_concurrent_connections + self._hedge_max_in_flight,
+                    thread_name_prefix="dsxa-attempt")
+                self._hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._hedge_max_in_flight, thread_name_prefix="dsxa-hedge")
+        return self._attempt_executor, self._hedge_executor
+
+    def _hedged_post(self, content: bytes, headers: dict) -> DPAVerdictModel2:
+        # httpx.Client is thread safe, so the sync flavour races both attempts on executors.  A sync request can't
+        # be interrupted once in flight, so the losing attempt is left to finish and discarded; its hedge slot is
+        # only released once it has, which bounds the threads abandoned attempts can occupy.
+        delay = self._hedge_delay(len(content))
+        if delay is None:
+            return self._post(self._scan_binary_url, content, headers)
+        attempt_executor, hedge_executor = self._executors()
+
+        primary = attempt_executor.submit(self._post, self._scan_binary_url, content, headers)
+        try:
+            return primary.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            if not self._hedge_policy.may_hedge():
+                return primary.result()
+        if not self._hedge_slots.acquire(blocking=False):
+            self.hedge_metrics.increment("skipped_saturated")
+            return primary.result()
+
+        hedge_url = self._next_hedge_url()
+        self.hedge_metrics.increment("hedged")
+        hedge = hedge_executor.submit(self._post, hedge_url, content, headers)
+        unfinished = [2]
+        unfinished_lock = threading.Lock()
+
+        def attempt_finished(_):
+            with unfinished_lock:
+                unfinished[0] -= 1
+                if unfinished[0] == 0:
+                    self._hedge_slots.release()
+        primary.add_done_callback(attempt_finished)
+        hedge.add_done_callback(attempt_finished)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is hedge:
+                        self._hedge_won(hedge_url, len(content))
+                    for other in pending:
+                        other.cancel()
+                    return attempt.result()
+        return primary.result()
+
+    async def probe_async(self, timeout: float = 5.0) -> int:
+        """
+        Check DSXA is reachable and responding without scanning anything, by sending a GET to the scan endpoint.
+        DSXA answers it with a client error (e.g. 405), which is enough to know the service is up.
+
+        Returns:
+            int: the HTTP status code DSXA answered with.
+
+        Raises:
+            httpx.HTTPError: if DSXA could not be reached, or answered with a server error.
+        """
+        response = await self.aclient.get(self._scan_binary_url, timeout=timeout)
+        if response.status_code >= 500:
+            raise httpx.HTTPStatusError(f"DSXA answered {response.status_code}", request=response.request,
+                                        response=response)
+        return response.status_code
+
     async def test_connection_async(self) -> StatusResponse:
         try:
             response = await self.scan_binary_async(scan_request=DSXAScanRequest(binary_data=io.BytesIO(b'This is a test')))
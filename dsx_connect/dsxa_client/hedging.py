@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+
+
+class DSXAHedgeMetrics:
+    """
+    Counters describing how often DSXAClient hedged a scan, and how often the hedge won.
+
+    All counters are updated under a lock, so a single DSXAClient can be shared between threads
+    (e.g. the sync hedging executor) without losing counts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped_overloaded = 0
+        self.skipped_budget = 0
+        self.skipped_saturated = 0
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "skipped_overloaded": self.skipped_overloaded,
+                "skipped_budget": self.skipped_budget,
+                "skipped_saturated": self.skipped_saturated,
+                "hedge_rate": self.hedge_rate,
+                "hedge_win_rate": self.hedge_win_rate,
+            }
+
+    def __str__(self):
+        return str(self.as_dict())
+
+
+class ScanLatencyTracker:
+    """
+    Keeps a sliding window of recent scan latencies per file size class, and derives the delay after which
+    a scan should be hedged (the observed percentile for that size class).
+
+    Size classes grow by a factor of 4, starting at 64KB, so a 10KB file and a 50MB file are never compared
+    against each other.
+    """
+
+    def __init__(self, percentile: float = 0.95, window: int = 200, min_samples: int = 20):
+        self._percentile = percentile
+        self._window = window
+        self._min_samples = min_samples
+        self._latencies: dict[int, deque] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def size_class(size_in_bytes: int) -> int:
+        return max(0, size_in_bytes.bit_length() - 16) // 2
+
+    def add(self, size_in_bytes: int, latency_in_seconds: float):
+        size_class = self.size_class(size_in_bytes)
+        with self._lock:
+            if size_class not in self._latencies:
+                self._latencies[size_class] = deque(maxlen=self._window)
+            self._latencies[size_class].append(latency_in_seconds)
+
+    def hedge_delay(self, size_in_bytes: int) -> float | None:
+        """Return the latency percentile for this size class, or None if there are too few samples to tell."""
+        with self._lock:
+            latencies = self._latencies.get(self.size_class(size_in_bytes))
+            if not latencies or len(latencies) < self._min_samples:
+                return None
+            ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self._percentile))]
+
+
+class HedgePolicy:
+    """
+    Decides whether a slow scan may be hedged.  Hedging is suspended while DSXA is overloaded (it recently
+    answered 429 or 503), and the number of hedges is capped at max_ratio of all requests so hedging can
+    never more than marginally add to DSXA load.
+    """
+
+    OVERLOAD_STATUS_CODES = (429, 503)
+
+    def __init__(self, metrics: DSXAHedgeMetrics, max_ratio: float = 0.1, overload_cooldown_seconds: float = 30.0):
+        self._metrics = metrics
+        self._max_ratio = max_ratio
+        self._overload_cooldown_seconds = overload_cooldown_seconds
+        self._overloaded_until = 0.0
+        self._lock = threading.Lock()
+
+    def observe_status(self, status_code: int):
+        if status_code in self.OVERLOAD_STATUS_CODES:
+            with self._lock:
+                self._overloaded_until = time.monotonic() + self._overload_cooldown_seconds
+
+    @property
+    def overloaded(self) -> bool:
+        with self._lock:
+            return time.monotonic() < self._overloaded_until
+
+    def may_hedge(self) -> bool:
+        if self.overloaded:
+            self._metrics.increment("skipped_overloaded")
+            return False
+        if self._metrics.hedged + 1 > self._metrics.requests * self._max_ratio:
+            self._metrics.increment("skipped_budget")
+            return False
+        return True
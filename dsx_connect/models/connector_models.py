@@ -20,3 +20,4 @@ class ScanRequestModel(BaseModel):
     location: str
     metainfo: str
     connector_url: str = None
+    scan_job_id: str | None = None  # set on requests sent as part of a full scan
@@ -2,10 +2,17 @@ class DSXConnectAPIEndpoints:
     SCAN_REQUEST = "/dsx-connect/scan-request"
     SCAN_REQUEST_TEST = "/dsx-connect/test/scan-request"
     SCAN_RESULTS = "/dsx-connect/scan-results"
+    SCAN_RESULTS_EXPORT = "/dsx-connect/scan-results/export"
+    SCAN_RESULTS_STREAM = "/dsx-connect/scan-results/stream"
+    SCAN_RESULTS_ARCHIVE = "/dsx-connect/scan-results/archive"
     SCAN_STATS = "/dsx-connect/scan-stats"
+    SCAN_STATS_TIMESERIES = "/dsx-connect/scan-stats/timeseries"
+    SCAN_JOB = "/dsx-connect/jobs/{job_id}"
+    SCAN_JOB_ENUMERATION = "/dsx-connect/jobs/{job_id}/enumeration"
     CONNECTION_TEST = "/dsx-connect/test/connection"
     DSXA_CONNECTION_TEST = "/dsx-connect/test/dsxa-connection"
     CONFIG = "/dsx-connect/config"
+    HEALTH = "/dsx-connect/health"
 
 
 class ConnectorEndpoints:
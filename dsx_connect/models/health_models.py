@@ -0,0 +1,27 @@
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class HealthStatusEnum(str, Enum):
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"  # a non-critical dependency is failing
+    UNHEALTHY = "unhealthy"  # a critical dependency is failing
+    UNKNOWN = "unknown"  # not probed yet
+
+
+class HealthCheckModel(BaseModel):
+    name: str
+    critical: bool = True
+    status: HealthStatusEnum = HealthStatusEnum.UNKNOWN
+    message: str | None = None
+    last_checked: float | None = None  # epoch seconds
+    last_healthy: float | None = None
+    consecutive_failures: int = 0
+    latency_ms: float | None = None
+    latency_history_ms: list[float] = []  # most recent last, failed probes excluded
+
+
+class HealthReportModel(BaseModel):
+    status: HealthStatusEnum
+    checks: dict[str, HealthCheckModel]
@@ -1,7 +1,8 @@
 from enum import Enum
+from typing import Any, Literal
 
-from pydantic import BaseModel
-from dsx_connect.dsxa_client.verdict_models import DPAVerdictModel2
+from pydantic import BaseModel, Field, model_validator
+from dsx_connect.dsxa_client.verdict_models import DPAVerdictEnum, DPAVerdictModel2
 
 
 class ScanResultStatusEnum(str, Enum):
@@ -17,6 +18,149 @@ class ScanResultModel(BaseModel):
     metadata_tag: str | None = None
     dpa_verdict: DPAVerdictModel2 | None = None
     status: str = ScanResultStatusEnum.NOT_SCANNED
+    connector_url: str | None = None
+    timestamp: float | None = None  # epoch seconds at which the result was stored
+
+
+class ScanResultField(str, Enum):
+    """The scan result fields that can be searched on, dotted paths reach into the verdict."""
+    ID = "id"
+    SCAN_REQUEST_TASK_ID = "scan_request_task_id"
+    METADATA_TAG = "metadata_tag"
+    STATUS = "status"
+    CONNECTOR_URL = "connector_url"
+    TIMESTAMP = "timestamp"
+    VERDICT = "dpa_verdict.verdict"
+    FILE_HASH = "dpa_verdict.file_info.file_hash"
+
+    @classmethod
+    def parse(cls, key: str) -> 'ScanResultField':
+        try:
+            return cls(key)
+        except ValueError:
+            raise ValueError(f'Scan results cannot be searched by {key}, use one of: '
+                             f'{", ".join(field.value for field in cls)}')
+
+    def value_of(self, result: ScanResultModel):
+        if self == ScanResultField.VERDICT:
+            return result.dpa_verdict.verdict if result.dpa_verdict else None
+        if self == ScanResultField.FILE_HASH:
+            return result.dpa_verdict.file_info.file_hash if result.dpa_verdict and result.dpa_verdict.file_info \
+                else None
+        return getattr(result, self.value)
+
+
+class FieldCondition(BaseModel):
+    """
+    A condition on one scan result field: equal to a value, one of several values, or within a range (any of
+    gt/gte/lt/lte).  Backends translate lists of conditions, all of which must hold, into indexed lookups.
+    """
+    field: ScanResultField
+    equals: Any = None
+    one_of: list | None = None
+    gt: Any = None
+    gte: Any = None
+    lt: Any = None
+    lte: Any = None
+
+    @model_validator(mode="after")
+    def _normalize(self):
+        kinds = [self.equals is not None, self.one_of is not None, self.is_range]
+        if sum(kinds) != 1:
+            raise ValueError("a condition is one of: equals, one_of, or a range (gt/gte/lt/lte)")
+        # enums (e.g. verdicts) are compared, and stored, by value; ids may arrive as strings (path parameters)
+        normalize = int if self.field == ScanResultField.ID else lambda v: v.value if isinstance(v, Enum) else v
+        if self.equals is not None:
+            self.equals = normalize(self.equals)
+        if self.one_of is not None:
+            self.one_of = [normalize(value) for value in self.one_of]
+        return self
+
+    @property
+    def is_range(self) -> bool:
+        return any(bound is not None for bound in (self.gt, self.gte, self.lt, self.lte))
+
+    def matches(self, result: ScanResultModel) -> bool:
+        value = self.field.value_of(result)
+        if isinstance(value, Enum):
+            value = value.value
+        return self.matches_value(value)
+
+    def matches_value(self, value) -> bool:
+        if value is None:
+            return False
+        if self.equals is not None:
+            return value == self.equals
+        if self.one_of is not None:
+            return value in self.one_of
+        return ((self.gt is None or value > self.gt) and (self.gte is None or value >= self.gte) and
+                (self.lt is None or value < self.lt) and (self.lte is None or value <= self.lte))
+
+
+class ScanResultsQuery(BaseModel):
+    """
+    Filter and page through stored scan results.  Results are ordered by id, which is assigned in insertion
+    order, so paging by id is also paging by time.  Pass the next_cursor of one page as the cursor of the next.
+    """
+    verdict: DPAVerdictEnum | None = None
+    connector_url: str | None = None
+    metadata_tag: str | None = None
+    scan_request_task_id: str | None = None
+    file_hash: str | None = None
+    start_time: float | None = Field(None, description="epoch seconds, inclusive")
+    end_time: float | None = Field(None, description="epoch seconds, exclusive")
+    since_id: int | None = Field(None, description="only results with a greater id: pass the newest id already "
+                                                   "seen to poll for new results")
+    since_ts: float | None = Field(None, description="only results stored after this time (epoch seconds)")
+    cursor: int | None = Field(None, description="return results after (in sort order) this id")
+    limit: int = Field(100, ge=1, le=1000)
+    descending: bool = Field(True, description="newest first")
+
+    def conditions(self, include_cursor: bool = True) -> list[FieldCondition]:
+        """The query's filters (and cursor) as field conditions."""
+        conditions = [FieldCondition(field=field, equals=value) for field, value in (
+            (ScanResultField.VERDICT, self.verdict),
+            (ScanResultField.CONNECTOR_URL, self.connector_url),
+            (ScanResultField.METADATA_TAG, self.metadata_tag),
+            (ScanResultField.SCAN_REQUEST_TASK_ID, self.scan_request_task_id),
+            (ScanResultField.FILE_HASH, self.file_hash)) if value is not None]
+        if self.start_time is not None or self.end_time is not None:
+            conditions.append(FieldCondition(field=ScanResultField.TIMESTAMP, gte=self.start_time, lt=self.end_time))
+        if self.since_id is not None:
+            conditions.append(FieldCondition(field=ScanResultField.ID, gt=self.since_id))
+        if self.since_ts is not None:
+            conditions.append(FieldCondition(field=ScanResultField.TIMESTAMP, gt=self.since_ts))
+        if include_cursor and self.cursor is not None:
+            conditions.append(FieldCondition(field=ScanResultField.ID, lt=self.cursor) if self.descending
+                              else FieldCondition(field=ScanResultField.ID, gt=self.cursor))
+        return conditions
+
+    def matches(self, result: ScanResultModel) -> bool:
+        """Python-side evaluation of the filters (not the cursor), for backends that cannot push them down."""
+        return all(condition.matches(result) for condition in self.conditions(include_cursor=False))
+
+
+class ScanResultsExportQuery(ScanResultsQuery):
+    format: Literal["ndjson", "csv"] = "ndjson"
+    limit: int | None = Field(None, ge=1, description="maximum number of results to export, all if not set")
+
+
+class ScanResultsStreamQuery(BaseModel):
+    verdict: DPAVerdictEnum | None = None
+    connector_url: str | None = None
+    metadata_tag: str | None = None
+    last_event_id: int | None = Field(None, description="resume after this result id, the Last-Event-ID header "
+                                                        "takes precedence")
+
+
+class ScanResultsPage(BaseModel):
+    results: list[ScanResultModel]
+    next_cursor: int | None = None  # None when there are no more results
+
+    @classmethod
+    def of(cls, results: list[ScanResultModel], limit: int) -> 'ScanResultsPage':
+        """The page of a query's results, which continues after the last if the page is full."""
+        return cls(results=results, next_cursor=results[-1].id if len(results) == limit else None)
 
 
 class ScanStatsModel(BaseModel):
@@ -30,8 +174,90 @@ class ScanStatsModel(BaseModel):
     avg_scan_time_in_seconds: float = -1
     median_file_size_in_bytes: int = -1
     median_scan_time_in_microseconds: int = -1
+    p50_scan_time_in_microseconds: int = -1
+    p90_scan_time_in_microseconds: int = -1
+    p99_scan_time_in_microseconds: int = -1
+    p999_scan_time_in_microseconds: int = -1
+    p50_file_size_in_bytes: int = -1
+    p90_file_size_in_bytes: int = -1
+    p99_file_size_in_bytes: int = -1
+    p999_file_size_in_bytes: int = -1
     longest_scan_time_file: str = ''
     longest_scan_time_file_size_in_bytes: int = -1
     longest_scan_time_in_microseconds: int = -1
     longest_scan_time_in_milliseconds: float = -1
     longest_scan_time_in_seconds: float = -1
+    # the quantile sketches (QuantileSketch.to_dict()) the percentiles are read from, merged as stats are added
+    scan_time_sketch: dict | None = None
+    file_size_sketch: dict | None = None
+
+
+class ScanStatsResolution(str, Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+    @property
+    def seconds(self) -> int:
+        return {"minute": 60, "hour": 3600, "day": 86400}[self.value]
+
+    def bucket_start(self, timestamp: float) -> int:
+        """The start (epoch seconds, UTC aligned) of the bucket timestamp falls in."""
+        return int(timestamp // self.seconds * self.seconds)
+
+
+class ScanStatsBucketModel(BaseModel):
+    """Scan stats of the files scanned within one time bucket, by one connector or (connector_url None) all."""
+    resolution: ScanStatsResolution
+    start: int  # epoch seconds
+    connector_url: str | None = None
+    files_scanned: int = 0
+    total_file_size: int = 0
+    total_scan_time_in_microseconds: int = 0
+    avg_scan_time_in_microseconds: int = -1
+    p50_scan_time_in_microseconds: int = -1
+    p90_scan_time_in_microseconds: int = -1
+    p99_scan_time_in_microseconds: int = -1
+    p999_scan_time_in_microseconds: int = -1
+    longest_scan_time_in_microseconds: int = -1
+    verdicts: dict[str, int] = Field(default_factory=dict)  # verdict -> count
+
+
+class ScanStatsTimeSeriesQuery(BaseModel):
+    resolution: ScanStatsResolution = ScanStatsResolution.MINUTE
+    start_time: float | None = Field(None, description="epoch seconds, buckets containing it onwards")
+    end_time: float | None = Field(None, description="epoch seconds, buckets beginning before it")
+    connector_url: str | None = Field(None, description="only this connector's buckets")
+    by_connector: bool = Field(False, description="a series per connector, rather than all connectors combined")
+
+
+class ScanJobEnumerationModel(BaseModel):
+    """Enumeration progress of a full scan job, as reported by its connector."""
+    connector_url: str | None = None
+    enumerated: int = 0  # items the connector has listed so far
+    skipped: int = 0  # items listed, but not submitted (e.g. unchanged since the last incremental scan)
+    complete: bool = False  # the connector has finished listing items
+
+
+class ScanJobModel(BaseModel):
+    job_id: str
+    connector_url: str | None = None
+    status: str = "running"  # "running", "enumerated" (all items listed) or "complete"
+    started_at: float | None = None
+    updated_at: float | None = None
+    enumeration_complete: bool = False
+
+    enumerated: int = 0
+    skipped: int = 0
+    queued: int = 0
+    scanned: int = 0
+    not_scanned: int = 0  # skipped by the pre-scan filter
+    failed: int = 0
+
+    completed: int = 0  # scanned + not_scanned + failed
+    in_flight: int = 0  # queued but not yet completed
+    elapsed_seconds: float = 0
+    enqueue_rate: float = 0  # items/s queued, averaged over the job so far
+    completion_rate: float = 0  # items/s completed, averaged over the job so far
+    remaining: int | None = None  # None until the connector has finished enumerating
+    eta_seconds: float | None = None
@@ -0,0 +1,147 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import Celery
+
+from dsx_connect.utils.logging import dsx_logging
+
+# put on the pending queue by stop(): the batcher publishes what it holds and returns
+_CLOSE = object()
+
+
+class AsyncTaskProducer:
+    """
+    Publishes Celery tasks without blocking the asyncio event loop.
+
+    celery_app.send_task is a blocking broker round trip.  Instead of calling it from an async endpoint, callers
+    await enqueue(), which hands the task to a batcher coroutine.  The batcher coalesces requests arriving within
+    batch_window_ms (up to max_batch_size) and publishes each batch from a small dedicated thread pool, over a
+    single pooled broker connection per batch.  Task ids are assigned up front, so enqueue() resolves with the id
+    as soon as the batch containing it has been published.
+    """
+
+    def __init__(self, celery_app: Celery, task_name: str, queue: str, expires: int = 3600,
+                 batch_window_ms: float = 2.0, max_batch_size: int = 500, publisher_threads: int = 4):
+        self._celery_app = celery_app
+        self._task_name = task_name
+        self._queue = queue
+        self._expires = expires
+        self._batch_window = batch_window_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._publisher_threads = publisher_threads
+
+        self._pending: asyncio.Queue | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._publish_slots: asyncio.Semaphore | None = None
+        self._batcher: asyncio.Task | None = None
+        self._publishes: set[asyncio.Task] = set()
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._batcher is not None and not self._batcher.done() and not self._closing
+
+    async def start(self):
+        if self.running:
+            return
+        self._pending = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self._publisher_threads, thread_name_prefix="task-producer")
+        self._publish_slots = asyncio.Semaphore(self._publisher_threads)
+        self._closing = False
+        self._batcher = asyncio.create_task(self._run_batcher())
+        dsx_logging.debug(f"Started async producer for {self._task_name} on queue {self._queue}")
+
+    async def stop(self):
+        """Publish anything still pending, then stop the batcher and publisher threads."""
+        if not self.running:
+            return
+        # tasks enqueued from here on are published directly
+        self._closing = True
+        await self._pending.put(_CLOSE)
+        await asyncio.gather(self._batcher, return_exceptions=True)
+        await asyncio.gather(*self._publishes, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._batcher = None
+        dsx_logging.debug(f"Stopped async producer for {self._task_name}")
+
+    async def enqueue(self, args: list) -> str:
+        """
+        Queue a task with the given args.
+
+        Returns:
+            str: the Celery task id, once the task has been published to the broker.
+
+        Raises:
+            Exception: whatever the broker publish raised, if it failed.
+        """
+        task_id = str(uuid.uuid4())
+        if not self.running:
+            # not started (e.g. outside the app lifespan), publish directly but still off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._publish, [(task_id, args)])
+            return task_id
+
+        published = asyncio.get_running_loop().create_future()
+        await self._pending.put((task_id, args, published))
+        return await published
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        closing = False
+        try:
+            while not closing:
+                request = await self._pending.get()
+                if request is _CLOSE:
+                    return
+                batch = [request]
+                deadline = time.monotonic() + self._batch_window
+                while len(batch) < self._max_batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._pending.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if request is _CLOSE:
+                        closing = True
+                        break
+                    batch.append(request)
+
+                await self._publish_slots.acquire()
+                publish = loop.create_task(self._publish_batch(batch))
+                self._publishes.add(publish)
+                publish.add_done_callback(self._publishes.discard)
+                batch = []
+        finally:
+            # if the batcher died before handing them to a publisher, fail these so enqueue() callers don't hang
+            while not self._pending.empty():
+                request = self._pending.get_nowait()
+                if request is not _CLOSE:
+                    batch.append(request)
+            for _, _, published in batch:
+                if not published.done():
+                    published.set_exception(RuntimeError(f"{self._task_name} producer stopped before publishing"))
+
+    async def _publish_batch(self, batch: list):
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._publish, [(task_id, args) for task_id, args, _ in batch])
+            for task_id, _, published in batch:
+                if not published.done():
+                    published.set_result(task_id)
+        except Exception as e:
+            dsx_logging.error(f"Failed to publish {len(batch)} {self._task_name} tasks: {e}", exc_info=True)
+            for _, _, published in batch:
+                if not published.done():
+                    published.set_exception(e)
+        finally:
+            self._publish_slots.release()
+
+    def _publish(self, tasks: list[tuple[str, list]]):
+        with self._celery_app.producer_or_acquire() as producer:
+            for task_id, args in tasks:
+                self._celery_app.send_task(self._task_name, args=args, queue=self._queue, task_id=task_id,
+                                           expires=self._expires, producer=producer)
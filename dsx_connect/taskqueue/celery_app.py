@@ -1,5 +1,5 @@
 from celery import Celery
-from dsx_connect.config import config
+from dsx_connect.config import config, TaskQueueConfig
 
 # Initialize Celery app
 celery_app = Celery(
@@ -18,7 +18,8 @@ celery_app.conf.task_queues = {
 celery_app.conf.task_default_queue = config.taskqueue.scan_request_queue
 celery_app.conf.task_routes = {
     config.taskqueue.scan_request_task: {"queue": config.taskqueue.scan_request_queue},
-    config.taskqueue.verdict_action_task: {"queue": config.taskqueue.scan_result_queue}
+    config.taskqueue.verdict_action_task: {"queue": config.taskqueue.scan_result_queue},
+    config.taskqueue.archive_scan_results_task: {"queue": config.taskqueue.scan_result_queue}
 }
 celery_app.conf.task_serializer = "json"
 celery_app.conf.result_serializer = "json"
@@ -27,3 +28,9 @@ celery_app.conf.accept_content = ["json"]
 
 def get_celery():
     return celery_app
+
+
+def taskqueue_redis_url(taskqueue_config: TaskQueueConfig) -> str | None:
+    """The Redis URL for live scan results and job tracking, or None if there's no Redis to use."""
+    url = taskqueue_config.redis_url or taskqueue_config.broker
+    return url if url.startswith(("redis://", "rediss://", "unix://")) else None
@@ -0,0 +1,96 @@
+"""
+Live distribution of stored scan results over Redis pub/sub.
+
+Workers publish each result as scan_result_task stores it (publish_scan_result).  Each API process holds a single
+subscription (ScanResultBroadcaster) and fans results out to any number of local listeners, e.g. the SSE stream
+endpoint, so the number of connected clients doesn't multiply Redis connections.  Pub/sub is fire-and-forget:
+a listener that connects late, or reconnects, catches up from the results database.
+"""
+import asyncio
+
+import redis
+import redis.asyncio
+
+from dsx_connect.models.scan_models import ScanResultModel
+from dsx_connect.utils.logging import dsx_logging
+
+
+def publish_scan_result(redis_client: redis.Redis, channel: str, scan_result: ScanResultModel):
+    """Publish a stored scan result.  Failures are logged, not raised: live results are best effort."""
+    try:
+        redis_client.publish(channel, scan_result.model_dump_json())
+    except redis.RedisError as e:
+        dsx_logging.warning(f"Failed to publish scan result {scan_result.id} to {channel}: {e}")
+
+
+class ScanResultListener:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue[ScanResultModel] = asyncio.Queue(maxsize=queue_size)
+        # set when the listener missed results (it fell behind, or the subscription dropped); it should stop and
+        # catch up from the database
+        self.overflowed = False
+
+
+class ScanResultBroadcaster:
+    def __init__(self, redis_url: str, channel: str, listener_queue_size: int = 1000):
+        self._redis_url = redis_url
+        self._channel = channel
+        self._listener_queue_size = listener_queue_size
+        self._listeners: set[ScanResultListener] = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        dsx_logging.info(f"Subscribed to live scan results on {self._channel}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def listen(self) -> ScanResultListener:
+        """Register a listener.  Results are put on its queue until unlisten() is called."""
+        listener = ScanResultListener(self._listener_queue_size)
+        self._listeners.add(listener)
+        return listener
+
+    def unlisten(self, listener: ScanResultListener):
+        self._listeners.discard(listener)
+
+    async def _run(self):
+        while True:
+            client = redis.asyncio.Redis.from_url(self._redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._dispatch(ScanResultModel.model_validate_json(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                dsx_logging.warning(f"Live scan results subscription to {self._channel} failed, retrying: {e}")
+                # whatever is published until the subscription is back is missed
+                for listener in list(self._listeners):
+                    self._drop(listener)
+                await asyncio.sleep(5)
+            finally:
+                await client.aclose()
+
+    def _dispatch(self, scan_result: ScanResultModel):
+        for listener in list(self._listeners):
+            try:
+                listener.queue.put_nowait(scan_result)
+            except asyncio.QueueFull:
+                # a stalled client doesn't hold up the others, it's cut loose to catch up from the database
+                self._drop(listener)
+                dsx_logging.warning("Live scan results listener fell behind and was dropped")
+
+    def _drop(self, listener: ScanResultListener):
+        listener.overflowed = True
+        self._listeners.discard(listener)
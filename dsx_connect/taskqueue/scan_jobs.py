@@ -0,0 +1,116 @@
+"""
+Full scan job tracking.
+
+A connector assigns a job id to each full scan and stamps it on every ScanRequestModel it sends.  Each stage
+counts the job's items atomically in a Redis hash as they pass through:
+
+    enumerated, skipped    reported by the connector as it lists the repository
+    queued                 POST /scan-request, once the request is on the queue
+    scanned, not_scanned   scan_result_task, once the result is stored
+    failed                 scan_request_task, when reading or scanning the file failed
+
+GET /dsx-connect/jobs/{job_id} derives rates and an ETA from the counters (job_from_counters).
+"""
+import time
+from enum import Enum
+
+import redis
+import redis.asyncio
+
+from dsx_connect.models.scan_models import ScanJobModel, ScanJobEnumerationModel
+from dsx_connect.utils.logging import dsx_logging
+
+JOB_KEY_PREFIX = "dsx-connect:job:"
+
+
+class ScanJobCounter(str, Enum):
+    QUEUED = "queued"
+    SCANNED = "scanned"
+    NOT_SCANNED = "not_scanned"
+    FAILED = "failed"
+
+
+def job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def increment_job_counter(redis_client: redis.Redis, job_id: str, counter: ScanJobCounter, ttl: int,
+                          amount: int = 1):
+    """Count items of a job in a worker.  Failures are logged, not raised: tracking never fails a scan."""
+    now = time.time()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(job_key(job_id), counter.value, amount)
+        pipe.hsetnx(job_key(job_id), "started_at", now)
+        pipe.hset(job_key(job_id), "updated_at", now)
+        pipe.expire(job_key(job_id), ttl)
+        pipe.execute()
+    except redis.RedisError as e:
+        dsx_logging.warning(f"Failed to count {counter.value} for scan job {job_id}: {e}")
+
+
+async def increment_job_counter_async(redis_client: redis.asyncio.Redis, job_id: str, counter: ScanJobCounter,
+                                      ttl: int, amount: int = 1):
+    """Count items of a job in the API.  Failures are logged, not raised."""
+    now = time.time()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(job_key(job_id), counter.value, amount)
+        pipe.hsetnx(job_key(job_id), "started_at", now)
+        pipe.hset(job_key(job_id), "updated_at", now)
+        pipe.expire(job_key(job_id), ttl)
+        await pipe.execute()
+    except redis.RedisError as e:
+        dsx_logging.warning(f"Failed to count {counter.value} for scan job {job_id}: {e}")
+
+
+async def update_job_enumeration(redis_client: redis.asyncio.Redis, job_id: str,
+                                 enumeration: ScanJobEnumerationModel, ttl: int):
+    """Record a connector's enumeration progress.  Its counts are running totals, so they're set, not added."""
+    now = time.time()
+    mapping = {"enumerated": enumeration.enumerated, "skipped": enumeration.skipped,
+               "enumeration_complete": int(enumeration.complete), "updated_at": now}
+    if enumeration.connector_url:
+        mapping["connector_url"] = enumeration.connector_url
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(job_key(job_id), mapping=mapping)
+    pipe.hsetnx(job_key(job_id), "started_at", now)
+    pipe.expire(job_key(job_id), ttl)
+    await pipe.execute()
+
+
+async def get_job(redis_client: redis.asyncio.Redis, job_id: str) -> ScanJobModel | None:
+    counters = await redis_client.hgetall(job_key(job_id))
+    if not counters:
+        return None
+    return job_from_counters(job_id, {k.decode(): v.decode() for k, v in counters.items()})
+
+
+def job_from_counters(job_id: str, counters: dict[str, str], now: float = None) -> ScanJobModel:
+    now = now or time.time()
+    job = ScanJobModel(job_id=job_id,
+                       connector_url=counters.get("connector_url"),
+                       started_at=float(counters["started_at"]) if "started_at" in counters else None,
+                       updated_at=float(counters["updated_at"]) if "updated_at" in counters else None,
+                       enumeration_complete=counters.get("enumeration_complete") == "1",
+                       **{field: int(counters.get(field, 0))
+                          for field in ("enumerated", "skipped", "queued", "scanned", "not_scanned", "failed")})
+
+    job.completed = job.scanned + job.not_scanned + job.failed
+    job.in_flight = max(job.queued - job.completed, 0)
+    if job.started_at:
+        job.elapsed_seconds = max(now - job.started_at, 0)
+    if job.elapsed_seconds > 0:
+        job.enqueue_rate = job.queued / job.elapsed_seconds
+        job.completion_rate = job.completed / job.elapsed_seconds
+
+    if job.enumeration_complete:
+        # items listed but neither skipped nor queued failed to submit, and will never complete
+        job.remaining = max(job.queued - job.completed, 0)
+        job.status = "complete" if job.remaining == 0 else "enumerated"
+    if job.completion_rate > 0:
+        # until enumeration completes, this only covers what has been listed so far
+        outstanding = job.remaining if job.remaining is not None else \
+            max(job.enumerated - job.skipped - job.completed, job.in_flight)
+        job.eta_seconds = outstanding / job.completion_rate
+    return job
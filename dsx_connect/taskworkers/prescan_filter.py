@@ -0,0 +1,130 @@
+"""Pre-scan filtering of scan requests.
+
+Decides, before a file is sent to DSXA, whether it is worth scanning at all: files over a size limit,
+zero-byte files, and files with configured extensions or (sniffed) MIME types are given a synthesized
+NOT_SCANNED / UNSUPPORTED verdict instead.  MIME types are sniffed from the magic bytes at the start of the
+content, so only the first few KB of a skipped file ever need to be read from the connector.
+"""
+import fnmatch
+
+from dsx_connect.config import PreScanFilterConfig
+from dsx_connect.dsxa_client.verdict_models import DPAVerdictEnum, DPAVerdictModel2, DPAVerdictDetailsModel, \
+    DPAVerdictFileInfoModel
+
+PRESCAN_FILTER_EVENT = "Skipped by dsx-connect pre-scan filter"
+
+# (offset, signature, mime type) - checked in order, first match wins
+_MAGIC_SIGNATURES: list[tuple[int, bytes, str]] = [
+    (4, b"ftypqt", "video/quicktime"),
+    (4, b"ftypM4A", "audio/mp4"),
+    (4, b"ftypheic", "image/heic"),
+    (4, b"ftypmif1", "image/heif"),
+    (4, b"ftyp", "video/mp4"),
+    (0, b"\x1a\x45\xdf\xa3", "video/x-matroska"),
+    (0, b"FLV\x01", "video/x-flv"),
+    (0, b"\x00\x00\x01\xba", "video/mpeg"),
+    (0, b"\x00\x00\x01\xb3", "video/mpeg"),
+    (8, b"AVI ", "video/x-msvideo"),
+    (8, b"WAVE", "audio/wav"),
+    (8, b"WEBP", "image/webp"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"\xff\xfb", "audio/mpeg"),
+    (0, b"\xff\xf3", "audio/mpeg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF8", "image/gif"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"BZh", "application/x-bzip2"),
+    (0, b"\xfd7zXZ\x00", "application/x-xz"),
+    (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"Rar!", "application/vnd.rar"),
+    (0, b"%PDF", "application/pdf"),
+    (0, b"MZ", "application/x-msdownload"),
+    (0, b"\x7fELF", "application/x-executable"),
+]
+
+
+def sniff_mime_type(head: bytes) -> str:
+    """
+    Guess the MIME type of content from its first bytes.
+
+    Args:
+        head: the first few KB of the content.
+
+    Returns:
+        str: the sniffed MIME type, 'text/plain' for NUL-free UTF-8 text, otherwise 'application/octet-stream'.
+    """
+    for offset, signature, mime_type in _MAGIC_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime_type
+    # MPEG transport stream: sync byte repeated every 188 bytes
+    if len(head) > 376 and head[0] == head[188] == head[376] == 0x47:
+        return "video/mp2t"
+    if head and b"\x00" not in head:
+        try:
+            # the sample may end mid-character, so ignore a truncated tail
+            head.decode("utf-8")
+            return "text/plain"
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:
+                return "text/plain"
+    return "application/octet-stream"
+
+
+class PreScanFilter:
+    def __init__(self, filter_config: PreScanFilterConfig):
+        self._config = filter_config
+        self._skip_extensions = tuple(ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+                                      for ext in filter_config.skip_extensions)
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.enabled
+
+    @property
+    def sniff_bytes(self) -> int:
+        return self._config.sniff_bytes
+
+    def check_location(self, location: str) -> DPAVerdictModel2 | None:
+        """Check a file's location (extension) before any content has been read."""
+        if self._skip_extensions and location.lower().endswith(self._skip_extensions):
+            return self._verdict(DPAVerdictEnum.UNSUPPORTED, f"extension of {location} is excluded from scanning")
+        return None
+
+    def check_size(self, size_in_bytes: int, complete: bool = False) -> DPAVerdictModel2 | None:
+        """
+        Check a file's size.  size_in_bytes may be a running total while content is still being read
+        (complete=False), in which case only the maximum size is enforced.
+        """
+        max_size = self._config.max_file_size_in_bytes
+        if max_size >= 0 and size_in_bytes > max_size:
+            return self._verdict(DPAVerdictEnum.NOT_SCANNED,
+                                 f"file size exceeds the maximum of {max_size} bytes",
+                                 file_size_in_bytes=size_in_bytes)
+        if complete and size_in_bytes == 0 and self._config.skip_zero_byte_files:
+            return self._verdict(DPAVerdictEnum.NOT_SCANNED, "zero-byte file", file_size_in_bytes=0)
+        return None
+
+    def check_content(self, head: bytes) -> DPAVerdictModel2 | None:
+        """Check the first sniff_bytes of a file's content against the skipped MIME types."""
+        if not self._config.skip_mime_types:
+            return None
+        mime_type = sniff_mime_type(head)
+        for pattern in self._config.skip_mime_types:
+            if fnmatch.fnmatchcase(mime_type, pattern):
+                return self._verdict(DPAVerdictEnum.UNSUPPORTED, f"content type {mime_type} is excluded from scanning",
+                                     file_type=mime_type)
+        return None
+
+    @staticmethod
+    def _verdict(verdict: DPAVerdictEnum, reason: str, file_type: str = "Unknown",
+                 file_size_in_bytes: int = -1) -> DPAVerdictModel2:
+        return DPAVerdictModel2(
+            verdict=verdict,
+            verdict_details=DPAVerdictDetailsModel(event_description=PRESCAN_FILTER_EVENT, reason=reason),
+            file_info=DPAVerdictFileInfoModel(file_type=file_type, file_size_in_bytes=file_size_in_bytes)
+        )
@@ -25,15 +25,23 @@ Dependencies:
     - celery: For task queue management.
     - dsx_connect: Internal models, config, and client utilities.
 """
+import logging
 import threading
+import time
 from io import BytesIO
 from typing import Dict, Optional
 
 import httpx
-from celery.signals import worker_process_init
+import redis
+from celery.concurrency import get_implementation
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 from pydantic import ValidationError
+from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_log
 
+from dsx_connect.database.retention import RetentionSweeper
+from dsx_connect.database.scan_results_archive import ScanResultsArchiver
 from dsx_connect.database.scan_stats_worker import ScanStatsWorker
+from dsx_connect.database.write_behind import WriteBehindBuffer
 from dsx_connect.dsxa_client.verdict_models import DPAVerdictEnum, DPAVerdictModel2
 from dsx_connect.models.constants import ConnectorEndpoints
 from dsx_connect.database.scan_results_base_db import ScanResultsBaseDB
@@ -42,23 +50,34 @@ from dsx_connect.dsxa_client.dsxa_client import DSXAClient, DSXAScanRequest
 from dsx_connect.models.connector_models import ScanRequestModel
 from dsx_connect.models.responses import StatusResponse, StatusResponseEnum
 from dsx_connect.models.scan_models import ScanResultModel, ScanResultStatusEnum, ScanStatsModel
-from dsx_connect.taskqueue.celery_app import celery_app
-from dsx_connect.config import DatabaseConfig, ConfigDatabaseType
+from dsx_connect.taskqueue.celery_app import celery_app, taskqueue_redis_url
+from dsx_connect.taskqueue.result_channel import publish_scan_result
+from dsx_connect.taskqueue.scan_jobs import ScanJobCounter, increment_job_counter
+from dsx_connect.taskworkers.prescan_filter import PreScanFilter
+from dsx_connect.config import DatabaseConfig
 from dsx_connect.utils.logging import dsx_logging
 from dsx_connect.config import ConfigManager
 
 
 # Shared client pools and scan client per worker process
 _connector_clients: Dict[str, httpx.Client] = {}
+_dsxa_client: Optional[DSXAClient] = None
+_prescan_filter: Optional[PreScanFilter] = None
 # Lock for thread-safe access to the client pool
 _client_pool_lock = threading.Lock()
 _redis_client = None
 _scan_results_db: Optional[ScanResultsBaseDB] = None  # Assuming initialized via database_scan_results_factory
 _scan_stats_db: Optional[ScanStatsBaseDB] = None  # Assuming initialized via database_scan_stats_factory
 _scan_stats_worker: Optional[ScanStatsWorker] = None  # Assuming initialized via passing _scan_stats_db
+_retention_sweeper: Optional[RetentionSweeper] = None
+_scan_results_archiver: Optional[ScanResultsArchiver] = None  # None unless archival is configured
+_scan_result_writer: Optional[WriteBehindBuffer] = None  # (ScanResultModel, ScanRequestModel) pairs to be stored
 
 config = ConfigManager.reload_config()
 
+# Requests to connectors are bodies pre-serialized by pydantic, rather than dicts run through json.dumps by httpx
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 def get_connector_client(connector_url: str) -> httpx.Client:
     """
     Retrieve or create an httpx.Client for the given connector_url.
@@ -77,6 +96,107 @@ def get_connector_client(connector_url: str) -> httpx.Client:
         return _connector_clients[connector_url]
 
 
+def get_dsxa_client() -> DSXAClient:
+    """
+    Retrieve or create the DSXAClient shared by all scans in this worker process.  Sharing the client keeps
+    its connection pool and the scan latency history (used to decide when to hedge a scan) alive across tasks.
+
+    Returns:
+        DSXAClient: The scan client for this worker process.
+    """
+    global _dsxa_client
+    with _client_pool_lock:
+        if _dsxa_client is None:
+            scanner = config.scanner
+            _dsxa_client = DSXAClient(scan_binary_url=scanner.scan_binary_url,
+                                      hedge_enabled=scanner.hedge_enabled,
+                                      hedge_scan_binary_urls=scanner.hedge_scan_binary_urls,
+                                      hedge_max_ratio=scanner.hedge_max_ratio,
+                                      hedge_overload_cooldown_seconds=scanner.hedge_overload_cooldown_seconds,
+                                      hedge_max_in_flight=scanner.hedge_max_in_flight)
+            dsx_logging.debug(f"Created DSXAClient for {scanner.scan_binary_url} (hedging: {scanner.hedge_enabled})")
+        return _dsxa_client
+
+
+def get_redis_client() -> Optional[redis.Redis]:
+    """
+    Retrieve or create the Redis client used to publish live scan results and count scan job progress from this
+    worker process.
+
+    Returns:
+        redis.Redis | None: The client, or None if there is no Redis (see taskqueue_redis_url).
+    """
+    global _redis_client
+    with _client_pool_lock:
+        if _redis_client is None:
+            url = taskqueue_redis_url(config.taskqueue)
+            if url is None:
+                return None
+            _redis_client = redis.Redis.from_url(url)
+            dsx_logging.debug("Created Redis client for live scan results and scan job tracking")
+        return _redis_client
+
+
+def _count_job_item(scan_request: ScanRequestModel, counter: ScanJobCounter):
+    """Count a scan request that is part of a full scan job against its job."""
+    if scan_request.scan_job_id:
+        redis_client = get_redis_client()
+        if redis_client is not None:
+            increment_job_counter(redis_client, scan_request.scan_job_id, counter, config.taskqueue.scan_job_ttl_seconds)
+
+
+def get_prescan_filter() -> PreScanFilter:
+    global _prescan_filter
+    if _prescan_filter is None:
+        _prescan_filter = PreScanFilter(config.prescan_filter)
+    return _prescan_filter
+
+
+def _read_file(client: httpx.Client, scan_request: ScanRequestModel) -> tuple[BytesIO | None, DPAVerdictModel2 | None]:
+    """
+    Stream a file from the connector's read_file endpoint.  With the pre-scan filter enabled, the size and sniffed
+    content type are checked as the content arrives, and the transfer is abandoned as soon as the file is ruled out.
+
+    Returns:
+        tuple: (file content, None) if the file should be scanned, otherwise (None, pre-scan verdict).
+    """
+    prescan_filter = get_prescan_filter()
+    with client.stream("POST",
+                       f'{scan_request.connector_url}{ConnectorEndpoints.READ_FILE}',
+                       content=scan_request.model_dump_json(),
+                       headers=_JSON_HEADERS) as response:
+        response.raise_for_status()  # Raises HTTPError for 4xx/5xx responses
+        if not prescan_filter.enabled:
+            return BytesIO(response.read()), None
+
+        content_length = response.headers.get("content-length")
+        if content_length is not None:
+            prescan_verdict = prescan_filter.check_size(int(content_length))
+            if prescan_verdict:
+                return None, prescan_verdict
+
+        bytes_content = BytesIO()
+        sniffed = False
+        for chunk in response.iter_bytes():
+            bytes_content.write(chunk)
+            size = bytes_content.tell()
+            prescan_verdict = prescan_filter.check_size(size)
+            if not prescan_verdict and not sniffed and size >= prescan_filter.sniff_bytes:
+                sniffed = True
+                prescan_verdict = prescan_filter.check_content(bytes_content.getvalue()[:prescan_filter.sniff_bytes])
+            if prescan_verdict:
+                return None, prescan_verdict
+
+    size = bytes_content.tell()
+    prescan_verdict = prescan_filter.check_size(size, complete=True)
+    if not prescan_verdict and not sniffed and size > 0:
+        prescan_verdict = prescan_filter.check_content(bytes_content.getvalue())
+    if prescan_verdict:
+        return None, prescan_verdict
+    bytes_content.seek(0)
+    return bytes_content, None
+
+
 @worker_process_init.connect
 def init_worker(**kwargs):
     """Initialize shared httpx.Client for scan requests and empty connector client pool."""
@@ -84,27 +204,51 @@ def init_worker(**kwargs):
     global _scan_results_db
     global _scan_stats_db
     global _scan_stats_worker
+    global _dsxa_client
+    global _redis_client
+    global _retention_sweeper
+    global _scan_results_archiver
+    global _scan_result_writer
     _connector_clients = {}
+    _dsxa_client = None
+    _redis_client = None
     dsx_logging.debug("Initialized shared httpx.Client for scan requests and empty connector pool")
 
-    from dsx_connect.database.database_factory import database_scan_results_factory
+    from dsx_connect.database.database_factory import database_scan_results_factory, scan_results_archiver_factory
     db_config = DatabaseConfig()
     _scan_results_db = database_scan_results_factory(
         database_type=db_config.type,
         database_loc=db_config.loc,
         retain=db_config.retain,
-        collection_name="scan_results"
+        collection_name="scan_results",
+        retain_seconds=db_config.retain_seconds,
+        retention_sweep_interval=db_config.retention_sweep_interval_seconds,
+        archived=bool(db_config.archive_dir)
     )
     dsx_logging.info(f"Initialized scan results database of type {db_config.type} at {db_config.loc}")
-
-    from dsx_connect.database.database_factory import database_scan_stats_factory
+    _scan_results_archiver = scan_results_archiver_factory(_scan_results_db, db_config.archive_dir,
+                                                           archive_after_seconds=db_config.archive_after_seconds,
+                                                           archive_interval=db_config.archive_interval_seconds)
+    if db_config.retain > 0 or db_config.retain_seconds > 0 or _scan_results_archiver is not None:
+        _retention_sweeper = RetentionSweeper(_scan_results_db, interval=db_config.retention_sweep_interval_seconds,
+                                              archiver=_scan_results_archiver)
+        _retention_sweeper.start()
+
+    from dsx_connect.database.database_factory import database_scan_stats_factory, scan_stats_rollups_factory
     from dsx_connect.database.scan_stats_worker import ScanStatsWorker
     _scan_stats_db = database_scan_stats_factory(
-        database_type=ConfigDatabaseType.TINYDB,
+        database_type=db_config.scan_stats_db_type,
         database_loc=db_config.scan_stats_db,
         collection_name="scan_stats"
     )
-    _scan_stats_worker = ScanStatsWorker(_scan_stats_db)
+    rollups = scan_stats_rollups_factory(database_loc=db_config.scan_stats_rollups_db,
+                                         retain_minutes=db_config.scan_stats_rollup_minutes,
+                                         retain_hours=db_config.scan_stats_rollup_hours,
+                                         retain_days=db_config.scan_stats_rollup_days)
+    _scan_stats_worker = ScanStatsWorker(_scan_stats_db, rollups=rollups)
+    _scan_result_writer = WriteBehindBuffer(_store_scan_results, max_batch_size=db_config.write_batch_size,
+                                            flush_interval=db_config.write_batch_interval_seconds,
+                                            name="scan-result-writer")
     dsx_logging.debug("Initialized shared httpx.Client and database")
 
     # By initializing syslog inside init_worker, each worker process gets its own syslog handler, ensuring thread/process
@@ -117,6 +261,73 @@ def init_worker(**kwargs):
     init_syslog_handler(syslog_host="localhost", syslog_port=514)
 
 
+@worker_init.connect
+def init_main_process_worker(sender=None, **kwargs):
+    """
+    The solo and threads pools run tasks in the worker's main process, which doesn't get worker_process_init.
+    With prefork the main process runs no tasks, and each pool process initializes itself.
+    """
+    if sender is None or get_implementation(sender.pool_cls).__module__.endswith("prefork"):
+        return
+    if _scan_result_writer is None:  # not already initialized, e.g. by dsx-connect-workers-start.py
+        init_worker()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+    # write out buffered scan results before the process goes away.  Pool processes (prefork) get
+    # worker_process_shutdown; the solo and threads pools run tasks in the main process, which only gets
+    # worker_shutdown.
+    if _scan_result_writer is not None:
+        _scan_result_writer.close()
+    if _retention_sweeper is not None:
+        _retention_sweeper.stop()
+
+
+@retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=0.5, min=0.5, max=5),
+    reraise=True,
+    before_sleep=before_sleep_log(dsx_logging, log_level=logging.WARNING),
+)
+def _insert_scan_results(scan_results: list[ScanResultModel]):
+    # the results were acknowledged before being written, so a transient database error must not lose them
+    _scan_results_db.insert_many(scan_results)
+
+
+def _store_scan_results(batch: list[tuple[ScanResultModel, ScanRequestModel]]):
+    """
+    Write a batch of scan results: one bulk insert, then one stats update, then publish each result for live
+    streaming and count it against its scan job.
+    """
+    scan_results = [scan_result for scan_result, _ in batch]
+    try:
+        _insert_scan_results(scan_results)
+        dsx_logging.info(f"Stored {len(scan_results)} scan results in database")
+    except Exception as e:
+        dsx_logging.error(f"Failed to store {len(scan_results)} scan results: {e}", exc_info=True)
+        for _, scan_request in batch:
+            _count_job_item(scan_request, ScanJobCounter.FAILED)
+        return
+
+    redis_client = get_redis_client()
+    if redis_client is not None and config.taskqueue.scan_result_channel:
+        for scan_result in scan_results:
+            publish_scan_result(redis_client, config.taskqueue.scan_result_channel, scan_result)
+
+    # files skipped before scanning have no scan time or size to contribute
+    try:
+        _scan_stats_worker.insert_many([scan_result for scan_result in scan_results
+                                        if scan_result.status == ScanResultStatusEnum.SCANNED])
+    except Exception as e:
+        dsx_logging.error(f"Failed to update scan stats: {e}", exc_info=True)
+
+    for scan_result, scan_request in batch:
+        _count_job_item(scan_request, ScanJobCounter.SCANNED if scan_result.status == ScanResultStatusEnum.SCANNED
+                        else ScanJobCounter.NOT_SCANNED)
+
+
 @celery_app.task(name=config.taskqueue.scan_request_task)
 def scan_request_task(scan_request_dict: dict) -> dict:
     """
@@ -142,7 +353,7 @@ def scan_request_task(scan_request_dict: dict) -> dict:
 
     # 1. Validate and parse scan request
     try:
-        scan_request = ScanRequestModel(**scan_request_dict)
+        scan_request = ScanRequestModel.model_validate(scan_request_dict)
         dsx_logging.debug(f"Processing scan request for {scan_request.location} with {scan_request.connector_url}")
     except ValidationError as e:
         dsx_logging.error(f"Failed to validate scan request: {e}", exc_info=True)
@@ -153,36 +364,61 @@ def scan_request_task(scan_request_dict: dict) -> dict:
             id=task_id
         ).model_dump()
 
-    # 2. Fetch file content from connector
-    try:
-        client = get_connector_client(scan_request.connector_url)
-        response = client.post(
-            f'{scan_request.connector_url}{ConnectorEndpoints.READ_FILE}',
-            json=scan_request.model_dump()
-        )
-        response.raise_for_status()  # Raises HTTPError for 4xx/5xx responses
-        bytes_content = BytesIO(response.content)
-        bytes_content.seek(0)
-        dsx_logging.debug(f"Received {bytes_content.getbuffer().nbytes} bytes")
-    except httpx.HTTPError as e:
-        dsx_logging.error(f"Failed to fetch file from connector: {e}", exc_info=True)
-        return StatusResponse(
-            status=StatusResponseEnum.ERROR,
-            message="Failed to fetch file from connector",
-            description=f"HTTP error: {str(e)}",
-            id=task_id
-        ).model_dump()
-    except Exception as e:
-        dsx_logging.error(f"Unexpected error while fetching file: {e}", exc_info=True)
+    # 2. Fetch file content from connector, unless the pre-scan filter rules the file out first
+    prescan_verdict = get_prescan_filter().check_location(scan_request.location) if get_prescan_filter().enabled else None
+    if not prescan_verdict:
+        try:
+            client = get_connector_client(scan_request.connector_url)
+            bytes_content, prescan_verdict = _read_file(client, scan_request)
+            if bytes_content:
+                dsx_logging.debug(f"Received {bytes_content.getbuffer().nbytes} bytes")
+        except httpx.HTTPError as e:
+            dsx_logging.error(f"Failed to fetch file from connector: {e}", exc_info=True)
+            _count_job_item(scan_request, ScanJobCounter.FAILED)
+            return StatusResponse(
+                status=StatusResponseEnum.ERROR,
+                message="Failed to fetch file from connector",
+                description=f"HTTP error: {str(e)}",
+                id=task_id
+            ).model_dump()
+        except Exception as e:
+            dsx_logging.error(f"Unexpected error while fetching file: {e}", exc_info=True)
+            _count_job_item(scan_request, ScanJobCounter.FAILED)
+            return StatusResponse(
+                status=StatusResponseEnum.ERROR,
+                message="Unexpected error while fetching file",
+                description=str(e),
+                id=task_id
+            ).model_dump()
+
+    if prescan_verdict:
+        # Nothing to act on, but the skipped file is still recorded as a scan result
+        dsx_logging.info(f"Pre-scan filter skipped {scan_request.location}: {prescan_verdict.verdict_details.reason}")
+        try:
+            celery_app.send_task(
+                config.taskqueue.scan_result_task,
+                queue=config.taskqueue.scan_result_queue,
+                args=[scan_request_dict, prescan_verdict.model_dump(mode="json"), task_id,
+                      ScanResultStatusEnum.NOT_SCANNED]
+            )
+        except Exception as e:
+            dsx_logging.error(f"Queue dispatch failed: {e}", exc_info=True)
+            _count_job_item(scan_request, ScanJobCounter.FAILED)
+            return StatusResponse(
+                status=StatusResponseEnum.ERROR,
+                message=f"Failed to send scan result to queue {config.taskqueue.scan_result_queue}",
+                description=str(e),
+                id=task_id
+            ).model_dump()
         return StatusResponse(
-            status=StatusResponseEnum.ERROR,
-            message="Unexpected error while fetching file",
-            description=str(e),
+            status=StatusResponseEnum.SUCCESS,
+            message=f"Scan skipped for {scan_request.location}",
+            description=f"Complete scan information: {scan_request}; verdict {prescan_verdict}",
             id=task_id
         ).model_dump()
 
     # 3. Scan the file with DSXAClient
-    dsxa_client = DSXAClient(scan_binary_url=config.scanner.scan_binary_url)
+    dsxa_client = get_dsxa_client()
     try:
         metadata_info = f"file-tag:{scan_request.metainfo}"
         if task_id:
@@ -196,6 +432,7 @@ def scan_request_task(scan_request_dict: dict) -> dict:
         dsx_logging.debug(f"Verdict: {dpa_verdict.verdict}")
     except Exception as e:
         dsx_logging.error(f"Scan failed: {e}", exc_info=True)
+        _count_job_item(scan_request, ScanJobCounter.FAILED)
         return StatusResponse(
             status=StatusResponseEnum.ERROR,
             message="Failed to scan file",
@@ -205,11 +442,12 @@ def scan_request_task(scan_request_dict: dict) -> dict:
 
     # 4. Send verdict to verdict queue with original task_id
     try:
+        verdict_dict = dpa_verdict.model_dump(mode="json")  # serialized once, shared by both queues
         # Send to verdict_action_queue for action-taking
         task1 = celery_app.send_task(
             config.taskqueue.verdict_action_task,
             queue=config.taskqueue.verdict_action_queue,
-            args=[scan_request_dict, dpa_verdict.model_dump(), task_id]
+            args=[scan_request_dict, verdict_dict, task_id]
         )
         dsx_logging.debug(f"Sent verdict for {scan_request.location} to {config.taskqueue.verdict_action_queue} with task_id {task1.id}")
 
@@ -217,12 +455,13 @@ def scan_request_task(scan_request_dict: dict) -> dict:
         task2 = celery_app.send_task(
             config.taskqueue.scan_result_task,
             queue=config.taskqueue.scan_result_queue,
-            args=[scan_request_dict, dpa_verdict.model_dump(), task_id]
+            args=[scan_request_dict, verdict_dict, task_id]
         )
         dsx_logging.debug(f"Sent scan result for {scan_request.location} to {config.taskqueue.scan_result_queue} with task_id {task2.id}")
 
     except Exception as e:
         dsx_logging.error(f"Scan or queue dispatch failed: {e}", exc_info=True)
+        _count_job_item(scan_request, ScanJobCounter.FAILED)
         return StatusResponse(
             status=StatusResponseEnum.ERROR,
             message=f"Failed to send scan result to queue {config.taskqueue.verdict_action_queue} and/or {config.taskqueue.scan_result_queue}",
@@ -263,8 +502,8 @@ def verdict_action_task(scan_request_dict: dict, verdict_dict: dict, original_ta
     dsx_logging.debug(f"Processing verdict task {verdict_task_id} from origin scan task {original_task_id}")
     # 1. Validate and parse scan request and verdict
     try:
-        scan_request = ScanRequestModel(**scan_request_dict)
-        verdict = DPAVerdictModel2(**verdict_dict)
+        scan_request = ScanRequestModel.model_validate(scan_request_dict)
+        verdict = DPAVerdictModel2.model_validate(verdict_dict)
         dsx_logging.debug(f"Processing {scan_request} for scan verdict: {verdict}")
     except ValidationError as e:
         dsx_logging.error(f"Failed to validate scan request or verdict: {e}", exc_info=True)
@@ -286,7 +525,8 @@ def verdict_action_task(scan_request_dict: dict, verdict_dict: dict, original_ta
             client = get_connector_client(scan_request.connector_url)
             response = client.post(
                 f'{scan_request.connector_url}{ConnectorEndpoints.ITEM_ACTION}',
-                json=scan_request.model_dump()
+                content=scan_request.model_dump_json(),
+                headers=_JSON_HEADERS
             )
             response.raise_for_status()
             dsx_logging.info(f"Item action triggered successfully for {scan_request.location}")
@@ -308,30 +548,34 @@ def verdict_action_task(scan_request_dict: dict, verdict_dict: dict, original_ta
 
 
 @celery_app.task(name=config.taskqueue.scan_result_task)
-def scan_result_task(scan_request_dict: dict, verdict_dict: dict, original_task_id: str = None) -> dict:
+def scan_result_task(scan_request_dict: dict, verdict_dict: dict, original_task_id: str = None,
+                     scan_status: str = ScanResultStatusEnum.SCANNED) -> dict:
     """
     Processes scan results for persistence, statistics and logging.
 
-    This task consumes scan results from the scan_result_queue, constructs a ScanResultModel,
-    and persists it in the configured database, computes statistics on scans and outputs syslog if configured.
+    This task consumes scan results from the scan_result_queue, constructs a ScanResultModel and
+    outputs syslog if configured.  The result is persisted in the configured database, and statistics computed,
+    by the worker's scan result writer: before the task completes, or in batches if DatabaseConfig.write_batch_size
+    is set above 1.
 
     Args:
         scan_request_dict: A dictionary containing scan request details (ScanRequestModel).
         verdict_dict: A dictionary containing verdict details (DPAVerdictModel2).
         original_task_id: The task ID of the originating scan_request_task (optional).
+        scan_status: ScanResultStatusEnum of the result, NOT_SCANNED for files skipped by the pre-scan filter.
 
     Returns:
         dict: A StatusResponse dictionary indicating success or failure.
 
     Raises:
-        ValidationError: If scan request or verdict data is invalid.
-        Other exceptions may propagate if database or syslog operations fail.
+        Other exceptions may propagate if syslog operations fail.  Database failures are logged (and counted
+        against the result's scan job) by the writer.
     """
     task_id = scan_result_task.request.id if hasattr(scan_result_task, 'request') else original_task_id
 
     try:
-        scan_request: ScanRequestModel = ScanRequestModel(**scan_request_dict)
-        dpa_verdict = DPAVerdictModel2(**verdict_dict)
+        scan_request: ScanRequestModel = ScanRequestModel.model_validate(scan_request_dict)
+        dpa_verdict = DPAVerdictModel2.model_validate(verdict_dict)
         dsx_logging.debug(f"Processing scan result for {scan_request.location} (task_id: {task_id}) (original task id: {original_task_id} ")
     except ValidationError as e:
         dsx_logging.error(f"Failed to validate scan result: {e}", exc_info=True)
@@ -342,31 +586,23 @@ def scan_result_task(scan_request_dict: dict, verdict_dict: dict, original_task_
             id=task_id
         ).model_dump()
 
-    try:
-        # Construct and store scan result in database
-        scan_result = ScanResultModel(
-            scan_request_task_id=original_task_id,
-            metadata_tag=scan_request.metainfo,
-            status=ScanResultStatusEnum.SCANNED,
-            dpa_verdict=dpa_verdict.model_dump()
-        )
-        _scan_results_db.insert(scan_result)
-        dsx_logging.info(f"Stored scan result for {scan_request.location} in database")
-
-        _scan_stats_worker.insert(scan_result)
-        dsx_logging.info(f"Stored scan stats for {scan_request.location} in database")
-
-    except Exception as e:
-        dsx_logging.error(f"Failed to store scan result: {e}", exc_info=True)
-        return StatusResponse(
-            status=StatusResponseEnum.ERROR,
-            message="Failed to store scan result",
-            description=f"str(e) for task_id= {task_id}",
-        ).model_dump()
+    # Construct the scan result and hand it to the writer, which stores results (and updates stats) in batches.
+    # Unless the writer's batch size is 1, the result is written after this task completes.
+    scan_result = ScanResultModel(
+        scan_request_task_id=original_task_id,
+        metadata_tag=scan_request.metainfo,
+        status=scan_status,
+        dpa_verdict=dpa_verdict,
+        connector_url=scan_request.connector_url,
+        timestamp=time.time()
+    )
+    if _scan_result_writer is not None:
+        _scan_result_writer.add((scan_result, scan_request))
+    else:
+        _store_scan_results([(scan_result, scan_request)])
 
     from dsx_connect.utils.log_chain import log_verdict_chain
 
-    # After _scan_results_db.insert(scan_result)
     log_verdict_chain(
         scan_request=scan_request,
         verdict=dpa_verdict,
@@ -377,6 +613,29 @@ def scan_result_task(scan_request_dict: dict, verdict_dict: dict, original_task_
 
     return StatusResponse(
         status=StatusResponseEnum.SUCCESS,
-        message=f"Scan result stored for {scan_request.location}",
+        message=f"Scan result for {scan_request.location} queued for storage",
         description=f"Scan result: {scan_result} for task_id= {task_id}"
     ).model_dump()
+
+
+@celery_app.task(name=config.taskqueue.archive_scan_results_task)
+def archive_scan_results_task(older_than_seconds: float | None = None) -> dict:
+    """
+    Archive scan results to Parquet now, rather than waiting for the periodic archival.
+
+    Args:
+        older_than_seconds: archive results stored longer ago than this, by default archive_after_seconds.
+    """
+    if _scan_results_archiver is None:
+        return StatusResponse(
+            status=StatusResponseEnum.ERROR,
+            message="Scan results archival is not configured",
+            description="Requires results_database.archive_dir to be set and pyarrow to be installed"
+        ).model_dump()
+    older_than = time.time() - older_than_seconds if older_than_seconds is not None else None
+    archived = _scan_results_archiver.archive(older_than)
+    return StatusResponse(
+        status=StatusResponseEnum.SUCCESS,
+        message=f"Archived {archived} scan results",
+        description=f"Archived to {_scan_results_archiver.archive_dir}"
+    ).model_dump()
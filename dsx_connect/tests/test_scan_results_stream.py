@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+os.environ.setdefault("DSXCONNECT_TASKQUEUE__BROKER", "memory://")
+os.environ.setdefault("DSXCONNECT_TASKQUEUE__BACKEND", "cache+memory://")
+
+from dsx_connect.app.routers import scan_results  # noqa: E402
+from dsx_connect.models.scan_models import ScanResultModel, ScanResultsQuery  # noqa: E402
+from dsx_connect.taskqueue.result_channel import ScanResultBroadcaster  # noqa: E402
+
+
+class _Request:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+class _ResultsDB:
+    def __init__(self, ids: list[int]):
+        self._ids = ids
+
+    async def iter_query(self, query: ScanResultsQuery):
+        for result_id in self._ids:
+            yield ScanResultModel(id=result_id, scan_request_task_id=str(result_id))
+
+
+def _stream_ids(monkeypatch, live_ids: list[int], cursor: int | None = None, stored_ids: list[int] = ()) -> list[int]:
+    broadcaster = ScanResultBroadcaster("redis://unused", "scan_results")
+    monkeypatch.setattr(scan_results, "scan_result_broadcaster", broadcaster)
+    monkeypatch.setattr(scan_results, "get_async_results_database", lambda: _ResultsDB(list(stored_ids)))
+    query = ScanResultsQuery(cursor=cursor, limit=1000, descending=False)
+
+    async def collect() -> list[int]:
+        stream = scan_results._stream_scan_results(_Request(), query)
+        events = []
+        # the catch-up is sent first, then the stream waits on the live results
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        for result_id in live_ids:
+            broadcaster._dispatch(ScanResultModel(id=result_id, scan_request_task_id=str(result_id)))
+        events.append(await first)
+        expected = len(set(stored_ids) | set(live_ids))
+        while len(events) < expected:
+            events.append(await asyncio.wait_for(stream.__anext__(), timeout=1))
+        await stream.aclose()
+        return [int(event.split("\n", 1)[0].removeprefix("id: ")) for event in events]
+
+    return asyncio.run(collect())
+
+
+def test_stream_delivers_results_arriving_out_of_id_order(monkeypatch):
+    assert _stream_ids(monkeypatch, [101, 100, 102]) == [101, 100, 102]
+
+
+def test_stream_skips_only_results_already_sent_by_the_catch_up(monkeypatch):
+    # 11 and 12 were stored while catching up, 9 was stored (by another worker) just after
+    ids = _stream_ids(monkeypatch, [11, 9, 12, 13], cursor=8, stored_ids=[10, 11, 12])
+    assert ids == [10, 11, 12, 9, 13]
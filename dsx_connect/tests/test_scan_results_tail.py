@@ -0,0 +1,29 @@
+from dsx_connect.app.scan_results_tail import ScanResultsTail
+from dsx_connect.models.scan_models import ScanResultModel, ScanResultsQuery
+
+
+def _tail(seeded_ids: list[int]) -> ScanResultsTail:
+    tail = ScanResultsTail(broadcaster=None, size=100)
+    tail._ids = list(seeded_ids)
+    tail._results = {result_id: ScanResultModel(id=result_id, scan_request_task_id=str(result_id))
+                     for result_id in seeded_ids}
+    tail._complete = seeded_ids[-1]
+    return tail
+
+
+def _page_ids(tail: ScanResultsTail, **query) -> list[int]:
+    page = tail.query_page(ScanResultsQuery(limit=10, **query))
+    return [scan_result.id for scan_result in page.results]
+
+
+def test_tail_answers_only_up_to_an_id_that_has_not_arrived(monkeypatch):
+    monkeypatch.setattr(ScanResultsTail, "ready", True)
+    tail = _tail([1, 2, 3])
+    tail._add(ScanResultModel(id=5, scan_request_task_id="5"))
+    # 4 is still on its way: a poller handed 5 would never see it
+    assert _page_ids(tail, since_id=3, descending=False) == []
+    assert _page_ids(tail, descending=True) == [3, 2, 1]
+
+    tail._add(ScanResultModel(id=4, scan_request_task_id="4"))
+    assert _page_ids(tail, since_id=3, descending=False) == [4, 5]
+    assert _page_ids(tail, descending=True) == [5, 4, 3, 2, 1]
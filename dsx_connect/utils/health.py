@@ -0,0 +1,128 @@
+"""
+Background health probing.
+
+Each HealthProbe runs its check on an interval in the background and keeps the latest outcome and a short latency
+history.  Health endpoints report the cached state, so however often a load balancer polls them, dependencies are
+probed at the configured interval.  Checks should be cheap reachability tests, not real work (e.g. no scans).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from dsx_connect.models.health_models import HealthCheckModel, HealthReportModel, HealthStatusEnum
+from dsx_connect.utils.logging import dsx_logging
+
+
+class HealthProbe:
+    def __init__(self, name: str, check: Callable[[], Awaitable[str | None]], critical: bool = True,
+                 interval: float = 10.0, timeout: float = 5.0, history: int = 30):
+        """
+        Args:
+            name: name of the dependency probed.
+            check: coroutine function that raises if the dependency is unhealthy, optionally returning a message.
+            critical: whether the service is unhealthy (rather than degraded) when this check fails.
+            interval: seconds between probes.
+            timeout: seconds a probe may take before it counts as failed.
+            history: number of latencies kept.
+        """
+        self.name = name
+        self._check = check
+        self._interval = interval
+        self._timeout = timeout
+        self._latencies: deque[float] = deque(maxlen=history)
+        self._state = HealthCheckModel(name=name, critical=critical)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def state(self) -> HealthCheckModel:
+        return self._state.model_copy(update={"latency_history_ms": list(self._latencies)})
+
+    @property
+    def healthy(self) -> bool:
+        return self._state.status == HealthStatusEnum.HEALTHY
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def probe(self) -> HealthCheckModel:
+        """Run the check once, now, and record the outcome."""
+        start = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(self._check(), timeout=self._timeout)
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            self._latencies.append(latency_ms)
+            if self._state.status != HealthStatusEnum.HEALTHY:
+                dsx_logging.info(f"Health check {self.name} is healthy")
+            self._state = self._state.model_copy(update={
+                "status": HealthStatusEnum.HEALTHY, "message": message, "last_checked": time.time(),
+                "last_healthy": time.time(), "consecutive_failures": 0, "latency_ms": latency_ms})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                message = f"no response within {self._timeout}s"
+            else:
+                message = str(e) or type(e).__name__
+            if self._state.status != HealthStatusEnum.UNHEALTHY:
+                dsx_logging.warning(f"Health check {self.name} failed: {message}")
+            self._state = self._state.model_copy(update={
+                "status": HealthStatusEnum.UNHEALTHY, "message": message, "last_checked": time.time(),
+                "consecutive_failures": self._state.consecutive_failures + 1, "latency_ms": None})
+        return self.state
+
+    async def _run(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(self._interval)
+
+
+class HealthMonitor:
+    def __init__(self, probes: list[HealthProbe] = None):
+        self._probes: dict[str, HealthProbe] = {probe.name: probe for probe in probes or []}
+        self._started = False
+
+    def add(self, probe: HealthProbe):
+        self._probes[probe.name] = probe
+        if self._started:
+            probe.start()
+
+    async def remove(self, name: str):
+        probe = self._probes.pop(name, None)
+        if probe:
+            await probe.stop()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._probes
+
+    def get(self, name: str) -> HealthProbe | None:
+        return self._probes.get(name)
+
+    def start(self):
+        self._started = True
+        for probe in self._probes.values():
+            probe.start()
+
+    async def stop(self):
+        self._started = False
+        await asyncio.gather(*(probe.stop() for probe in self._probes.values()))
+
+    def report(self) -> HealthReportModel:
+        checks = {name: probe.state for name, probe in self._probes.items()}
+        status = HealthStatusEnum.HEALTHY
+        for check in checks.values():
+            if check.status == HealthStatusEnum.UNHEALTHY:
+                if check.critical:
+                    status = HealthStatusEnum.UNHEALTHY
+                    break
+                status = HealthStatusEnum.DEGRADED
+            elif check.status == HealthStatusEnum.UNKNOWN and status == HealthStatusEnum.HEALTHY:
+                status = HealthStatusEnum.UNKNOWN
+        return HealthReportModel(status=status, checks=checks)
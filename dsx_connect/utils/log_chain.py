@@ -1,11 +1,12 @@
 import logging
 import logging.handlers
-import json
 import socket
 from datetime import datetime
 
 from typing import Optional
 
+import orjson
+
 from dsx_connect.config import SecurityConfig
 from dsx_connect.dsxa_client.verdict_models import DPAVerdictEnum
 from dsx_connect.models.scan_models import DPAVerdictModel2
@@ -59,14 +60,14 @@ def log_verdict_chain(
             "original_task_id": original_task_id,
             "current_task_id": current_task_id,
             "timestamp": datetime.utcnow().isoformat(),
-            "scan_request": scan_request.model_dump(),
-            "verdict": verdict.model_dump(),
+            "scan_request": scan_request.model_dump(mode="json"),
+            "verdict": verdict.model_dump(mode="json"),
             "item_action": {
                 "triggered": verdict.verdict == DPAVerdictEnum.MALICIOUS,
                 "success": item_action_success if verdict.verdict == DPAVerdictEnum.MALICIOUS else None
             }
         }
-        syslog_message = json.dumps(log_data)
+        syslog_message = orjson.dumps(log_data).decode()
         logger = logging.getLogger("verdict_chain")
         logger.setLevel(logging.INFO)
         logger.addHandler(_syslog_handler)
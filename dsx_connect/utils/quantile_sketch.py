@@ -0,0 +1,94 @@
+"""
+A mergeable quantile sketch with bounded memory and relative error, after DDSketch.
+
+Values are counted in logarithmic bins, each GAMMA times as wide as the one before, so a quantile read back is
+within (GAMMA - 1) / (GAMMA + 1) (~2%) of the true value, however many values were added and whatever their
+spread.  Sketches of the same GAMMA merge exactly, by adding their bin counts, so sketches kept by separate
+workers (or for separate time buckets) combine into the sketch of all their values.
+"""
+import math
+
+GAMMA = 1.04
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bin_of(value: float) -> int:
+    """The bin of a value >= 1: bin i holds (GAMMA^(i-1), GAMMA^i]."""
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def bin_value(value_bin: int) -> int:
+    # the midpoint, relative to its width, of the bin's range
+    return round(2 * GAMMA ** value_bin / (GAMMA + 1))
+
+
+class QuantileSketch:
+    def __init__(self, max_bins: int = 2048):
+        """
+        Args:
+            max_bins: the most bins kept.  Beyond that the lowest bins are collapsed together, which only costs
+                accuracy at the low quantiles.  Integers up to 2^63 span fewer than 1200 bins.
+        """
+        self.max_bins = max_bins
+        self.bins: dict[int, int] = {}
+        self.zeros = 0  # values below 1, counted as 0
+        self.count = 0
+
+    @classmethod
+    def from_dict(cls, sketch: dict | None, max_bins: int = 2048) -> 'QuantileSketch':
+        """A sketch from its to_dict() (in which, via JSON, the bins may be strings), empty if None."""
+        restored = cls(max_bins)
+        if sketch:
+            restored.zeros = int(sketch.get('zeros', 0))
+            restored.bins = {int(value_bin): int(count) for value_bin, count in sketch.get('bins', {}).items()}
+            restored.count = restored.zeros + sum(restored.bins.values())
+            restored._collapse()
+        return restored
+
+    def to_dict(self) -> dict:
+        return {'zeros': self.zeros, 'bins': dict(self.bins)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        if value < 1:
+            self.zeros += count
+            return
+        value_bin = bin_of(value)
+        if value_bin in self.bins:
+            self.bins[value_bin] += count
+        else:
+            self.bins[value_bin] = count
+            self._collapse()
+
+    def merge(self, other: 'QuantileSketch'):
+        """Add other's values to this sketch."""
+        self.zeros += other.zeros
+        self.count += other.count
+        for value_bin, count in other.bins.items():
+            self.bins[value_bin] = self.bins.get(value_bin, 0) + count
+        self._collapse()
+
+    def _collapse(self):
+        if len(self.bins) <= self.max_bins:
+            return
+        value_bins = sorted(self.bins)
+        lowest_kept = value_bins[-self.max_bins]
+        for value_bin in value_bins[:-self.max_bins]:
+            self.bins[lowest_kept] += self.bins.pop(value_bin)
+
+    def quantile(self, fraction: float) -> int:
+        """The value at fraction (0 to 1) of the way through the values added, or -1 if there are none."""
+        if not self.count:
+            return -1
+        rank = fraction * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0
+        for value_bin in sorted(self.bins):
+            seen += self.bins[value_bin]
+            if seen > rank:
+                return bin_value(value_bin)
+        return bin_value(max(self.bins))
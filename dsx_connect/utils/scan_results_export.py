@@ -0,0 +1,66 @@
+"""
+Encoding of scan results for bulk export, as NDJSON (one ScanResultModel JSON document per line) or as CSV
+with the verdict flattened into columns.  Both encoders consume an iterator of results and yield chunks of
+bytes, so an export streams from the database cursor without holding the result set in memory.
+"""
+import csv
+import io
+from typing import Iterable, Iterator
+
+import orjson
+
+from dsx_connect.models.scan_models import ScanResultModel
+
+CSV_COLUMNS = ["id", "scan_request_task_id", "metadata_tag", "status", "connector_url", "timestamp", "verdict",
+               "event_description", "reason", "file_type", "file_size_in_bytes", "file_hash",
+               "scan_duration_in_microseconds", "scan_guid"]
+
+# records per yielded chunk, so the response isn't written (and compressed) one small line at a time
+_CHUNK_SIZE = 500
+
+
+def _chunked(results: Iterable[ScanResultModel]) -> Iterator[list[ScanResultModel]]:
+    chunk = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) >= _CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_ndjson(results: Iterable[ScanResultModel]) -> Iterator[bytes]:
+    for chunk in _chunked(results):
+        yield b"".join(orjson.dumps(result.model_dump(mode="json")) + b"\n" for result in chunk)
+
+
+def flatten_result(result: ScanResultModel) -> list:
+    """The result as a row of CSV_COLUMNS."""
+    verdict = result.dpa_verdict
+    details = verdict.verdict_details if verdict else None
+    file_info = verdict.file_info if verdict else None
+    return [result.id, result.scan_request_task_id, result.metadata_tag, result.status, result.connector_url,
+            result.timestamp,
+            verdict.verdict.value if verdict and verdict.verdict else None,
+            details.event_description if details else None,
+            details.reason if details else None,
+            file_info.file_type if file_info else None,
+            file_info.file_size_in_bytes if file_info else None,
+            file_info.file_hash if file_info else None,
+            verdict.scan_duration_in_microseconds if verdict else None,
+            verdict.scan_guid if verdict else None]
+
+
+def export_csv(results: Iterable[ScanResultModel]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for chunk in _chunked(results):
+        writer.writerows(flatten_result(result) for result in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # header only, nothing matched
+        yield buffer.getvalue().encode()